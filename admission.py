@@ -0,0 +1,257 @@
+"""Provides the admission control of the HTTP requests.
+
+Each client has a token bucket per class of routes, so that a flood of scans or bulk
+changes from a client neither starves its own point lookups nor the other clients.
+The scans also share a cap on their concurrency, and the bulk changes a cap on the
+size of their bodies, so that the excess load is shed instead of queued. The imports
+are streamed into the task manager in batches rather than buffered, so they have a
+separate cap on the size of their bodies.
+"""
+
+import math
+import time
+from enum import StrEnum
+from typing import NamedTuple
+
+from starlette import status
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from cache import LRUCache
+
+ERROR_KEY = "detail"
+# The paths that read or change all tasks at once.
+_BULK_PATHS = ("/api/tasks", "/api/tasks/export", "/api/tasks/import")
+_IMPORT_PATH = "/api/tasks/import"
+
+
+class RouteClass(StrEnum):
+    """Class of routes that share a rate limit."""
+
+    READ = "read"
+    SCAN = "scan"
+    WRITE = "write"
+    BULK = "bulk"
+
+
+class Limit(NamedTuple):
+    """Rate limit of a token bucket."""
+
+    rate: float
+    burst: float
+
+
+class AdmissionPolicy(NamedTuple):
+    """Limits of the requests to admit."""
+
+    # Rate limits per client of the classes of routes. The classes without a limit
+    # are not limited.
+    limits: dict[RouteClass, Limit]
+    # Maximum number of scans to handle concurrently, or None to not cap them.
+    max_scans: int | None = None
+    # Maximum size in bytes of the body of a bulk change, or None to not cap it.
+    max_bulk_body: int | None = None
+    # Maximum size in bytes of the body of an import, or None to not cap it.
+    max_import_body: int | None = None
+    # Maximum number of clients to keep the token buckets of. The buckets of the
+    # least recent clients are forgotten, and refilled.
+    max_clients: int = 10_000
+
+
+class TokenBucket:
+    """Bucket that holds up to a burst of tokens and refills them at a rate."""
+
+    __slots__ = ("_limit", "_tokens", "_updated")
+
+    def __init__(self, limit: Limit, now: float) -> None:
+        """Initialize the full token bucket.
+
+        :param limit: The rate limit of the bucket.
+        :param now: The current time in seconds.
+        """
+        self._limit = limit
+        self._tokens = limit.burst
+        self._updated = now
+
+    def take(self, now: float) -> float:
+        """Take a token from the bucket.
+        Time complexity: ``O(1)``.
+
+        :param now: The current time in seconds.
+        :return: 0 if a token is taken, otherwise the seconds until one is
+        available.
+        """
+        self._tokens = min(self._limit.burst,
+                           self._tokens + (now - self._updated) * self._limit.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+
+        return (1 - self._tokens) / self._limit.rate
+
+
+def classify(method: str, path: str) -> RouteClass:
+    """Classify the route of a request.
+
+    :param method: Method of the request.
+    :param path: Path of the request.
+    :return: The class of the route.
+    """
+    if path in _BULK_PATHS:
+        return RouteClass.SCAN if method == "GET" else RouteClass.BULK
+    # The prefix searches are point lookups on the sorted titles.
+    if path.startswith("/api/search") and path != "/api/search/prefix":
+        return RouteClass.SCAN
+    if path == "/api/task" and method != "GET":
+        return RouteClass.WRITE
+
+    return RouteClass.READ
+
+
+class AdmissionMiddleware:
+    """Middleware that admits the requests within the limits of their clients and
+    routes, and rejects the others.
+
+    A request over the rate limit of its client is rejected with 429, and a scan
+    over the concurrency cap with 503, both with a Retry-After header. A bulk change
+    or an import whose body is too large is rejected with 413. The requests run on
+    the event loop, so the counters are not locked.
+    """
+
+    def __init__(self, app: ASGIApp, policy: AdmissionPolicy) -> None:
+        """Initialize the middleware.
+
+        :param app: The application to admit the requests to.
+        :param policy: The limits of the requests to admit.
+        """
+        self._app = app
+        self._limits = policy.limits
+        self._max_scans = policy.max_scans
+        self._max_bulk_body = policy.max_bulk_body
+        self._max_import_body = policy.max_import_body
+        self._buckets: LRUCache[tuple[str, RouteClass], TokenBucket] = LRUCache(
+            policy.max_clients * len(RouteClass)
+        )
+        self._scans = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle a request if it is admitted, or reject it.
+
+        :param scope: Scope of the request.
+        :param receive: Function to receive the messages of the request.
+        :param send: Function to send the messages of the response.
+        """
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+
+        route_class = classify(scope["method"], scope["path"])
+        wait = self._take(scope, route_class)
+        if wait:
+            response = self._reject(status.HTTP_429_TOO_MANY_REQUESTS,
+                                    "Too many requests", wait)
+            await response(scope, receive, send)
+            return
+
+        max_body = (self._max_import_body if scope["path"] == _IMPORT_PATH
+                    else self._max_bulk_body)
+        if route_class == RouteClass.BULK and max_body is not None:
+            if self._content_length(scope) > max_body:
+                response = self._reject(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                        "Request body is too large")
+                await response(scope, receive, send)
+                return
+            receive = self._cap_body(receive, max_body)
+
+        if route_class != RouteClass.SCAN or self._max_scans is None:
+            await self._app(scope, receive, send)
+            return
+
+        if self._scans >= self._max_scans:
+            response = self._reject(status.HTTP_503_SERVICE_UNAVAILABLE,
+                                    "Too many concurrent scans", 1)
+            await response(scope, receive, send)
+            return
+
+        self._scans += 1
+        try:
+            await self._app(scope, receive, send)
+        finally:
+            self._scans -= 1
+
+    def _take(self, scope: Scope, route_class: RouteClass) -> float:
+        """Take a token from the bucket of the client and the class of the route.
+
+        :param scope: Scope of the request.
+        :param route_class: Class of the route of the request.
+        :return: 0 if the request is admitted, otherwise the seconds until it would
+        be.
+        """
+        limit = self._limits.get(route_class)
+        if limit is None:
+            return 0
+
+        client = scope.get("client")
+        key = (client[0] if client else "", route_class)
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(limit, now)
+            self._buckets.put(key, bucket)
+
+        return bucket.take(now)
+
+    @staticmethod
+    def _content_length(scope: Scope) -> int:
+        """Get the declared size of the body of a request.
+
+        :param scope: Scope of the request.
+        :return: The value of the Content-Length header, or 0 if it is absent.
+        """
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                return int(value) if value.isdigit() else 0
+
+        return 0
+
+    @staticmethod
+    def _cap_body(receive: Receive, max_size: int) -> Receive:
+        """Wrap the function to receive a body that is not declared to be too large,
+        to reject it once it turns out to be.
+
+        :param receive: Function to receive the messages of the request.
+        :param max_size: Maximum size in bytes of the body.
+        :return: The wrapped function.
+        """
+        size = 0
+
+        async def receive_capped() -> Message:
+            nonlocal size
+            message = await receive()
+            if message["type"] == "http.request":
+                size += len(message.get("body", b""))
+                if size > max_size:
+                    raise HTTPException(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                        "Request body is too large")
+            return message
+
+        return receive_capped
+
+    @staticmethod
+    def _reject(status_code: int, detail: str,
+                retry_after: float | None = None) -> Response:
+        """Create the response that rejects a request.
+
+        :param status_code: Status code of the response.
+        :param detail: Description of the error.
+        :param retry_after: Seconds until the request may be retried, or None if it
+        should not be.
+        :return: The response.
+        """
+        headers = None
+        if retry_after is not None:
+            headers = {"Retry-After": str(math.ceil(retry_after))}
+
+        return JSONResponse({ERROR_KEY: detail}, status_code, headers)
@@ -0,0 +1,358 @@
+"""Provides an asynchronous interface to the task managers."""
+
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import NamedTuple
+
+from feed import ChangeFeed
+from sqlite_task import SQLiteTaskManager
+from task import (
+    BucketOrder,
+    Cursor,
+    Priority,
+    SortOrder,
+    Task,
+    TaskManager,
+    TaskQuery,
+)
+
+BATCH_SIZE = 1000
+# Number of tasks to add at once for holding the lock for writing only briefly on
+# the event loop, such as about 10 milliseconds with 100,000 tasks stored.
+LOOP_LOAD_SIZE = 250
+EXECUTOR_LOAD_SIZE = 10_000
+
+
+class Page(NamedTuple):
+    """Page of tasks, together with the cursor to get the next page."""
+
+    tasks: Iterable[Task] | AsyncIterable[Task]
+    cursor: Cursor | None
+
+
+class AsyncTaskManager:
+    """Provides the methods of a task manager as coroutines, for calling them from an
+    event loop.
+
+    The methods of an in-memory task manager run directly on the event loop, because
+    they only hold its lock briefly and never wait for I/O. Adding many tasks would
+    hold it for long, so they are added in small chunks that yield to the event loop
+    in between, as load_size tells. The methods of a task
+    manager that blocks on its storage, such as SQLiteTaskManager or TaskManager with
+    a storage, run in an executor with a fixed number of threads instead, so that they
+    neither block the event loop nor compete for the thread pool of the handlers.
+
+    The tasks are read in pages. A page without a limit is lazy when the methods run
+    on the event loop. Otherwise, it is an asynchronous iterable that reads the tasks
+    in batches of BATCH_SIZE in the executor, so that each batch can be sent as soon
+    as it is read.
+    """
+
+    def __init__(self, manager: TaskManager | SQLiteTaskManager, *,
+                 max_workers: int | None = None) -> None:
+        """Initialize the asynchronous task manager.
+
+        :param manager: Task manager to call the methods of.
+        :param max_workers: Number of threads to run the methods in, or None to run
+        them on the event loop.
+        :raises ValueError: If max_workers is not positive.
+        """
+        self._manager = manager
+        self._executor = (None if max_workers is None
+                          else ThreadPoolExecutor(max_workers,
+                                                  thread_name_prefix="task-manager"))
+
+    @property
+    def manager(self) -> TaskManager | SQLiteTaskManager:
+        """Get the task manager that the methods are called on.
+
+        :return: The task manager.
+        """
+        return self._manager
+
+    @property
+    def feed(self) -> ChangeFeed:
+        """Get the feed of the changes made to the tasks.
+
+        :return: The change feed.
+        """
+        return self._manager.feed
+
+    async def _call[T](self, function: Callable[..., T], /, *args: object,
+                       **kwargs: object) -> T:
+        """Call a function on the event loop or in the executor.
+
+        :param function: Function to call.
+        :param args: Positional arguments to call it with.
+        :param kwargs: Keyword arguments to call it with.
+        :return: The return value of the function.
+        """
+        if self._executor is None:
+            return function(*args, **kwargs)
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, partial(function, *args, **kwargs)
+        )
+
+    def _take(self, tasks: Callable[[], Iterable[Task]], limit: int | None) -> Page:
+        """Take a page of tasks.
+
+        :param tasks: Function that returns the tasks to take the page from.
+        :param limit: Maximum number of tasks in the page, or None to take all tasks.
+        :return: The page of tasks.
+        """
+        if limit is not None:
+            return Page(*self._manager.paginate(tasks(), limit=limit))
+
+        return Page(tasks(), None)
+
+    async def _page(self, tasks: Callable[[], Iterable[Task]],
+                    limit: int | None) -> Page:
+        """Take a page of tasks on the event loop or in the executor.
+
+        :param tasks: Function that returns the tasks to take the page from.
+        :param limit: Maximum number of tasks in the page, or None to take all tasks.
+        :return: The page of tasks.
+        """
+        if limit is not None or self._executor is None:
+            return await self._call(self._take, tasks, limit)
+
+        iterator, batch = await self._call(self._start, tasks)
+        return Page(self._stream(iterator, batch), None)
+
+    @staticmethod
+    def _start(tasks: Callable[[], Iterable[Task]]) -> tuple[Iterator[Task],
+                                                             list[Task]]:
+        """Start iterating tasks, reading the first batch so that the errors of the
+        arguments are raised before the page is returned.
+
+        :param tasks: Function that returns the tasks to iterate.
+        :return: The iterator over the tasks, and the first batch of them.
+        """
+        iterator = iter(tasks())
+        return iterator, list(islice(iterator, BATCH_SIZE))
+
+    async def _stream(self, iterator: Iterator[Task],
+                      batch: list[Task]) -> AsyncIterator[Task]:
+        """Lazily read the rest of the tasks in batches in the executor.
+
+        :param iterator: The iterator over the tasks.
+        :param batch: The batch of tasks that has been read.
+        :return: The tasks in the batches.
+        """
+        while True:
+            for task in batch:
+                yield task
+            if len(batch) < BATCH_SIZE:
+                return
+            batch = await self._call(list, islice(iterator, BATCH_SIZE))
+
+    async def add_task(self, task: Task) -> None:
+        """Add a new task.
+
+        :param task: Task to add.
+        :raises ValueError: If the task already exists.
+        """
+        await self._call(self._manager.add_task, task)
+
+    async def add_tasks(self, tasks: Iterable[Task]) -> None:
+        """Add new tasks at once.
+
+        :param tasks: Tasks to add.
+        :raises ValueError: If any of the tasks already exists.
+        """
+        await self._call(self._manager.add_tasks, tasks)
+
+    @property
+    def load_size(self) -> int:
+        """Get the number of tasks to give to the load_tasks method at once, so that
+        the reads are not blocked for long.
+
+        :return: LOOP_LOAD_SIZE if the methods run on the event loop, where adding
+        the tasks blocks it, otherwise EXECUTOR_LOAD_SIZE.
+        """
+        return LOOP_LOAD_SIZE if self._executor is None else EXECUTOR_LOAD_SIZE
+
+    async def load_tasks(self, tasks: Iterable[Task]) -> None:
+        """Add many tasks at once without validating them again.
+        The tasks are added while holding the lock for writing, so on the event loop
+        it is blocked until they are added, and yielded afterward. Give at most
+        load_size tasks at once.
+
+        :param tasks: Tasks to add.
+        :raises ValueError: If any of the tasks already exists.
+        """
+        await self._call(self._manager.load_tasks, tasks)
+        if self._executor is None:
+            await asyncio.sleep(0)
+
+    async def update_task(self, task: Task) -> None:
+        """Update an existing task.
+
+        :param task: Task to update.
+        :raises ValueError: If the task does not exist.
+        """
+        await self._call(self._manager.update_task, task)
+
+    async def update_tasks(self, tasks: Iterable[Task]) -> list[Task]:
+        """Update existing tasks at once.
+
+        :param tasks: Tasks to update.
+        :return: The tasks before they are updated, in the order of the given tasks.
+        :raises ValueError: If any of the tasks does not exist.
+        """
+        return await self._call(self._manager.update_tasks, tasks)
+
+    async def delete_task(self, title: str) -> Task:
+        """Delete a task by its title.
+
+        :param title: Title of the task to delete.
+        :return: The deleted task.
+        :raises ValueError: If the task does not exist.
+        """
+        return await self._call(self._manager.delete_task, title)
+
+    async def delete_tasks(self, titles: Iterable[str]) -> list[Task]:
+        """Delete tasks by their titles at once.
+
+        :param titles: Titles of the tasks to delete.
+        :return: The deleted tasks in the order of the titles.
+        :raises ValueError: If any of the tasks does not exist.
+        """
+        return await self._call(self._manager.delete_tasks, titles)
+
+    async def clear_tasks(self) -> None:
+        """Clear all tasks."""
+        await self._call(self._manager.clear_tasks)
+
+    async def get_task(self, *, title: str) -> Task:
+        """Get a task by its title.
+
+        :param title: Title of the task to get.
+        :return: The task with the title.
+        :raises ValueError: If the task does not exist.
+        """
+        return await self._call(self._manager.get_task, title=title)
+
+    async def get_tasks(self, *, priority: Priority, after: Cursor | None = None,
+                        limit: int | None = None) -> Page:
+        """Get a page of tasks that match the given priority.
+
+        :param priority: Priority of the tasks to get.
+        :param after: Cursor to start after, or None to start from the first task.
+        :param limit: Maximum number of tasks in the page, or None to get all tasks.
+        :return: The page of tasks with the priority.
+        """
+        return await self._page(
+            partial(self._manager.get_tasks, priority=priority, after=after), limit
+        )
+
+    async def get_all_tasks(self, *, after: Cursor | None = None,
+                            limit: int | None = None) -> Page:
+        """Get a page of all tasks sorted by their priority.
+
+        :param after: Cursor to start after, or None to start from the first task.
+        :param limit: Maximum number of tasks in the page, or None to get all tasks.
+        :return: The page of tasks sorted by priority from highest to lowest.
+        """
+        return await self._page(partial(self._manager.get_all_tasks, after=after),
+                                limit)
+
+    async def top(self, n: int, *,
+                  order: BucketOrder = BucketOrder.INSERTION) -> Page:
+        """Get the first tasks sorted by their priority.
+
+        :param n: Maximum number of tasks to get.
+        :param order: Order to sort the tasks with the same priority in.
+        :return: The page of the first n tasks, which has no next page.
+        :raises ValueError: If n is negative.
+        """
+        return await self._page(partial(self._manager.top, n, order=order), None)
+
+    async def search_title(self, *, keyword: str, after: Cursor | None = None,
+                           limit: int | None = None) -> Page:
+        """Search for a page of tasks that have the keyword in their titles.
+
+        :param keyword: Keyword to search for.
+        :param after: Cursor to start after, or None to start from the first task.
+        :param limit: Maximum number of tasks in the page, or None to get all tasks.
+        :return: The page of tasks that have the keyword in their titles.
+        """
+        return await self._page(
+            partial(self._manager.search_title, keyword=keyword, after=after), limit
+        )
+
+    async def search_description(self, *, keyword: str, after: Cursor | None = None,
+                                 limit: int | None = None) -> Page:
+        """Search for a page of tasks that have the keyword in their descriptions.
+
+        :param keyword: Keyword to search for.
+        :param after: Cursor to start after, or None to start from the first task.
+        :param limit: Maximum number of tasks in the page, or None to get all tasks.
+        :return: The page of tasks that have the keyword in their descriptions.
+        """
+        return await self._page(
+            partial(self._manager.search_description, keyword=keyword, after=after),
+            limit,
+        )
+
+    async def search(self, query: TaskQuery, *,
+                     order: SortOrder = SortOrder.PRIORITY,
+                     limit: int | None = None, after: Cursor | None = None) -> Page:
+        """Search for a page of tasks that match all filters of a query.
+        The cursor of the next page is only given when sorting by priority.
+
+        :param query: Query to match the tasks against.
+        :param order: Order to sort the tasks in.
+        :param limit: Maximum number of tasks in the page, or None to get all tasks.
+        :param after: Cursor to start after, or None to start from the first task.
+        Only supported when sorting by priority.
+        :return: The page of tasks that match the query.
+        :raises ValueError: If a cursor is given when not sorting by priority.
+        """
+        if order is SortOrder.PRIORITY:
+            return await self._page(
+                partial(self._manager.search, query, after=after), limit
+            )
+
+        return await self._page(
+            partial(self._manager.search, query, order=order, limit=limit,
+                    after=after),
+            None,
+        )
+
+    async def search_ranked(self, *, query: str, limit: int = 10,
+                            fuzziness: int = 0) -> list[Task]:
+        """Search for the tasks most relevant to a query in their titles and
+        descriptions.
+
+        :param query: Query to search for.
+        :param limit: Maximum number of tasks to get.
+        :param fuzziness: Maximum edit distance of the matching terms.
+        :return: Tasks that contain any term of the query, from the most relevant.
+        :raises ValueError: If the limit is not positive or the fuzziness is
+        negative.
+        """
+        return await self._call(self._manager.search_ranked, query=query,
+                                limit=limit, fuzziness=fuzziness)
+
+    async def search_prefix(self, *, prefix: str, limit: int = 10) -> list[Task]:
+        """Search for the tasks whose titles start with the prefix.
+
+        :param prefix: Prefix of the titles to search for.
+        :param limit: Maximum number of tasks to get.
+        :return: Tasks whose titles start with the prefix, sorted by title.
+        :raises ValueError: If the limit is not positive.
+        """
+        return await self._call(self._manager.search_prefix, prefix=prefix,
+                                limit=limit)
+
+    def close(self) -> None:
+        """Wait for the running methods, and close the task manager."""
+        if self._executor is not None:
+            self._executor.shutdown()
+
+        self._manager.close()
@@ -0,0 +1 @@
+"""Benchmarks of the task management system."""
@@ -0,0 +1,157 @@
+"""Benchmark the requests per second of the sync and async handlers under load.
+
+Run it with ``python -m benchmarks.load``.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import socket
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from starlette.responses import Response
+
+from async_task import AsyncTaskManager
+from main import TaskListResponse
+from task import Priority, Task, TaskManager
+
+HOST = "127.0.0.1"
+PAGE_SIZE = 100
+STARTUP_TIMEOUT = 10
+
+
+def create_app(size: int) -> FastAPI:
+    """Create an application that gets a page of tasks with a sync and an async
+    handler.
+
+    :param size: Number of tasks to add.
+    :return: The application.
+    """
+    manager = TaskManager()
+    manager.add_tasks(
+        Task(title=f"Task {i}", description=f"Description {i}",
+             priority=Priority(i % len(Priority)))
+        for i in range(size)
+    )
+    async_manager = AsyncTaskManager(manager)
+    app = FastAPI()
+
+    @app.get("/sync")
+    def get_tasks_sync() -> Response:
+        tasks, _ = manager.paginate(manager.get_all_tasks(), limit=PAGE_SIZE)
+        return TaskListResponse(tasks)
+
+    @app.get("/async")
+    async def get_tasks_async() -> Response:
+        page = await async_manager.get_all_tasks(limit=PAGE_SIZE)
+        return TaskListResponse(page.tasks)
+
+    return app
+
+
+def serve(size: int, port: int) -> None:
+    """Serve the application.
+
+    :param size: Number of tasks to add.
+    :param port: Port to listen on.
+    """
+    uvicorn.run(create_app(size), host=HOST, port=port, log_level="warning")
+
+
+def find_port() -> int:
+    """Find a free port to listen on.
+
+    :return: The port.
+    """
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_ready(url: str) -> None:
+    """Wait until the server accepts requests.
+
+    :param url: URL to request.
+    :raises TimeoutError: If the server does not start in time.
+    """
+    async with asyncio.timeout(STARTUP_TIMEOUT), httpx.AsyncClient() as client:
+        while True:
+            try:
+                await client.get(url)
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+            else:
+                return
+
+
+async def measure(url: str, requests: int, concurrency: int) -> float:
+    """Measure the requests per second of an endpoint.
+
+    :param url: URL to request.
+    :param requests: Number of requests to send.
+    :param concurrency: Number of requests to send at the same time.
+    :return: The requests per second.
+    """
+    remaining = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits) as client:
+        async def send() -> None:
+            for _ in remaining:
+                response = await client.get(url)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        async with asyncio.TaskGroup() as group:
+            for _ in range(concurrency):
+                group.create_task(send())
+
+        return requests / (time.perf_counter() - start)
+
+
+async def run(port: int, requests: int, concurrency: int) -> None:
+    """Run the load against both handlers.
+
+    :param port: Port the server listens on.
+    :param requests: Number of requests to send to each handler.
+    :param concurrency: Number of requests to send at the same time.
+    """
+    base_url = f"http://{HOST}:{port}"
+    await wait_until_ready(f"{base_url}/sync")
+
+    print(f"Requests per second getting {PAGE_SIZE} tasks "
+          f"with {concurrency} concurrent requests:")
+    for handler in ["sync", "async"]:
+        url = f"{base_url}/{handler}"
+        await measure(url, min(requests, 100), concurrency)
+        rate = await measure(url, requests, concurrency)
+        print(f"{handler:>10}: {rate:10.1f}")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=10_000,
+                        help="number of tasks to add")
+    parser.add_argument("--requests", type=int, default=5_000,
+                        help="number of requests to send to each handler")
+    parser.add_argument("--concurrency", type=int, default=100,
+                        help="number of requests to send at the same time")
+    args = parser.parse_args()
+
+    port = find_port()
+    server = multiprocessing.Process(target=serve, args=(args.size, port),
+                                     daemon=True)
+    server.start()
+    try:
+        asyncio.run(run(port, args.requests, args.concurrency))
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
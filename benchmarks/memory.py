@@ -0,0 +1,65 @@
+"""Benchmark the memory used by the task managers that keep the tasks in memory.
+
+Run it with ``python -m benchmarks.memory``.
+"""
+
+import argparse
+import gc
+import tracemalloc
+from collections.abc import Iterator
+from itertools import batched
+
+from compact_task import CompactTaskManager
+from task import Priority, Task, TaskManager
+
+BATCH_SIZE = 10_000
+
+
+def create_tasks(size: int) -> Iterator[Task]:
+    """Lazily create tasks to add, so that they are freed unless they are stored.
+
+    :param size: Number of tasks to create.
+    :return: The created tasks.
+    """
+    for i in range(size):
+        yield Task(title=f"Task {i}", description=f"Description of the task {i % 100}",
+                   priority=Priority(i % len(Priority)))
+
+
+def measure(manager_type: type[TaskManager], size: int) -> int:
+    """Measure the memory that a task manager holds after adding tasks.
+
+    :param manager_type: Type of the task manager.
+    :param size: Number of tasks to add.
+    :return: The memory in bytes.
+    """
+    gc.collect()
+    tracemalloc.start()
+    manager = manager_type()
+    for batch in batched(create_tasks(size), BATCH_SIZE):
+        manager.add_tasks(batch)
+
+    gc.collect()
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del manager
+    return memory
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100_000,
+                        help="number of tasks to add")
+    args = parser.parse_args()
+
+    print(f"Memory held after adding {args.size} tasks:")
+    for manager_type in [TaskManager, CompactTaskManager]:
+        memory = measure(manager_type, args.size)
+        print(f"{manager_type.__name__:>20}: {memory / 2 ** 20:10.1f} MiB, "
+              f"{memory / args.size:8.1f} bytes per task")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark serializing a list of tasks into a JSON response.
+
+Run it with ``python -m benchmarks.serialization``.
+"""
+
+import argparse
+import asyncio
+import time
+from collections.abc import Callable
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+from starlette.responses import JSONResponse
+
+from main import TaskListResponse
+from task import Priority, Task
+
+
+def create_tasks(size: int) -> list[Task]:
+    """Create tasks to serialize.
+
+    :param size: Number of tasks to create.
+    :return: The created tasks.
+    """
+    return [Task(title=f"Task {i}", description=f"Description of the task {i}",
+                 priority=Priority(i % len(Priority))) for i in range(size)]
+
+
+def measure(function: Callable[[], object], repeat: int) -> float:
+    """Measure the fastest time of calling a function.
+
+    :param function: Function to call.
+    :param repeat: Number of times to call the function.
+    :return: The fastest time in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100_000,
+                        help="number of tasks to serialize")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="number of times to repeat each measurement")
+    args = parser.parse_args()
+
+    field = create_model_field(name="response", type_=list[Task],
+                               mode="serialization")
+    adapter = TypeAdapter(list[Task])
+
+    def response_model() -> bytes:
+        content = asyncio.run(serialize_response(field=field,
+                                                 response_content=tasks))
+        return JSONResponse(content).body
+
+    def type_adapter() -> bytes:
+        return adapter.dump_json(tasks)
+
+    def cold_cache() -> bytes:
+        for task in tasks:
+            task.__dict__.pop("json_bytes", None)
+        return TaskListResponse(tasks).body
+
+    def warm_cache() -> bytes:
+        return TaskListResponse(tasks).body
+
+    tasks = create_tasks(args.size)
+    print(f"Serializing {args.size} tasks, fastest of {args.repeat}:")
+    for name, function in [("response model", response_model),
+                           ("type adapter", type_adapter),
+                           ("cached JSON, cold", cold_cache),
+                           ("cached JSON, warm", warm_cache)]:
+        print(f"{name:>20}: {measure(function, args.repeat) * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""Benchmark the hot paths of the task manager and the HTTP API, and compare them
+with a saved baseline to catch regressions.
+
+Run it with ``python -m benchmarks.suite``. Save the results with ``--save`` and
+compare later runs with them with ``--baseline``.
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from itertools import batched
+from pathlib import Path
+from typing import NamedTuple
+
+from httpx import Response
+from starlette.testclient import TestClient
+
+# The cases of the HTTP API measure the endpoints rather than the rate limits.
+os.environ["TMS_ADMISSION"] = "off"
+
+import main as api
+from task import Priority, Task, TaskManager
+
+BATCH_SIZE = 10_000
+PAGE_SIZE = 100
+SEED = 0
+
+
+class Case(NamedTuple):
+    """Operation to benchmark, called once per sample."""
+
+    name: str
+    operation: Callable[[], object]
+    samples: int
+
+
+class Result(NamedTuple):
+    """Latency percentiles and peak memory of a benchmarked operation."""
+
+    p50: float
+    p90: float
+    p99: float
+    peak: int
+
+
+def create_task(i: int) -> Task:
+    """Create a synthetic task.
+
+    :param i: Number of the task.
+    :return: The created task.
+    """
+    return Task(title=f"Task {i}", description=f"Description of the task {i % 1000}",
+                priority=Priority(i % len(Priority)))
+
+
+def load(manager: TaskManager, tasks: list[Task]) -> None:
+    """Add tasks in batches.
+
+    :param manager: Task manager to add the tasks to.
+    :param tasks: Tasks to add.
+    """
+    for batch in batched(tasks, BATCH_SIZE):
+        manager.add_tasks(batch)
+
+
+def measure(case: Case) -> Result:
+    """Measure the latencies of an operation, then the peak memory allocated while
+    it runs once more.
+
+    :param case: The case to measure.
+    :return: The result of the case.
+    :raises RuntimeError: If a request of the case is not successful, so that it
+    does not measure the handling of the error instead.
+    """
+    latencies = []
+    for _ in range(case.samples):
+        start = time.perf_counter()
+        result = case.operation()
+        latencies.append(time.perf_counter() - start)
+        if isinstance(result, Response) and not result.is_success:
+            raise RuntimeError(f"{case.name} returned {result.status_code}.")
+
+    gc.collect()
+    tracemalloc.start()
+    current, _ = tracemalloc.get_traced_memory()
+    case.operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if len(latencies) == 1:
+        latencies *= 2
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return Result(p50=cuts[49], p90=cuts[89], p99=cuts[98], peak=peak - current)
+
+
+def manager_cases(manager: TaskManager, tasks: list[Task], samples: int,
+                  repeat: int, rng: random.Random) -> Iterator[Case]:
+    """Create the cases of the task manager.
+
+    :param manager: Task manager that holds the tasks.
+    :param tasks: The tasks held by the task manager.
+    :param samples: Number of samples of the operations on a single task.
+    :param repeat: Number of samples of the operations on all tasks.
+    :param rng: Random number generator to choose the tasks with.
+    :return: The cases.
+    """
+    yield Case("add_tasks", lambda: load(TaskManager(), tasks), repeat)
+
+    # Measuring the peak memory adds one more task after the samples.
+    extra = [create_task(len(tasks) + i) for i in range(samples + 1)]
+    new_tasks = iter(extra)
+    yield Case("add_task", lambda: manager.add_task(next(new_tasks)), samples)
+    manager.delete_tasks(task.title for task in extra)
+
+    yield Case("get_task",
+               lambda: manager.get_task(title=rng.choice(tasks).title), samples)
+    yield Case("get_all_tasks", lambda: sum(1 for _ in manager.get_all_tasks()),
+               repeat)
+    yield Case("search_tasks", lambda: sum(1 for _ in manager.search_tasks(
+        predicate=lambda task: task.priority == Priority.HIGH
+    )), repeat)
+    yield Case("update_task", lambda: manager.update_task(
+        rng.choice(tasks).model_copy(update={"description": "Updated"})
+    ), samples)
+
+
+def api_cases(client: TestClient, tasks: list[Task], samples: int,
+              rng: random.Random) -> Iterator[Case]:
+    """Create the cases of the HTTP API.
+
+    :param client: Client of the application holding the tasks.
+    :param tasks: The tasks held by the application.
+    :param samples: Number of samples of each request.
+    :param rng: Random number generator to choose the tasks with.
+    :return: The cases.
+    """
+    yield Case("GET /api/task", lambda: client.get(
+        "/api/task", params={"title": rng.choice(tasks).title}
+    ), samples)
+    yield Case("GET /api/tasks", lambda: client.get(
+        "/api/tasks", params={"limit": PAGE_SIZE}
+    ), samples)
+    yield Case("GET /api/search/title", lambda: client.get(
+        "/api/search/title", params={"keyword": "Task 1", "limit": PAGE_SIZE}
+    ), samples)
+    yield Case("PUT /api/task", lambda: client.put(
+        "/api/task", json=rng.choice(tasks).model_dump(mode="json")
+    ), samples)
+
+
+def run(size: int, samples: int, repeat: int) -> dict[str, Result]:
+    """Run all cases with a number of tasks.
+
+    :param size: Number of tasks.
+    :param samples: Number of samples of the operations on a single task.
+    :param repeat: Number of samples of the operations on all tasks.
+    :return: The results by the names of the cases.
+    """
+    rng = random.Random(SEED)  # noqa: S311
+    tasks = [create_task(i) for i in range(size)]
+    results = {}
+
+    manager = TaskManager()
+    load(manager, tasks)
+    for case in manager_cases(manager, tasks, samples, repeat, rng):
+        results[case.name] = measure(case)
+    del manager
+
+    load(api.manager, tasks)
+    try:
+        client = TestClient(api.app)
+        for case in api_cases(client, tasks, samples, rng):
+            results[case.name] = measure(case)
+    finally:
+        api.manager.clear_tasks()
+
+    return results
+
+
+def report(size: int, results: dict[str, Result], baseline: dict[str, dict],
+           tolerance: float) -> int:
+    """Print the results, comparing their median latencies with the baseline.
+
+    :param size: Number of tasks.
+    :param results: The results by the names of the cases.
+    :param baseline: The baseline results by the keys of the cases.
+    :param tolerance: Ratio of the median latency to the baseline above which a
+    case is regressed.
+    :return: The number of the regressed cases.
+    """
+    regressions = 0
+    print(f"\n{size} tasks (latencies in ms):")
+    print(f"{'case':>22} {'p50':>10} {'p90':>10} {'p99':>10} {'peak MiB':>10} "
+          f"{'vs base':>8}")
+    for name, result in results.items():
+        line = (f"{name:>22} {result.p50 * 1000:10.3f} {result.p90 * 1000:10.3f} "
+                f"{result.p99 * 1000:10.3f} {result.peak / 2 ** 20:10.2f}")
+
+        base = baseline.get(f"{size}/{name}")
+        if base is not None:
+            ratio = result.p50 / base["p50"]
+            line += f" {ratio:7.2f}x"
+            if ratio > 1 + tolerance:
+                line += " REGRESSED"
+                regressions += 1
+
+        print(line)
+
+    return regressions
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1_000, 100_000, 1_000_000],
+                        help="numbers of tasks to run the cases with")
+    parser.add_argument("--samples", type=int, default=1000,
+                        help="number of samples of the operations on a single task")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="number of samples of the operations on all tasks")
+    parser.add_argument("--baseline", type=Path,
+                        help="results saved by --save to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="ratio of the median latency to the baseline above "
+                             "which a case is regressed")
+    parser.add_argument("--save", type=Path, help="file to save the results to")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())
+
+    saved = {}
+    regressions = 0
+    for size in args.sizes:
+        results = run(size, args.samples, args.repeat)
+        regressions += report(size, results, baseline, args.tolerance)
+        saved |= {f"{size}/{name}": result._asdict()
+                  for name, result in results.items()}
+
+    if args.save is not None:
+        args.save.write_text(json.dumps(saved, indent=2))
+
+    if regressions:
+        print(f"\n{regressions} cases regressed by more than "
+              f"{args.tolerance:.0%} from the baseline.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Provides caches for speeding up the repeated queries of the task manager."""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import NamedTuple
+
+
+class CacheInfo(NamedTuple):
+    """Statistics of a cache."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class LRUCache[K: Hashable, V]:
+    """Cache that evicts the least recently used entry when it is full.
+    It is safe to use from multiple threads.
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        """Initialize the LRU cache.
+
+        :param maxsize: Maximum number of entries to keep.
+        :raises ValueError: If maxsize is not positive.
+        """
+        if maxsize <= 0:
+            raise ValueError("The maximum number of entries must be positive.")
+
+        self._maxsize = maxsize
+        self._entries: OrderedDict[K, V] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def maxsize(self) -> int:
+        """Get the maximum number of entries to keep.
+
+        :return: The maximum number of entries.
+        """
+        return self._maxsize
+
+    def get(self, key: K) -> V | None:
+        """Get the value of a key, marking it as the most recently used.
+        Time complexity: ``O(1)``.
+
+        :param key: Key to get the value of.
+        :return: The value of the key, or None if it is not cached.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+    def peek(self, key: K) -> V | None:
+        """Get the value of a key without marking it as used or counting the lookup.
+        Time complexity: ``O(1)``.
+
+        :param key: Key to get the value of.
+        :return: The value of the key, or None if it is not cached.
+        """
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: K, value: V) -> None:
+        """Cache the value of a key, evicting the least recently used entry if the
+        cache is full.
+        Time complexity: ``O(1)``.
+
+        :param key: Key to cache the value of.
+        :param value: Value to cache.
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def evict_if(self, predicate: Callable[[K], bool]) -> None:
+        """Evict the entries whose keys satisfy a predicate.
+        Time complexity: ``O(s)`` where s is the number of cached entries.
+
+        :param predicate: Predicate function to check for each key.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Evict all entries.
+        Time complexity: ``O(1)``.
+        """
+        with self._lock:
+            self._entries = OrderedDict()
+
+    def info(self) -> CacheInfo:
+        """Get the statistics of the cache.
+
+        :return: The statistics of the cache.
+        """
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._maxsize,
+                             len(self._entries))
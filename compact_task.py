@@ -0,0 +1,55 @@
+"""Provides a task manager that stores the tasks compactly in memory."""
+
+import sys
+
+from task import Priority, Task, TaskManager
+
+
+class TaskRecord:
+    """Contains the values of a task in a compact form."""
+
+    __slots__ = ("description", "priority", "title")
+
+    def __init__(self, title: str, description: str, priority: Priority) -> None:
+        """Initialize the task record.
+
+        :param title: Title of the task.
+        :param description: Description of the task.
+        :param priority: Priority of the task.
+        """
+        self.title = title
+        self.description = description
+        self.priority = priority
+
+
+class CompactTaskManager(TaskManager):
+    """Provides utilities for managing tasks, storing them compactly in memory.
+    It has the same interface as TaskManager.
+
+    Each task is stored as a TaskRecord rather than a Task. A Task also holds a
+    dictionary of its values and a set of its fields, which take several times the
+    memory of the record. The descriptions are interned, so that tasks with the same
+    description share it.
+
+    A new Task is built from the record whenever a task is read, so reading tasks is
+    slower than in TaskManager, and their serialized JSON is not cached.
+    """
+
+    @staticmethod
+    def _pack(task: Task) -> TaskRecord:
+        """Convert a task into a record.
+
+        :param task: Task to convert.
+        :return: The record of the task.
+        """
+        return TaskRecord(task.title, sys.intern(task.description), task.priority)
+
+    @staticmethod
+    def _unpack(task: TaskRecord) -> Task:
+        """Convert a record back into a task.
+
+        :param task: The record of the task.
+        :return: The task.
+        """
+        return Task(title=task.title, description=task.description,
+                    priority=task.priority)
@@ -0,0 +1,183 @@
+"""Provides a feed of the changes made to the tasks of a task manager."""
+
+import secrets
+import threading
+from collections import deque
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from task import Change
+
+
+class ChangeFeed:
+    """Keeps the latest changes made to the tasks, numbered by a version that
+    increases by one with each change, and notifies the listeners of them.
+
+    The version starts from 0 whenever the feed is created, such as when the program
+    restarts, unless it is reset to continue from another version. So the versions
+    are qualified by an epoch, which is random for each feed unless it is reset to
+    continue another one.
+
+    The history is capped by the number of tasks that the kept changes carry rather
+    than by the number of changes, since a bulk change carries all of its tasks. The
+    oldest changes are dropped once the cap is exceeded, even the latest one if it
+    alone exceeds it.
+    """
+
+    def __init__(self, history: int = 10_000) -> None:
+        """Initialize the change feed.
+
+        :param history: Number of the tasks that the kept changes carry at most. A
+        change without tasks counts as one.
+        :raises ValueError: If history is not positive.
+        """
+        if history <= 0:
+            raise ValueError("The number of changes to keep must be positive.")
+
+        self._lock = threading.Lock()
+        self._published = threading.Condition(self._lock)
+        self._epoch = secrets.token_hex(4)
+        self._version = 0
+        self._history = history
+        self._size = 0
+        self._changes: deque[Change] = deque()
+        self._listeners: list[Callable[[], None]] = []
+
+    @property
+    def version(self) -> int:
+        """Get the version of the latest change.
+
+        :return: The version of the latest change, or 0 if there are no changes.
+        """
+        return self._version
+
+    @property
+    def epoch(self) -> str:
+        """Get the epoch of the versions.
+
+        :return: The epoch of the versions.
+        """
+        return self._epoch
+
+    @property
+    def position(self) -> tuple[str, int]:
+        """Get the epoch and the version of the latest change at once.
+
+        :return: The epoch and the version of the latest change.
+        """
+        with self._lock:
+            return self._epoch, self._version
+
+    @staticmethod
+    def _size_of(change: "Change") -> int:
+        """Get the number of tasks or titles that a change carries.
+
+        :param change: The change.
+        :return: The number of them, or 1 if it carries a single task or none.
+        """
+        if change.tasks is not None:
+            return max(len(change.tasks), 1)
+        if change.titles is not None:
+            return max(len(change.titles), 1)
+        return 1
+
+    def publish(self, change: "Change") -> int:
+        """Add a change as the latest one, dropping the oldest changes over the
+        history, and notify the listeners.
+        Time complexity: ``O(l + d)`` where l is the number of listeners and d is the
+        number of the dropped changes.
+
+        :param change: The change to add.
+        :return: The version of the change.
+        """
+        with self._lock:
+            self._changes.append(change)
+            self._size += self._size_of(change)
+            while self._size > self._history:
+                self._size -= self._size_of(self._changes.popleft())
+            self._version += 1
+            version = self._version
+            self._published.notify_all()
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            listener()
+
+        return version
+
+    def reset(self, version: int, epoch: str | None = None) -> None:
+        """Forget the kept changes and continue from a version, such as after the
+        tasks are replaced by a snapshot taken at the version, and notify the
+        listeners. The changes before the version are no longer kept.
+        Time complexity: ``O(l)`` where l is the number of listeners.
+
+        :param version: Version to continue from.
+        :param epoch: Epoch of the version, or None to keep the current epoch.
+        """
+        with self._lock:
+            self._changes.clear()
+            self._size = 0
+            self._version = version
+            if epoch is not None:
+                self._epoch = epoch
+            self._published.notify_all()
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            listener()
+
+    def wait_for(self, version: int, timeout: float) -> bool:
+        """Wait until the feed reaches a version, such as one that a client got
+        from another process sharing the same feed.
+
+        :param version: The version to wait for.
+        :param timeout: Maximum number of seconds to wait.
+        :return: True if the feed has reached the version, False if it has not in
+        time.
+        """
+        with self._published:
+            return self._published.wait_for(lambda: self._version >= version,
+                                            timeout)
+
+    def get_changes(self, *, since: int,
+                    epoch: str | None = None) -> list[tuple[int, "Change"]]:
+        """Get the changes made after a version.
+        Time complexity: ``O(k)`` where k is the number of changes after the version.
+
+        :param since: Version to get the changes after.
+        :param epoch: Epoch of the version, or None if it is the current epoch.
+        :return: The changes after the version with their versions, from the oldest.
+        :raises ValueError: If the version is of another epoch, the changes after it
+        are no longer kept, or it is newer than the latest change.
+        """
+        with self._lock:
+            if epoch is not None and epoch != self._epoch:
+                raise ValueError(f"Epoch {epoch} is not the current epoch.")
+            count = self._version - since
+            if count < 0:
+                raise ValueError(f"Version {since} is newer than the latest change.")
+            if count > len(self._changes):
+                raise ValueError(f"Changes after version {since} are no longer kept.")
+
+            return [(self._version - i + 1, self._changes[-i])
+                    for i in range(count, 0, -1)]
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Add a listener that is called after each change is published.
+        It is called from the thread that makes the change, so it must be quick and
+        thread-safe.
+
+        :param listener: The listener to add.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[], None]) -> None:
+        """Remove a listener.
+
+        :param listener: The listener to remove.
+        :raises ValueError: If the listener has not been added.
+        """
+        with self._lock:
+            self._listeners.remove(listener)
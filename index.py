@@ -0,0 +1,588 @@
+"""Provides indexes for speeding up the searches of the task manager."""
+
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Iterator
+from itertools import batched, islice
+from operator import itemgetter
+
+_WORD = re.compile(r"\w+")
+# Checked in order, so that the longer suffixes are stripped first.
+_SUFFIXES = ("ies", "ing", "ed", "es", "ly", "s")
+_MIN_STEM_LENGTH = 3
+
+
+def stem(word: str) -> str:
+    """Strip the most common inflectional suffix of an English word.
+    It is much lighter than a real stemmer, but it maps the plurals and the tenses of
+    most words to the same term.
+
+    :param word: Case-folded word to stem.
+    :return: The stem of the word.
+    """
+    for suffix in _SUFFIXES:
+        if (word.endswith(suffix) and len(word) - len(suffix) >= _MIN_STEM_LENGTH
+                and not word.endswith("ss")):
+            word = word[:-len(suffix)]
+            if suffix == "ies":
+                return word + "y"
+            # Such as running and stopped, but not falling.
+            if (suffix in {"ing", "ed"} and word[-1] == word[-2]
+                    and word[-1] not in "aeioulsz"):
+                return word[:-1]
+            return word
+
+    return word
+
+
+def words(text: str) -> list[str]:
+    """Split a text into its case-folded words.
+    Time complexity: ``O(m)`` where m is the length of the text.
+
+    :param text: Text to split.
+    :return: The words of the text in their order.
+    """
+    return _WORD.findall(text.casefold())
+
+
+def tokenize(text: str) -> list[str]:
+    """Split a text into its case-folded and stemmed terms.
+    Time complexity: ``O(m)`` where m is the length of the text.
+
+    :param text: Text to tokenize.
+    :return: The terms of the text in their order.
+    """
+    return [stem(word) for word in words(text)]
+
+
+def edit_distance(source: str, target: str, max_distance: int) -> int:
+    """Get the Levenshtein distance between two strings, up to a maximum.
+    Time complexity: ``O(m * d)`` where m is the length of the source and d is the
+    maximum distance.
+
+    :param source: String to edit.
+    :param target: String to edit the source into.
+    :param max_distance: Maximum distance to compute.
+    :return: The distance, or max_distance + 1 if it is greater than max_distance.
+    """
+    if abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+
+    beyond = max_distance + 1
+    previous = list(range(len(target) + 1))
+    for i, char in enumerate(source, 1):
+        # Only the cells within max_distance of the diagonal can be small enough.
+        start = max(1, i - max_distance)
+        end = min(len(target), i + max_distance)
+        current = [beyond] * (len(target) + 1)
+        if start == 1:
+            current[0] = i
+        for j in range(start, end + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (char != target[j - 1]))
+        if min(current[start - 1:end + 1]) > max_distance:
+            return beyond
+        previous = current
+
+    return min(previous[-1], beyond)
+
+
+class _KeyTable:
+    """Numbers the keys of an index with increasing integers, so that its posting
+    lists hold the numbers in arrays rather than the keys in sets. The number of a
+    removed key is retired rather than reused, and the numbers are compacted once
+    more of them are retired than live.
+    """
+
+    __slots__ = ("ids", "keys", "retired")
+
+    def __init__(self) -> None:
+        """Initialize the empty key table."""
+        self.ids: dict[str, int] = {}
+        self.keys: list[str | None] = []
+        self.retired = 0
+
+    def __len__(self) -> int:
+        """Get the number of live keys.
+
+        :return: The number of live keys.
+        """
+        return len(self.ids)
+
+    def add(self, key: str) -> int:
+        """Assign the next number to a key, retiring its previous number if any.
+
+        :param key: Key to number.
+        :return: The number of the key, greater than all previous numbers.
+        """
+        self.remove(key)
+        key_id = len(self.keys)
+        self.keys.append(key)
+        self.ids[key] = key_id
+        return key_id
+
+    def remove(self, key: str) -> int | None:
+        """Retire the number of a key.
+
+        :param key: Key to retire the number of.
+        :return: The retired number, or None if the key has no number.
+        """
+        key_id = self.ids.pop(key, None)
+        if key_id is not None:
+            self.keys[key_id] = None
+            self.retired += 1
+        return key_id
+
+    def should_compact(self) -> bool:
+        """Check if more numbers are retired than live.
+
+        :return: True if the numbers should be compacted, False otherwise.
+        """
+        return self.retired > len(self.ids)
+
+    def compact(self) -> list[int]:
+        """Renumber the live keys from 0, keeping their order.
+
+        :return: The new number of each old number, or -1 for the retired ones.
+        """
+        remap = [-1] * len(self.keys)
+        keys: list[str | None] = []
+        for key_id, key in enumerate(self.keys):
+            if key is not None:
+                remap[key_id] = len(keys)
+                self.ids[key] = len(keys)
+                keys.append(key)
+
+        self.keys = keys
+        self.retired = 0
+        return remap
+
+
+def _contains(ids: array, key_id: int) -> bool:
+    """Check if a sorted array of numbers contains a number.
+
+    :param ids: The sorted array.
+    :param key_id: The number.
+    :return: True if the array contains the number, False otherwise.
+    """
+    i = bisect_left(ids, key_id)
+    return i < len(ids) and ids[i] == key_id
+
+
+class NGramIndex:
+    """Inverted index from the n-grams of texts to the keys of the texts containing
+    them.
+
+    The posting lists are sorted arrays of the numbers of the keys, which take a
+    fraction of the memory of sets of the keys. Removing a text retires its number
+    instead of removing it from the posting lists, which are compacted once more
+    numbers are retired than live.
+    """
+
+    def __init__(self, n: int = 3) -> None:
+        """Initialize the n-gram index.
+
+        :param n: Length of the n-grams.
+        :raises ValueError: If n is not positive.
+        """
+        if n <= 0:
+            raise ValueError("The length of the n-grams must be positive.")
+
+        self._n = n
+        self._table = _KeyTable()
+        self._postings: dict[str, array] = {}
+
+    def _ngrams(self, text: str) -> set[str]:
+        """Get the n-grams of a text.
+
+        :param text: Text to get the n-grams of.
+        :return: The n-grams of the text.
+        """
+        return {text[i:i + self._n] for i in range(len(text) - self._n + 1)}
+
+    def add(self, key: str, text: str) -> None:
+        """Index a text, replacing the text indexed with the key if any.
+        Time complexity: ``O(m)`` where m is the length of the text.
+
+        :param key: Key to associate with the text.
+        :param text: Text to index.
+        """
+        key_id = self._table.add(key)
+        for ngram in self._ngrams(text):
+            ids = self._postings.get(ngram)
+            if ids is None:
+                self._postings[ngram] = array("I", (key_id,))
+            else:
+                ids.append(key_id)
+        self._compact_if_needed()
+
+    def remove(self, key: str, text: str) -> None:  # noqa: ARG002
+        """Remove a text from the index.
+        Time complexity: ``O(1)``, plus ``O(p)`` amortized over the removals for
+        compacting the p entries of the posting lists.
+
+        :param key: Key associated with the text.
+        :param text: Text that was indexed with the key.
+        """
+        self._table.remove(key)
+        self._compact_if_needed()
+
+    def _compact_if_needed(self) -> None:
+        """Drop the retired numbers from the posting lists if more numbers are
+        retired than live.
+        """
+        if not self._table.should_compact():
+            return
+
+        remap = self._table.compact()
+        postings = {}
+        for ngram, ids in self._postings.items():
+            live = array("I", [remap[i] for i in ids if remap[i] >= 0])
+            if live:
+                postings[ngram] = live
+        self._postings = postings
+
+    def candidates(self, keyword: str) -> set[str] | None:
+        """Get the keys of the texts that may contain the keyword.
+        Every text containing the keyword is in the candidates, but not every
+        candidate contains the keyword.
+        Time complexity: ``O(m + k * g * log p)`` where m is the length of the
+        keyword, k is the size of the smallest posting list of its g n-grams, and p
+        is the size of the largest one.
+
+        :param keyword: Keyword to search for.
+        :return: The candidate keys, or None if the keyword is too short to be
+        narrowed down by the index.
+        """
+        ngrams = self._ngrams(keyword)
+        if not ngrams:
+            return None
+
+        postings = []
+        for ngram in ngrams:
+            ids = self._postings.get(ngram)
+            if ids is None:
+                return set()
+
+            postings.append(ids)
+
+        postings.sort(key=len)
+        keys = self._table.keys
+        candidates = set()
+        for key_id in postings[0]:
+            key = keys[key_id]
+            if key is not None and all(_contains(ids, key_id)
+                                       for ids in postings[1:]):
+                candidates.add(key)
+
+        return candidates
+
+    def estimate(self, keyword: str) -> int | None:
+        """Estimate the number of candidates for the keyword without finding them.
+        It is the size of the smallest posting list of its n-grams, which is at least
+        the number of candidates.
+        Time complexity: ``O(m)`` where m is the length of the keyword.
+
+        :param keyword: Keyword to search for.
+        :return: The estimated number of candidates, or None if the keyword is too
+        short to be narrowed down by the index.
+        """
+        ngrams = self._ngrams(keyword)
+        if not ngrams:
+            return None
+
+        return min(len(self._postings.get(ngram, ())) for ngram in ngrams)
+
+    def clear(self) -> None:
+        """Remove all texts from the index.
+        Time complexity: ``O(1)``.
+        """
+        self._table = _KeyTable()
+        self._postings = {}
+
+
+class FullTextIndex:
+    """Inverted index from the terms of texts to the keys of the texts containing
+    them, which ranks the texts by their relevance to a query with BM25.
+
+    The posting lists are arrays of the numbers of the keys, each followed by the
+    frequency of the term, which are compacted like those of NGramIndex. The number
+    of the live texts containing each term is counted separately for its weight.
+    """
+
+    def __init__(self, *, k1: float = 1.2, b: float = 0.75) -> None:
+        """Initialize the full-text index.
+
+        :param k1: How quickly the score of a term saturates as it repeats in a
+        text.
+        :param b: How much the score of a term is normalized by the length of the
+        text, from 0 to 1.
+        """
+        self._k1 = k1
+        self._b = b
+        self._table = _KeyTable()
+        self._postings: dict[str, array] = {}
+        self._counts: dict[str, int] = {}
+        self._lengths = array("I")
+        self._total_length = 0
+
+    def add(self, key: str, text: str) -> None:
+        """Index a text whose key is not indexed.
+        Time complexity: ``O(m)`` where m is the length of the text.
+
+        :param key: Key to associate with the text.
+        :param text: Text to index.
+        """
+        terms = tokenize(text)
+        key_id = self._table.add(key)
+        self._lengths.append(len(terms))
+        self._total_length += len(terms)
+        for term, frequency in Counter(terms).items():
+            posting = self._postings.get(term)
+            if posting is None:
+                self._postings[term] = array("I", (key_id, frequency))
+            else:
+                posting.append(key_id)
+                posting.append(frequency)
+            self._counts[term] = self._counts.get(term, 0) + 1
+        self._compact_if_needed()
+
+    def remove(self, key: str, text: str) -> None:
+        """Remove a text from the index.
+        Time complexity: ``O(m)`` where m is the length of the text, plus ``O(p)``
+        amortized over the removals for compacting the p entries of the posting
+        lists.
+
+        :param key: Key associated with the text.
+        :param text: Text that was indexed with the key.
+        """
+        key_id = self._table.remove(key)
+        if key_id is None:
+            return
+
+        self._total_length -= self._lengths[key_id]
+        for term in set(tokenize(text)):
+            count = self._counts.get(term, 0) - 1
+            if count > 0:
+                self._counts[term] = count
+            else:
+                self._counts.pop(term, None)
+        self._compact_if_needed()
+
+    def _compact_if_needed(self) -> None:
+        """Drop the retired numbers from the posting lists if more numbers are
+        retired than live.
+        """
+        if not self._table.should_compact():
+            return
+
+        remap = self._table.compact()
+        self._lengths = array("I", [length for key_id, length
+                                    in enumerate(self._lengths)
+                                    if remap[key_id] >= 0])
+        postings = {}
+        for term, posting in self._postings.items():
+            if term not in self._counts:
+                continue
+
+            live = array("I")
+            for i in range(0, len(posting), 2):
+                key_id = remap[posting[i]]
+                if key_id >= 0:
+                    live.append(key_id)
+                    live.append(posting[i + 1])
+            postings[term] = live
+        self._postings = postings
+
+    def _expand(self, term: str, fuzziness: int) -> list[tuple[str, float]]:
+        """Find the indexed terms that match a term of a query.
+
+        :param term: Term of the query.
+        :param fuzziness: Maximum edit distance of the matching terms.
+        :return: The matching terms with their weights, which decrease with their
+        distances to the term.
+        """
+        if not fuzziness:
+            return [(term, 1)] if term in self._counts else []
+
+        matches = []
+        for other in self._counts:
+            distance = edit_distance(term, other, fuzziness)
+            if distance <= fuzziness:
+                matches.append((other, 1 / (1 + distance)))
+
+        return matches
+
+    def search(self, query: str, *, limit: int,
+               fuzziness: int = 0) -> list[tuple[str, float]]:
+        """Get the keys of the texts most relevant to a query.
+        A text is relevant if it contains any term of the query, and the rarer the
+        terms it contains, the more relevant it is.
+        Time complexity: ``O(p + c log l)`` where p is the total size of the posting
+        lists of the terms of the query, c is the number of texts containing any of
+        them, and l is the limit. Fuzzy matching adds ``O(v * m * f)`` where v is
+        the number of the indexed terms, m is the length of a term and f is the
+        fuzziness.
+
+        :param query: Query to search for.
+        :param limit: Maximum number of keys to get.
+        :param fuzziness: Maximum edit distance between the terms of the query and
+        the terms of the texts to match them.
+        :return: The keys with their scores, from the most relevant.
+        """
+        count = len(self._table)
+        if not count:
+            return []
+
+        average_length = self._total_length / count or 1
+        keys = self._table.keys
+        scores: defaultdict[str, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            for match, weight in self._expand(term, fuzziness):
+                posting = self._postings[match]
+                matches = self._counts[match]
+                idf = math.log(1 + (count - matches + 0.5) / (matches + 0.5))
+                for key_id, frequency in batched(posting, 2, strict=True):
+                    key = keys[key_id]
+                    if key is None:
+                        continue
+                    norm = (1 - self._b
+                            + self._b * self._lengths[key_id] / average_length)
+                    scores[key] += (weight * idf * frequency * (self._k1 + 1)
+                                    / (frequency + self._k1 * norm))
+
+        return heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+
+    def clear(self) -> None:
+        """Remove all texts from the index.
+        Time complexity: ``O(1)``.
+        """
+        self._table = _KeyTable()
+        self._postings = {}
+        self._counts = {}
+        self._lengths = array("I")
+        self._total_length = 0
+
+
+class SortedKeys:
+    """Keys in sorted order, for iterating them in order from any key.
+    The keys are kept in sorted blocks of up to about twice the load, found by their
+    last keys, so that adding or removing a key moves at most a block rather than
+    all keys after it.
+    """
+
+    def __init__(self, load: int = 512) -> None:
+        """Initialize the empty sorted keys.
+
+        :param load: Number of the keys to split a block into halves of when it has
+        twice as many.
+        :raises ValueError: If load is not positive.
+        """
+        if load <= 0:
+            raise ValueError("The load must be positive.")
+
+        self._load = load
+        self._blocks: list[list[str]] = []
+        self._lasts: list[str] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Get the number of keys.
+        Time complexity: ``O(1)``.
+
+        :return: The number of keys.
+        """
+        return self._size
+
+    def add(self, key: str) -> None:
+        """Add a key that is not present.
+        Time complexity: ``O(log n + l)`` where l is the load, amortized over the
+        splits of the blocks.
+
+        :param key: Key to add.
+        """
+        self._size += 1
+        if not self._blocks:
+            self._blocks.append([key])
+            self._lasts.append(key)
+            return
+
+        i = min(bisect_left(self._lasts, key), len(self._blocks) - 1)
+        block = self._blocks[i]
+        insort(block, key)
+        self._lasts[i] = block[-1]
+        if len(block) > 2 * self._load:
+            self._blocks.insert(i + 1, block[self._load:])
+            del block[self._load:]
+            self._lasts.insert(i, block[-1])
+
+    def discard(self, key: str) -> None:
+        """Remove a key if it is present.
+        Time complexity: ``O(log n + l)`` where l is the load.
+
+        :param key: Key to remove.
+        """
+        i = bisect_left(self._lasts, key)
+        if i == len(self._blocks):
+            return
+
+        block = self._blocks[i]
+        j = bisect_left(block, key)
+        if block[j] != key:
+            return
+
+        self._size -= 1
+        del block[j]
+        if block:
+            self._lasts[i] = block[-1]
+        else:
+            del self._blocks[i]
+            del self._lasts[i]
+
+    def build(self, keys: Iterable[str]) -> None:
+        """Replace the keys.
+        Time complexity: ``O(n log n)`` where n is the number of keys.
+
+        :param keys: The keys, which are unique.
+        """
+        keys = sorted(keys)
+        self._blocks = [keys[i:i + self._load]
+                        for i in range(0, len(keys), self._load)]
+        self._lasts = [block[-1] for block in self._blocks]
+        self._size = len(keys)
+
+    def iter_from(self, start: str) -> Iterator[str]:
+        """Lazily iterate the keys in order from a key.
+        The keys must not be changed during the iteration.
+        Time complexity: ``O(log n)`` for calling this function. ``O(k)`` for
+        consuming k keys, plus ``O(l)`` per block they are in, where l is the load.
+
+        :param start: Key to start from. It is included if it is present.
+        :return: The keys not less than the start.
+        """
+        i = bisect_left(self._lasts, start)
+        if i == len(self._blocks):
+            return iter(())
+
+        return self._iter_blocks(i, bisect_left(self._blocks[i], start))
+
+    def _iter_blocks(self, i: int, j: int) -> Iterator[str]:
+        """Lazily iterate the keys from a position.
+
+        :param i: Index of the block to start from.
+        :param j: Index of the key in the block to start from.
+        :return: The keys from the position.
+        """
+        yield from islice(self._blocks[i], j, None)
+        for k in range(i + 1, len(self._blocks)):
+            yield from self._blocks[k]
+
+    def clear(self) -> None:
+        """Remove all keys.
+        Time complexity: ``O(1)``.
+        """
+        self.build(())
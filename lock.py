@@ -0,0 +1,81 @@
+"""Provides locks for synchronizing threads."""
+
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """Lock that can be held by multiple readers or a single writer.
+
+    Waiting writers are preferred over new readers, so that writers are not starved
+    by a steady stream of readers. A thread that holds the lock may acquire it again
+    for reading, but not for writing.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the lock."""
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._waiting_writers = 0
+        self._writer: int | None = None
+        self._local = threading.local()
+
+    def is_held(self) -> bool:
+        """Check if the current thread holds the lock for reading or writing.
+
+        :return: True if the current thread holds the lock, False otherwise.
+        """
+        return (getattr(self._local, "reads", 0) > 0
+                or self._writer == threading.get_ident())
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Hold the lock for reading.
+        It does not wait if the current thread already holds the lock.
+        """
+        if self.is_held():
+            self._local.reads = getattr(self._local, "reads", 0) + 1
+            try:
+                yield
+            finally:
+                self._local.reads -= 1
+            return
+
+        with self._condition:
+            while self._writer is not None or self._waiting_writers > 0:
+                self._condition.wait()
+            self._readers += 1
+
+        self._local.reads = 1
+        try:
+            yield
+        finally:
+            self._local.reads = 0
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Hold the lock for writing.
+
+        :raises RuntimeError: If the current thread already holds the lock.
+        """
+        if self.is_held():
+            raise RuntimeError("The lock is already held by the current thread.")
+
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writer is not None or self._readers > 0:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = threading.get_ident()
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = None
+                self._condition.notify_all()
@@ -1,14 +1,57 @@
 """Entry point of the program."""
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from contextlib import asynccontextmanager, suppress
+from itertools import batched
 from pathlib import Path
-
-from fastapi import APIRouter, FastAPI, status
+from typing import Annotated
+
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    FastAPI,
+    Header,
+    Query,
+    Request,
+    status,
+)
+from pydantic import BaseModel
 from starlette.exceptions import HTTPException
 from starlette.middleware.cors import CORSMiddleware
-from starlette.responses import JSONResponse, RedirectResponse, Response
+from starlette.responses import (
+    JSONResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
 from starlette.staticfiles import StaticFiles
 from starlette.status import HTTP_200_OK
 
-from task import Priority, Task, TaskManager
+from admission import AdmissionMiddleware
+from async_task import Page
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from metrics import MetricsMiddleware, TaskMetrics
+from profiling import Profile, Profiler, ProfilingMiddleware
+from settings import (
+    create_admission_policy,
+    create_async_manager,
+    create_manager,
+    create_profiler,
+)
+from task import BucketOrder, Change, Cursor, Priority, SortOrder, Task, TaskQuery
+from transfer import MEDIA_TYPE as TRANSFER_MEDIA_TYPE
+from transfer import TaskDecoder, encode_tasks, encode_tasks_async
+
+MAX_PAGE_SIZE = 1000
+MAX_FUZZINESS = 2
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+VERSION_HEADER = "X-Version"
+MIN_VERSION_TIMEOUT = 5
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = 1000
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+HEARTBEAT_INTERVAL = 15
 
 
 class SuccessResponse(JSONResponse):
@@ -21,143 +64,745 @@ class SuccessResponse(JSONResponse):
         super().__init__("", status_code=status_code)
 
 
-app = FastAPI()
+class TaskListResponse(Response):
+    """Response that sends a list of tasks as JSON.
+    The tasks are joined from their serialized JSON, which skips validating them
+    against the response model.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Iterable[Task]) -> bytes:
+        """Render the tasks as a JSON array.
+
+        :param content: The tasks to render.
+        :return: The rendered tasks.
+        """
+        return b"[" + b",".join(task.json_bytes for task in content) + b"]"
+
+
+class TaskArrayResponse(StreamingResponse):
+    """Response that streams tasks arriving asynchronously as a JSON array, so that
+    they are not collected before sending them.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, tasks: AsyncIterable[Task], *,
+                 headers: dict[str, str] | None = None) -> None:
+        """Initialize the JSON array response.
+        :param tasks: The tasks to stream. They are consumed lazily while streaming.
+        :param headers: The headers of the response.
+        """
+        super().__init__(self._encode(tasks), headers=headers)
+
+    @staticmethod
+    async def _encode(tasks: AsyncIterable[Task]) -> AsyncIterator[bytes]:
+        """Encode tasks into chunks of a JSON array.
+
+        :param tasks: The tasks to encode.
+        :return: Chunks of the encoded array.
+        """
+        chunk = bytearray(b"[")
+        count = 0
+        async for task in tasks:
+            if count:
+                chunk += b","
+            chunk += task.json_bytes
+            count += 1
+            if count % STREAM_BATCH_SIZE == 0:
+                yield bytes(chunk)
+                chunk.clear()
+
+        chunk += b"]"
+        yield bytes(chunk)
+
+
+class NDJSONResponse(StreamingResponse):
+    """Response that streams tasks as newline-delimited JSON."""
+
+    media_type = NDJSON_MEDIA_TYPE
+
+    def __init__(self, tasks: Iterable[Task] | AsyncIterable[Task], *,
+                 headers: dict[str, str] | None = None) -> None:
+        """Initialize the newline-delimited JSON response.
+        :param tasks: The tasks to stream. They are consumed lazily while streaming.
+        :param headers: The headers of the response.
+        """
+        super().__init__(self._encode_async(tasks) if isinstance(tasks, AsyncIterable)
+                         else self._encode(tasks), headers=headers)
+
+    @staticmethod
+    def _encode(tasks: Iterable[Task]) -> Iterator[bytes]:
+        """Encode tasks into chunks of newline-delimited JSON.
+        Each chunk contains a batch of tasks to amortize the cost of sending it.
+
+        :param tasks: The tasks to encode.
+        :return: Chunks of encoded tasks.
+        """
+        for batch in batched(tasks, STREAM_BATCH_SIZE):
+            yield b"".join(task.json_bytes + b"\n" for task in batch)
+
+    @staticmethod
+    async def _encode_async(tasks: AsyncIterable[Task]) -> AsyncIterator[bytes]:
+        """Encode tasks that arrive asynchronously into chunks of newline-delimited
+        JSON.
+
+        :param tasks: The tasks to encode.
+        :return: Chunks of encoded tasks.
+        """
+        chunk = bytearray()
+        count = 0
+        async for task in tasks:
+            chunk += task.json_bytes + b"\n"
+            count += 1
+            if count == STREAM_BATCH_SIZE:
+                yield bytes(chunk)
+                chunk.clear()
+                count = 0
+
+        if chunk:
+            yield bytes(chunk)
+
+
+metrics = TaskMetrics()
+manager = create_manager()
+async_manager = create_async_manager(metrics.instrument(manager))
+profiler = create_profiler(manager)
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Close the task manager when the application shuts down."""
+    yield
+
+    async_manager.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# The rejected requests are observed by the metrics and get the CORS headers.
+admission_policy = create_admission_policy()
+if admission_policy is not None:
+    app.add_middleware(AdmissionMiddleware, policy=admission_policy)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:8000", "http://127.0.0.1:8000"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, VERSION_HEADER],
 )
+app.add_middleware(MetricsMiddleware, histogram=metrics.requests)
+if profiler is not None:
+    app.add_middleware(ProfilingMiddleware, profiler=profiler,
+                       exclude=["/admin", "/metrics", "/api/tasks/events"])
 
 app.mount("/public",
           StaticFiles(directory=Path(__file__).parent / "public", html=True))
 api_router = APIRouter()
 search_router = APIRouter()
+admin_router = APIRouter(include_in_schema=False)
 
-manager = TaskManager()
+
+async def parse_cursor(cursor: str | None = None) -> Cursor | None:
+    """Parse the cursor given in the query parameters.
+
+    :param cursor: The encoded cursor to start after.
+    :return: The decoded cursor, or None if it is not given.
+    """
+    if cursor is None:
+        return None
+
+    try:
+        return Cursor.decode(cursor)
+    except ValueError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(e)) from None
+
+
+async def accepts_ndjson(accept: Annotated[str, Header()] = "") -> bool:
+    """Check if the client accepts newline-delimited JSON.
+
+    :param accept: The Accept header of the request.
+    :return: True if the client accepts newline-delimited JSON, False otherwise.
+    """
+    return NDJSON_MEDIA_TYPE in accept
+
+
+def format_version(epoch: str, version: int) -> str:
+    """Format a version of the change feed for the clients.
+    The version is qualified by its epoch, so that a version of a previous run of
+    the feed is not mistaken for the same version of the current one.
+
+    :param epoch: Epoch of the version.
+    :param version: The version.
+    :return: The formatted version.
+    """
+    return f"{epoch}-{version}"
+
+
+def parse_version(value: str) -> tuple[str, int]:
+    """Parse a version formatted by the format_version function.
+
+    :param value: The formatted version.
+    :return: The epoch and the version.
+    :raises HTTPException: With 400 if the version is malformed.
+    """
+    epoch, _, version = value.rpartition("-")
+    if not epoch or not version.isdigit():
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, f"Invalid version: {value}")
+
+    return epoch, int(version)
+
+
+async def wait_for_version(
+    min_version: Annotated[str | None, Query()] = None,
+    x_min_version: Annotated[str | None, Header()] = None,
+) -> None:
+    """Wait until the tasks include the change at a version that the client got in
+    the X-Version header of a change, so that it reads its own changes from any
+    worker sharing the tasks. A version of another epoch cannot be waited for, such
+    as one from before the writer restarted, so it is ignored.
+
+    :param min_version: The version to wait for.
+    :param x_min_version: The version to wait for, as the X-Min-Version header. It
+    takes precedence over the query parameter.
+    :raises HTTPException: With 400 if the version is malformed, or 503 if the tasks
+    do not include it in time.
+    """
+    value = x_min_version or min_version
+    if value is None:
+        return
+
+    epoch, version = parse_version(value)
+    feed = manager.feed
+    if epoch != feed.epoch or feed.version >= version:
+        return
+
+    if not await asyncio.to_thread(feed.wait_for, version, MIN_VERSION_TIMEOUT):
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE,
+                            f"Version {value} is not available yet.")
+
+
+def set_version(response: Response) -> Response:
+    """Set the version of the tasks after a change to the response header, for the
+    client to read its own change with from any worker.
+
+    :param response: The response to the change.
+    :return: The response.
+    """
+    response.headers[VERSION_HEADER] = format_version(*manager.feed.position)
+    return response
+
+
+async def check_modified(response: Response,
+                         _waited: Annotated[None, Depends(wait_for_version)],
+                         if_none_match: Annotated[str | None, Header()] = None) -> None:
+    """Check if the tasks have been modified since the client got the response with
+    the ETag in the If-None-Match header, after waiting for the minimum version if
+    the client gives one.
+    The ETag is made from the epoch and the version of the change feed, which are
+    also set to the response header, so that it differs after the versions restart.
+    It is taken before the tasks, so the changes after it may already be in the
+    response.
+
+    :param response: The response to set the headers to.
+    :param if_none_match: The If-None-Match header of the request.
+    :raises HTTPException: With 304 if the tasks have not been modified.
+    """
+    epoch, version = manager.feed.position
+    etag = f'"{format_version(epoch, version)}"'
+    response.headers["ETag"] = etag
+    response.headers["Vary"] = "Accept"
+    response.headers[VERSION_HEADER] = format_version(epoch, version)
+
+    if if_none_match is None:
+        return
+
+    etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in etags or "*" in etags:
+        raise HTTPException(status.HTTP_304_NOT_MODIFIED,
+                            headers=dict(response.headers))
+
+
+Conditional = Depends(check_modified)
+Limit = Annotated[int | None, Query(ge=1, le=MAX_PAGE_SIZE)]
+After = Annotated[Cursor | None, Depends(parse_cursor)]
+Stream = Annotated[bool, Depends(accepts_ndjson)]
+
+
+def send_page(page: Page, response: Response, *, stream: bool = False) -> Response:
+    """Send a page of tasks, setting the cursor of the next page to the response
+    header if there are more tasks.
+
+    :param page: The page of tasks to send.
+    :param response: The response to set the header to.
+    :param stream: Whether to stream the tasks as newline-delimited JSON.
+    :return: The response sending the tasks in the page.
+    """
+    if page.cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = page.cursor.encode()
+
+    if stream:
+        return NDJSONResponse(page.tasks, headers=dict(response.headers))
+
+    if isinstance(page.tasks, AsyncIterable):
+        return TaskArrayResponse(page.tasks, headers=dict(response.headers))
+
+    return TaskListResponse(page.tasks, headers=dict(response.headers))
 
 
 @app.get("/")
-def index() -> Response:
+async def index() -> Response:
     """Redirect all get requests to /public."""
     return RedirectResponse(url="/public")
 
 
-@api_router.get("/task")
-def get_task(title: str) -> Task:
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    """Return the metrics in the Prometheus text format."""
+    return Response(metrics.registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+def get_profiler() -> Profiler:
+    """Get the profiler of the slow requests.
+
+    :return: The profiler.
+    :raises HTTPException: If the profiling is disabled.
+    """
+    if profiler is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Profiling is disabled")
+
+    return profiler
+
+
+@admin_router.get("/profiles")
+async def get_profiles() -> list[Profile]:
+    """Return the last profiles of the slow requests.
+
+    :return: The profiles from the oldest to the newest.
+    """
+    return get_profiler().get_profiles()
+
+
+@admin_router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: int) -> Profile:
+    """Return a profile of a slow request.
+
+    :param profile_id: ID of the profile to get.
+    :return: The profile with the given ID.
+    """
+    try:
+        return get_profiler().get_profile(profile_id)
+    except ValueError as e:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, str(e)) from None
+
+
+@api_router.get("/task", dependencies=[Conditional])
+async def get_task(title: str) -> Task:
     """Return a task that matches the given title.
 
     :param title: Title of the task to get.
     :return: A task with the given title.
     """
     try:
-        return manager.get_task(title=title)
+        return await async_manager.get_task(title=title)
     except ValueError as e:
         raise HTTPException(status.HTTP_404_NOT_FOUND, str(e)) from None
 
 
 @api_router.post("/task")
-def add_task(task: Task) -> Response:
+async def add_task(task: Task) -> Response:
     """Add a new task.
 
     :param task: The task to add.
     """
     try:
-        manager.add_task(task)
-        return SuccessResponse(status_code=status.HTTP_201_CREATED)
+        await async_manager.add_task(task)
+        return set_version(SuccessResponse(status_code=status.HTTP_201_CREATED))
     except ValueError as e:
         raise HTTPException(status.HTTP_409_CONFLICT, str(e)) from None
 
 
 @api_router.put("/task")
-def update_task(task: Task) -> Response:
+async def update_task(task: Task) -> Response:
     """Update an existing task.
 
     :param task: The task to update.
     """
     try:
-        manager.update_task(task)
-        return SuccessResponse()
+        await async_manager.update_task(task)
+        return set_version(SuccessResponse())
     except ValueError as e:
         raise HTTPException(status.HTTP_404_NOT_FOUND, str(e)) from None
 
 
 @api_router.delete("/task")
-def delete_task(title: str) -> Response:
+async def delete_task(title: str) -> Response:
     """Delete a task by its title.
 
     :param title: Title of the task to delete.
     """
     try:
-        manager.delete_task(title)
-        return SuccessResponse()
+        await async_manager.delete_task(title)
+        return set_version(SuccessResponse())
     except ValueError as e:
         raise HTTPException(status.HTTP_404_NOT_FOUND, str(e)) from None
 
 
-@api_router.get("/tasks")
-def get_all_tasks() -> list[Task]:
+@api_router.get("/tasks", response_model=list[Task], dependencies=[Conditional])
+async def get_all_tasks(response: Response, stream: Stream, limit: Limit = None,
+                        after: After = None) -> Response:
     """Return all tasks, sorted by their priorities.
 
+    :param stream: Whether to stream the tasks as newline-delimited JSON.
+    :param limit: Maximum number of tasks to return.
+    :param after: Cursor of the task to start after.
     :return: A list of all tasks, sorted by their priorities.
     """
-    return list(manager.get_all_tasks())
+    return send_page(await async_manager.get_all_tasks(after=after, limit=limit),
+                     response, stream=stream)
+
+
+@api_router.get("/tasks/top", response_model=list[Task], dependencies=[Conditional])
+async def get_top_tasks(response: Response, stream: Stream,
+                        n: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = 20,
+                        order: BucketOrder = BucketOrder.INSERTION) -> Response:
+    """Return the most important tasks, without reading the rest of the tasks.
+
+    :param stream: Whether to stream the tasks as newline-delimited JSON.
+    :param n: Number of tasks to return.
+    :param order: Order of the tasks with the same priority.
+    :return: The first n tasks, sorted by their priorities.
+    """
+    return send_page(await async_manager.top(n, order=order), response, stream=stream)
+
+
+@api_router.get("/tasks/export", dependencies=[Conditional],
+                response_class=StreamingResponse)
+async def export_tasks(response: Response) -> Response:
+    """Stream all tasks in the compact binary format of the transfer module.
+
+    :return: The response streaming all tasks, sorted by their priorities.
+    """
+    page = await async_manager.get_all_tasks()
+    headers = dict(response.headers)
+    headers["Content-Disposition"] = 'attachment; filename="tasks.bin"'
+    chunks = (encode_tasks_async(page.tasks) if isinstance(page.tasks, AsyncIterable)
+              else encode_tasks(page.tasks))
+    return StreamingResponse(chunks,
+                             media_type=TRANSFER_MEDIA_TYPE, headers=headers)
+
+
+@api_router.post("/tasks/import")
+async def import_tasks(request: Request) -> Response:
+    """Add the tasks of an export in batches.
+    The body is decoded as it arrives, and each batch of as many tasks as the load
+    size of the task manager is added without being validated again, so the import
+    is neither held in memory nor blocks the other requests for long. The batches
+    added before an invalid export or a title that already exists stay added.
+
+    :param request: The request whose body is the export of the tasks.
+    """
+    decoder = TaskDecoder()
+    pending: list[Task] = []
+    added = 0
+    size = async_manager.load_size
+
+    async def load(tasks: list[Task]) -> None:
+        nonlocal added
+        try:
+            await async_manager.load_tasks(tasks)
+        except ValueError as e:
+            raise HTTPException(
+                status.HTTP_409_CONFLICT, f"{e} {added} tasks were imported."
+            ) from None
+        added += len(tasks)
+
+    try:
+        async for chunk in request.stream():
+            pending += decoder.feed(chunk)
+            while len(pending) >= size:
+                await load(pending[:size])
+                del pending[:size]
+        decoder.close()
+    except ValueError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST,
+                            f"{e} {added} tasks were imported.") from None
+
+    await load(pending)
+    return set_version(SuccessResponse(status_code=status.HTTP_201_CREATED))
+
+
+async def encode_changes(epoch: str, since: int) -> AsyncIterator[str]:
+    """Encode the changes after a version as server-sent events, waiting for new
+    changes until the client disconnects.
+    If the client falls too far behind, or the version is of another epoch, such as
+    before the server restarted, a ``reset`` event is sent and the stream ends, so
+    that the client can reload the tasks.
+
+    :param epoch: Epoch of the version.
+    :param since: Version to send the changes after.
+    :return: The encoded events.
+    """
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+
+    def notify() -> None:
+        with suppress(RuntimeError):
+            loop.call_soon_threadsafe(changed.set)
+
+    manager.feed.add_listener(notify)
+    try:
+        while True:
+            changed.clear()
+            try:
+                changes = manager.feed.get_changes(since=since, epoch=epoch)
+            except ValueError:
+                yield "event: reset\ndata:\n\n"
+                return
+
+            for version, change in changes:
+                yield (f"id: {format_version(epoch, version)}\n"
+                       f"data: {change.model_dump_json(exclude_none=True)}\n\n")
+                since = version
+
+            if changes:
+                continue
+
+            try:
+                await asyncio.wait_for(changed.wait(), HEARTBEAT_INTERVAL)
+            except TimeoutError:
+                yield ":\n\n"
+    finally:
+        manager.feed.remove_listener(notify)
+
+
+class VersionedChange(BaseModel):
+    """Contains a change made to the tasks with its version."""
+
+    version: str
+    change: Change
+
+
+@api_router.get("/tasks/changes", dependencies=[Conditional],
+                response_model_exclude_none=True)
+async def get_changes(since: str) -> list[VersionedChange]:
+    """Return the changes made to the tasks after a version.
+
+    :param since: Version to return the changes after, as given in the X-Version
+    header or the versions of the changes.
+    :return: The changes after the version, from the oldest.
+    """
+    epoch, version = parse_version(since)
+    try:
+        changes = manager.feed.get_changes(since=version, epoch=epoch)
+    except ValueError as e:
+        raise HTTPException(status.HTTP_410_GONE, str(e)) from None
+
+    return [VersionedChange(version=format_version(epoch, version), change=change)
+            for version, change in changes]
+
+
+@api_router.get("/tasks/events")
+async def stream_changes(since: str | None = None,
+                         last_event_id: Annotated[str | None, Header()] = None,
+                         ) -> Response:
+    """Stream the changes made to the tasks as server-sent events.
+    Each event has the version of the change as its ID and the change as its data.
+    A version of another epoch, such as before the server restarted, gets only a
+    ``reset`` event, so that the client loads the tasks again.
+
+    :param since: Version to stream the changes after, as given in the X-Version
+    header. The Last-Event-ID header sent by a reconnecting client takes precedence
+    over it. If neither is given, only the new changes are streamed.
+    :return: The response streaming the changes.
+    """
+    if last_event_id is not None:
+        since = last_event_id
+    if since is None:
+        epoch, version = manager.feed.position
+    else:
+        epoch, version = parse_version(since)
+
+    try:
+        manager.feed.get_changes(since=version, epoch=epoch)
+    except ValueError as e:
+        if epoch == manager.feed.epoch:
+            raise HTTPException(status.HTTP_410_GONE, str(e)) from None
+
+    return StreamingResponse(encode_changes(epoch, version),
+                             media_type=EVENT_STREAM_MEDIA_TYPE,
+                             headers={"Cache-Control": "no-cache"})
 
 
 @api_router.post("/tasks")
-def add_tasks(tasks: list[Task]) -> Response:
+async def add_tasks(tasks: list[Task]) -> Response:
     """Add new tasks.
 
     :param tasks: The list of tasks to add.
     """
     try:
-        manager.add_tasks(tasks)
-        return SuccessResponse(status_code=status.HTTP_201_CREATED)
+        await async_manager.add_tasks(tasks)
+        return set_version(SuccessResponse(status_code=status.HTTP_201_CREATED))
     except ValueError as e:
         raise HTTPException(status.HTTP_409_CONFLICT, str(e)) from None
 
 
-@api_router.delete("/tasks")
-def clear_tasks() -> Response:
-    """Delete all tasks.
+@api_router.put("/tasks", response_model=list[Task])
+async def update_tasks(tasks: list[Task]) -> Response:
+    """Update existing tasks at once.
+    Either all of the tasks are updated, or none of them if any of them does not
+    exist.
 
-    :return: A success response.
+    :param tasks: The list of tasks to update.
+    :return: The tasks before they are updated, in the order of the given tasks.
     """
-    manager.clear_tasks()
-    return SuccessResponse()
+    try:
+        return set_version(TaskListResponse(await async_manager.update_tasks(tasks)))
+    except ValueError as e:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, str(e)) from None
+
+
+@api_router.delete("/tasks", response_model=list[Task] | None)
+async def delete_tasks(titles: Annotated[list[str] | None, Body()] = None) -> Response:
+    """Delete tasks by their titles at once, or all tasks if no titles are given.
+    Either all of the tasks are deleted, or none of them if any of them does not
+    exist.
+
+    :param titles: Titles of the tasks to delete.
+    :return: The deleted tasks in the order of the titles, or a success response if
+    all tasks are deleted.
+    """
+    if titles is None:
+        await async_manager.clear_tasks()
+        return set_version(SuccessResponse())
+
+    try:
+        return set_version(TaskListResponse(await async_manager.delete_tasks(titles)))
+    except ValueError as e:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, str(e)) from None
+
 
+@search_router.get("", response_model=list[Task], dependencies=[Conditional])
+async def search(response: Response, stream: Stream,  # noqa: PLR0913
+                 priority: Priority | None = None,
+                 title: str | None = None, description: str | None = None,
+                 sort: SortOrder = SortOrder.PRIORITY, limit: Limit = None,
+                 after: After = None) -> Response:
+    """Search for tasks that match all the given filters.
+    The cursor of the next page is only given when sorting by priority.
+
+    :param priority: Priority of the tasks.
+    :param title: Keyword to search for in the title.
+    :param description: Keyword to search for in the description.
+    :param sort: Order to sort the tasks in.
+    :param stream: Whether to stream the tasks as newline-delimited JSON.
+    :param limit: Maximum number of tasks to return.
+    :param after: Cursor of the task to start after.
+    :return: Tasks that match all the given filters.
+    """
+    query = TaskQuery(priority=priority, title=title, description=description)
+    try:
+        page = await async_manager.search(query, order=sort, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(e)) from None
 
-@search_router.get("/title")
-def search_title(keyword: str) -> list[Task]:
+    return send_page(page, response, stream=stream)
+
+
+@search_router.get("/title", response_model=list[Task],
+                   dependencies=[Conditional])
+async def search_title(keyword: str, response: Response, stream: Stream,
+                       limit: Limit = None, after: After = None) -> Response:
     """Search for tasks that have the given keyword in their title/.
 
     :param keyword: Keyword to search for.
+    :param stream: Whether to stream the tasks as newline-delimited JSON.
+    :param limit: Maximum number of tasks to return.
+    :param after: Cursor of the task to start after.
     :return: Tasks that have the given keyword in their title.
     """
-    return list(manager.search_tasks(predicate=lambda t: keyword in t.title))
+    return send_page(
+        await async_manager.search_title(keyword=keyword, after=after, limit=limit),
+        response, stream=stream,
+    )
 
 
-@search_router.get("/description")
-def search_description(keyword: str) -> list[Task]:
+@search_router.get("/description", response_model=list[Task],
+                   dependencies=[Conditional])
+async def search_description(keyword: str, response: Response, stream: Stream,
+                             limit: Limit = None, after: After = None) -> Response:
     """Search for tasks that have the given keyword in their description.
 
     :param keyword: Keyword to search for.
+    :param stream: Whether to stream the tasks as newline-delimited JSON.
+    :param limit: Maximum number of tasks to return.
+    :param after: Cursor of the task to start after.
     :return: Tasks that have the given keyword in their description.
     """
-    return list(manager.search_tasks(predicate=lambda t: keyword in t.description))
+    return send_page(
+        await async_manager.search_description(keyword=keyword, after=after,
+                                               limit=limit),
+        response, stream=stream,
+    )
+
+
+@search_router.get("/ranked", response_model=list[Task], dependencies=[Conditional])
+async def search_ranked(
+        q: Annotated[str, Query(min_length=1)], response: Response, stream: Stream,
+        limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = 10,
+        fuzziness: Annotated[int, Query(ge=0, le=MAX_FUZZINESS)] = 0,
+) -> Response:
+    """Search for the tasks most relevant to a query in their titles and
+    descriptions, ranked by BM25.
+
+    :param q: Query to search for.
+    :param stream: Whether to stream the tasks as newline-delimited JSON.
+    :param limit: Maximum number of tasks to return.
+    :param fuzziness: Maximum edit distance between a word of the query and a word
+    of a task to match them.
+    :return: Tasks that contain any word of the query, from the most relevant.
+    """
+    tasks = await async_manager.search_ranked(query=q, limit=limit,
+                                              fuzziness=fuzziness)
+    return send_page(Page(tasks, None), response, stream=stream)
+
+
+@search_router.get("/prefix", response_model=list[Task], dependencies=[Conditional])
+async def search_prefix(q: str, response: Response, stream: Stream,
+                        limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = 10,
+                        ) -> Response:
+    """Search for the tasks whose titles start with the prefix, for autocompleting
+    the titles.
+
+    :param q: Prefix of the titles to search for.
+    :param stream: Whether to stream the tasks as newline-delimited JSON.
+    :param limit: Maximum number of tasks to return.
+    :return: Tasks whose titles start with the prefix, sorted by title.
+    """
+    tasks = await async_manager.search_prefix(prefix=q, limit=limit)
+    return send_page(Page(tasks, None), response, stream=stream)
 
 
-@search_router.get("/priority")
-def search_priority(priority: Priority) -> list[Task]:
+@search_router.get("/priority", response_model=list[Task],
+                   dependencies=[Conditional])
+async def search_priority(priority: Priority, response: Response, stream: Stream,
+                          limit: Limit = None, after: After = None) -> Response:
     """Search for tasks with the given priority.
 
     :param priority: Priority of the tasks to search for.
+    :param stream: Whether to stream the tasks as newline-delimited JSON.
+    :param limit: Maximum number of tasks to return.
+    :param after: Cursor of the task to start after.
     :return: Tasks with the given priority.
     """
-    return list(manager.get_tasks(priority=priority))
+    return send_page(
+        await async_manager.get_tasks(priority=priority, after=after, limit=limit),
+        response, stream=stream,
+    )
 
 
 api_router.include_router(search_router, prefix="/search")
 app.include_router(api_router, prefix="/api")
+app.include_router(admin_router, prefix="/admin")
@@ -0,0 +1,373 @@
+"""Provides the metrics of the task management system in the Prometheus text format.
+
+The metrics are cheap enough to keep enabled. Observing a value takes a binary search
+and a few increments under a lock, and the metrics that are derived from the task
+manager, such as the number of tasks, are only computed when they are collected.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, Literal
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from sqlite_task import SQLiteTaskManager
+from task import Priority, Task, TaskManager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1, 2.5, 5, 10)
+SIZE_BUCKETS = (0, 1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+type Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escape the value of a label.
+
+    :param value: The value to escape.
+    :return: The escaped value.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Labels, values: Labels) -> str:
+    """Format labels as they appear after the name of a sample.
+
+    :param names: Names of the labels.
+    :param values: Values of the labels.
+    :return: The formatted labels, or an empty string if there are none.
+    """
+    if not names:
+        return ""
+
+    pairs = ",".join(f'{name}="{_escape(value)}"'
+                     for name, value in zip(names, values, strict=True))
+    return f"{{{pairs}}}"
+
+
+class Histogram:
+    """Counts the observed values in buckets, for each combination of labels."""
+
+    def __init__(self, name: str, documentation: str, labels: Labels = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS) -> None:
+        """Initialize the histogram.
+
+        :param name: Name of the metric.
+        :param documentation: Description of the metric.
+        :param labels: Names of the labels.
+        :param buckets: Upper bounds of the buckets, in increasing order.
+        """
+        self.name = name
+        self._documentation = documentation
+        self._labels = labels
+        self._buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counts: dict[Labels, list[int]] = {}
+        self._sums: dict[Labels, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Observe a value.
+        Time complexity: ``O(log b)`` where b is the number of buckets.
+
+        :param value: The observed value.
+        :param labels: Values of the labels, in the order of their names.
+        """
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self._buckets) + 1)
+                self._sums[labels] = 0
+
+            counts[index] += 1
+            self._sums[labels] += value
+
+    def collect(self) -> Iterator[str]:
+        """Collect the lines of the metric.
+
+        :return: The lines in the Prometheus text format.
+        """
+        with self._lock:
+            series = [(labels, list(counts), self._sums[labels])
+                      for labels, counts in self._counts.items()]
+
+        yield f"# HELP {self.name} {self._documentation}"
+        yield f"# TYPE {self.name} histogram"
+        names = (*self._labels, "le")
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip((*self._buckets, "+Inf"), counts, strict=True):
+                cumulative += count
+                bucket = _format_labels(names, (*labels, str(bound)))
+                yield f"{self.name}_bucket{bucket} {cumulative}"
+
+            formatted = _format_labels(self._labels, labels)
+            yield f"{self.name}_sum{formatted} {total}"
+            yield f"{self.name}_count{formatted} {cumulative}"
+
+
+class CallbackMetric:
+    """Gauge or counter whose samples are computed by a function when collected."""
+
+    def __init__(self, name: str, documentation: str,
+                 kind: Literal["gauge", "counter"], labels: Labels,
+                 samples: Callable[[], Iterable[tuple[Labels, float]]]) -> None:
+        """Initialize the metric.
+
+        :param name: Name of the metric.
+        :param documentation: Description of the metric.
+        :param kind: Type of the metric.
+        :param labels: Names of the labels.
+        :param samples: Function that returns the values of the labels and the value
+        of each sample.
+        """
+        self.name = name
+        self._documentation = documentation
+        self._kind = kind
+        self._labels = labels
+        self._samples = samples
+
+    def collect(self) -> Iterator[str]:
+        """Collect the lines of the metric.
+
+        :return: The lines in the Prometheus text format.
+        """
+        yield f"# HELP {self.name} {self._documentation}"
+        yield f"# TYPE {self.name} {self._kind}"
+        for labels, value in self._samples():
+            yield f"{self.name}{_format_labels(self._labels, labels)} {value}"
+
+
+class Registry:
+    """Collects the metrics to expose."""
+
+    def __init__(self) -> None:
+        """Initialize the registry."""
+        self._metrics: list[Histogram | CallbackMetric] = []
+
+    def register[M: Histogram | CallbackMetric](self, metric: M) -> M:
+        """Register a metric.
+
+        :param metric: The metric to register.
+        :return: The registered metric.
+        """
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics.
+
+        :return: The metrics in the Prometheus text format.
+        """
+        return "".join(f"{line}\n" for metric in self._metrics
+                       for line in metric.collect())
+
+
+class MetricsMiddleware:
+    """Middleware that observes the latency of each HTTP request by its route.
+    The latency lasts until the response is sent completely. The streams of
+    server-sent events are not observed, because they last until the client
+    disconnects.
+    """
+
+    def __init__(self, app: ASGIApp, histogram: Histogram) -> None:
+        """Initialize the middleware.
+
+        :param app: The application to observe.
+        :param histogram: Histogram of the latencies, labeled by the method, the
+        path of the route and the status code.
+        """
+        self._app = app
+        self._histogram = histogram
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle a request, observing its latency.
+
+        :param scope: Scope of the request.
+        :param receive: Function to receive the messages of the request.
+        :param send: Function to send the messages of the response.
+        """
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = "500"
+        streaming = False
+
+        async def send_observed(message: Message) -> None:
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                streaming = any(name == b"content-type"
+                                and value.startswith(b"text/event-stream")
+                                for name, value in message.get("headers", ()))
+            await send(message)
+
+        try:
+            await self._app(scope, receive, send_observed)
+        finally:
+            if not streaming:
+                route = scope.get("route")
+                path = getattr(route, "path", None) or "unmatched"
+                self._histogram.observe(time.perf_counter() - start, scope["method"],
+                                        path, status)
+
+
+class InstrumentedTaskManager:
+    """Proxy of a task manager that observes the latencies of its operations, and
+    the number of tasks returned by its searches.
+
+    The latency of an operation that returns the tasks lazily lasts until they are
+    consumed, or until the consumer stops. The other methods are delegated to the
+    task manager as they are, and the task manager calls its own methods without
+    being observed.
+    """
+
+    _OPERATIONS = ("get_task", "add_task", "add_tasks", "load_tasks", "update_task",
+                   "update_tasks", "delete_task", "delete_tasks", "clear_tasks",
+                   "search_ranked", "search_prefix")
+    _LAZY_OPERATIONS = ("get_tasks", "get_all_tasks", "top")
+    _SEARCHES = ("search_tasks", "search_title", "search_description", "search")
+
+    def __init__(self, manager: TaskManager | SQLiteTaskManager,
+                 operations: Histogram, results: Histogram) -> None:
+        """Initialize the proxy.
+
+        :param manager: The task manager to observe.
+        :param operations: Histogram of the latencies, labeled by the operation.
+        :param results: Histogram of the numbers of the tasks returned by the
+        searches, labeled by the operation.
+        """
+        self._manager = manager
+        self._operations = operations
+        self._results = results
+
+        for name in self._OPERATIONS:
+            setattr(self, name, self._time(name, getattr(manager, name)))
+        for name in self._LAZY_OPERATIONS:
+            setattr(self, name, self._time_lazy(name, getattr(manager, name)))
+        for name in self._SEARCHES:
+            setattr(self, name, self._time_lazy(name, getattr(manager, name),
+                                                count=True))
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        """Get an attribute of the task manager that is not observed.
+
+        :param name: Name of the attribute.
+        :return: The attribute of the task manager.
+        """
+        return getattr(self._manager, name)
+
+    def __len__(self) -> int:
+        """Get the total number of tasks.
+
+        :return: Total number of tasks.
+        """
+        return len(self._manager)
+
+    def _time[**P, T](self, name: str,
+                      method: Callable[P, T]) -> Callable[P, T]:
+        """Wrap a method to observe its latency.
+
+        :param name: Name of the operation.
+        :param method: The method to wrap.
+        :return: The wrapped method.
+        """
+        def timed(*args: P.args, **kwargs: P.kwargs) -> T:
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._operations.observe(time.perf_counter() - start, name)
+
+        return timed
+
+    def _time_lazy[**P](self, name: str, method: Callable[P, Iterable[Task]], *,
+                        count: bool = False) -> Callable[P, Iterable[Task]]:
+        """Wrap a method that returns tasks lazily to observe its latency until the
+        tasks are consumed.
+
+        :param name: Name of the operation.
+        :param method: The method to wrap.
+        :param count: Whether to observe the number of the consumed tasks.
+        :return: The wrapped method.
+        """
+        def timed(*args: P.args, **kwargs: P.kwargs) -> Iterator[Task]:
+            start = time.perf_counter()
+            # Call it eagerly, so that it raises its errors as the method does.
+            tasks = method(*args, **kwargs)
+
+            def consume() -> Iterator[Task]:
+                consumed = 0
+                try:
+                    for task in tasks:
+                        consumed += 1
+                        yield task
+                finally:
+                    self._operations.observe(time.perf_counter() - start, name)
+                    if count:
+                        self._results.observe(consumed, name)
+
+            return consume()
+
+        return timed
+
+
+class TaskMetrics:
+    """Metrics of the HTTP requests and the task manager."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.registry = Registry()
+        self.requests = self.registry.register(Histogram(
+            "tms_http_request_duration_seconds",
+            "Latency of the HTTP requests by their routes.",
+            ("method", "route", "status"),
+        ))
+        self.operations = self.registry.register(Histogram(
+            "tms_operation_duration_seconds",
+            "Latency of the operations of the task manager.",
+            ("operation",),
+        ))
+        self.results = self.registry.register(Histogram(
+            "tms_search_results",
+            "Number of the tasks returned by the searches.",
+            ("operation",), SIZE_BUCKETS,
+        ))
+        self.scans = self.registry.register(Histogram(
+            "tms_search_scan_size",
+            "Number of the tasks in the structure that a search scans.",
+            ("source",), SIZE_BUCKETS,
+        ))
+
+    def instrument(self, manager: TaskManager | SQLiteTaskManager,
+                   ) -> InstrumentedTaskManager:
+        """Observe a task manager, and expose the number of its tasks.
+
+        :param manager: The task manager to observe.
+        :return: The proxy of the task manager that observes its operations.
+        """
+        self.registry.register(CallbackMetric(
+            "tms_tasks", "Number of the tasks by their priorities.", "gauge",
+            ("priority",),
+            lambda: [((priority.name,), manager.count_tasks(priority=priority))
+                     for priority in Priority],
+        ))
+
+        if isinstance(manager, TaskManager):
+            manager.add_scan_listener(
+                lambda source, size: self.scans.observe(size, source)
+            )
+            for field in ("hits", "misses"):
+                self.registry.register(CallbackMetric(
+                    f"tms_search_cache_{field}_total",
+                    f"Number of the {field} of the search cache.", "counter", (),
+                    lambda field=field: [((), getattr(manager.search_cache_info(),
+                                                      field))],
+                ))
+
+        return InstrumentedTaskManager(manager, self.operations, self.results)
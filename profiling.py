@@ -0,0 +1,220 @@
+"""Provides the opt-in profiling of the slow HTTP requests.
+
+A profiled request runs under cProfile and tracemalloc, which slow it down several
+times, so only a sample of the requests is profiled, one at a time. Nothing is
+installed when the profiling is disabled.
+"""
+
+import cProfile
+import io
+import itertools
+import pstats
+import random
+import re
+import threading
+import time
+import tracemalloc
+from collections import deque
+from collections.abc import Iterable
+from datetime import UTC, datetime
+
+from pydantic import BaseModel, ConfigDict
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+STATS_LIMIT = 40
+ALLOCATIONS_LIMIT = 20
+
+
+class Profile(BaseModel):
+    """Profile of a request."""
+
+    model_config = ConfigDict(frozen=True)
+
+    id: int
+    method: str
+    path: str
+    query: str
+    status: int
+    started: datetime
+    duration: float
+    memory_peak: int
+    stats: str
+    calls: str
+    allocations: str
+
+
+class Profiler:
+    """Decides which requests to profile, and keeps the last profiles."""
+
+    def __init__(self, *, rate: float = 1, threshold: float = 0, capacity: int = 20,
+                 focus: Iterable[str] = ()) -> None:
+        """Initialize the profiler.
+
+        :param rate: Fraction of the requests to profile.
+        :param threshold: Minimum duration in seconds of a profiled request to keep
+        its profile.
+        :param capacity: Number of the last profiles to keep.
+        :param focus: Paths of the source files whose functions are listed as the
+        calls of the profile, such as the modules of the task manager.
+        """
+        self.rate = rate
+        self.threshold = threshold
+        self._focus = "|".join(re.escape(path) for path in focus)
+        self._profiles: deque[Profile] = deque(maxlen=capacity)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # cProfile and tracemalloc are global, so they can profile a request at a time.
+        self._busy = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Decide whether to profile a request.
+        The caller must call the release method after profiling it.
+
+        :return: True if the request is sampled and no other request is profiled,
+        False otherwise.
+        """
+        sampled = random.random() < self.rate  # noqa: S311
+        return sampled and self._busy.acquire(blocking=False)
+
+    def release(self) -> None:
+        """Allow another request to be profiled."""
+        self._busy.release()
+
+    def record(self, scope: Scope, status: int, started: datetime,  # noqa: PLR0913
+               duration: float, profile: cProfile.Profile,
+               snapshot: tracemalloc.Snapshot, memory_peak: int) -> None:
+        """Keep the profile of a request, replacing the oldest one if there are too
+        many.
+
+        :param scope: Scope of the request.
+        :param status: Status code of the response.
+        :param started: Time when the request started.
+        :param duration: Duration of the request in seconds.
+        :param profile: The cProfile profile of the request.
+        :param snapshot: Snapshot of the memory allocated during the request.
+        :param memory_peak: Peak size in bytes of the memory allocated during the
+        request.
+        """
+        stats = io.StringIO()
+        pstats.Stats(profile, stream=stats).sort_stats(
+            pstats.SortKey.CUMULATIVE
+        ).print_stats(STATS_LIMIT)
+
+        calls = io.StringIO()
+        if self._focus:
+            pstats.Stats(profile, stream=calls).sort_stats(
+                pstats.SortKey.CUMULATIVE
+            ).print_stats(self._focus)
+
+        allocations = snapshot.filter_traces([
+            tracemalloc.Filter(inclusive=False, filename_pattern=tracemalloc.__file__),
+            tracemalloc.Filter(inclusive=False, filename_pattern=__file__),
+        ]).statistics("lineno")[:ALLOCATIONS_LIMIT]
+
+        with self._lock:
+            self._profiles.append(Profile(
+                id=next(self._ids),
+                method=scope["method"],
+                path=scope["path"],
+                query=scope["query_string"].decode("latin-1"),
+                status=status,
+                started=started,
+                duration=duration,
+                memory_peak=memory_peak,
+                stats=stats.getvalue(),
+                calls=calls.getvalue(),
+                allocations="\n".join(map(str, allocations)),
+            ))
+
+    def get_profiles(self) -> list[Profile]:
+        """Get the kept profiles.
+
+        :return: The profiles from the oldest to the newest.
+        """
+        with self._lock:
+            return list(self._profiles)
+
+    def get_profile(self, profile_id: int) -> Profile:
+        """Get a kept profile.
+
+        :param profile_id: ID of the profile.
+        :return: The profile.
+        :raises ValueError: If the profile is not kept.
+        """
+        with self._lock:
+            for profile in self._profiles:
+                if profile.id == profile_id:
+                    return profile
+
+        raise ValueError(f"Profile {profile_id} does not exist")
+
+
+class ProfilingMiddleware:
+    """Middleware that profiles the sampled requests, and keeps the profiles of the
+    ones that are slower than the threshold of the profiler.
+
+    The profile includes everything that runs while the request is handled,
+    including the task manager in other threads and the other requests handled
+    concurrently on the event loop.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: Profiler,
+                 exclude: Iterable[str] = ()) -> None:
+        """Initialize the middleware.
+
+        :param app: The application to profile.
+        :param profiler: The profiler that samples the requests and keeps their
+        profiles.
+        :param exclude: Prefixes of the paths not to profile, such as the streams
+        that last until the client disconnects.
+        """
+        self._app = app
+        self._profiler = profiler
+        self._exclude = tuple(exclude)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle a request, profiling it if it is sampled.
+
+        :param scope: Scope of the request.
+        :param receive: Function to receive the messages of the request.
+        :param send: Function to send the messages of the response.
+        """
+        if (scope["type"] != "http" or scope["path"].startswith(self._exclude)
+                or not self._profiler.acquire()):
+            await self._app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_observed(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+        memory_base, _ = tracemalloc.get_traced_memory()
+
+        profile = cProfile.Profile()
+        started = datetime.now(UTC)
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            await self._app(scope, receive, send_observed)
+        finally:
+            profile.disable()
+            duration = time.perf_counter() - start
+            try:
+                if duration >= self._profiler.threshold:
+                    snapshot = tracemalloc.take_snapshot()
+                    _, memory_peak = tracemalloc.get_traced_memory()
+                    self._profiler.record(scope, status, started, duration, profile,
+                                          snapshot, memory_peak - memory_base)
+            finally:
+                if not tracing:
+                    tracemalloc.stop()
+                self._profiler.release()
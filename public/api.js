@@ -13,7 +13,17 @@
  * @property {Priority} priority
  */
 
+/**
+ * @typedef {Object} Page
+ * @property {Task[]} tasks The tasks in the page.
+ * @property {string | undefined} cursor The cursor of the next page, or undefined
+ * if this is the last page.
+ */
+
 const BASE_URL = "http://localhost:8000/api/";
+const PAGE_SIZE = 100;
+const NEXT_CURSOR_HEADER = "X-Next-Cursor";
+const VERSION_HEADER = "X-Version";
 
 /**
  * Send an HTTP request to the specified server endpoint with the given method and data.
@@ -24,6 +34,19 @@ const BASE_URL = "http://localhost:8000/api/";
  * @returns {Promise<undefined | Task | Task[]>} The response body of the request.
  */
 async function request(endpoint, data = {}, method = "GET") {
+  return (await send(endpoint, data, method)).body;
+}
+
+/**
+ * Send an HTTP request to the specified server endpoint with the given method and data.
+ * @private
+ * @param {string} endpoint The endpoint to send the request to.
+ * @param {Record<string, any>} data The data to send to the server.
+ * @param {RequestMethod} method The request method.
+ * @returns {Promise<{response: Response, body: undefined | Task | Task[]}>} The
+ * response and its body.
+ */
+async function send(endpoint, data = {}, method = "GET") {
   const url = new URL(BASE_URL + endpoint);
   const settings = { method };
 
@@ -43,14 +66,65 @@ async function request(endpoint, data = {}, method = "GET") {
   try {
     json = await response.json();
   } catch (err) {
-    return undefined;
+    return { response, body: undefined };
   }
 
   if (json && json.detail) {
     throw new Error(json.detail);
   }
 
-  return json || undefined;
+  return { response, body: json || undefined };
+}
+
+/**
+ * @typedef {Object} Change
+ * @property {("add"|"add_all"|"update"|"update_all"|"delete"|"delete_all"|"clear")}
+ * operation The operation of the change.
+ * @property {Task | undefined} task The added or updated task.
+ * @property {Task[] | undefined} tasks The added or updated tasks.
+ * @property {string | undefined} title The title of the deleted task.
+ * @property {string[] | undefined} titles The titles of the deleted tasks.
+ */
+
+/**
+ * Get a page of tasks from the specified server endpoint.
+ * @private
+ * @param {string} endpoint The endpoint to get the page from.
+ * @param {Record<string, any>} data The query parameters of the request.
+ * @param {number} limit The maximum number of tasks in the page.
+ * @param {string | undefined} cursor The cursor of the page, or undefined for the
+ * first page.
+ * @returns {Promise<Page>} The page of tasks.
+ */
+async function requestPage(endpoint, data, limit, cursor) {
+  const params = { ...data, limit };
+  if (cursor) {
+    params.cursor = cursor;
+  }
+
+  const { response, body } = await send(endpoint, params);
+
+  return {
+    tasks: body || [],
+    cursor: response.headers.get(NEXT_CURSOR_HEADER) || undefined,
+  };
+}
+
+/**
+ * Incrementally get all pages of tasks from the specified server endpoint.
+ * @private
+ * @param {string} endpoint The endpoint to get the pages from.
+ * @param {Record<string, any>} data The query parameters of the request.
+ * @param {number} limit The maximum number of tasks in a page.
+ * @returns {AsyncGenerator<Task[]>} The tasks of each page.
+ */
+async function* requestPages(endpoint, data = {}, limit = PAGE_SIZE) {
+  let cursor;
+  do {
+    const page = await requestPage(endpoint, data, limit, cursor);
+    yield page.tasks;
+    cursor = page.cursor;
+  } while (cursor);
 }
 
 /**
@@ -100,6 +174,54 @@ async function getAllTasks() {
   return request("tasks");
 }
 
+/**
+ * Get all tasks sorted by their priority, together with the version of the change
+ * feed taken before them.
+ * @returns {Promise<{tasks: Task[], version: string}>} The tasks and the version.
+ */
+async function loadAllTasks() {
+  const { response, body } = await send("tasks");
+
+  return {
+    tasks: body || [],
+    version: response.headers.get(VERSION_HEADER),
+  };
+}
+
+/**
+ * Subscribe to the changes made to the tasks after the given version.
+ * The browser reconnects automatically, resuming after the last received change.
+ * @param {string} since The version to receive the changes after.
+ * @param {(change: Change) => void} onChange Called with each change.
+ * @param {() => void} onReset Called if the changes cannot be resumed, so the tasks
+ * must be loaded again.
+ * @returns {EventSource} The source of the changes, which can be closed.
+ */
+function subscribeChanges(since, onChange, onReset) {
+  const source = new EventSource(`${BASE_URL}tasks/events?since=${encodeURIComponent(since)}`);
+
+  source.onmessage = (event) => onChange(JSON.parse(event.data));
+  source.addEventListener("reset", () => {
+    source.close();
+    onReset();
+  });
+  source.onerror = () => {
+    if (source.readyState === EventSource.CLOSED) {
+      onReset();
+    }
+  };
+
+  return source;
+}
+
+/**
+ * Incrementally get all tasks sorted by their priority, one page at a time.
+ * @returns {AsyncGenerator<Task[]>} The tasks of each page.
+ */
+function getAllTasksPages() {
+  return requestPages("tasks");
+}
+
 /**
  * Add tasks to the list of tasks.
  * @param {Task[]} tasks The tasks to add.
@@ -127,6 +249,26 @@ async function searchTitle(keyword) {
   return request("search/title", { keyword });
 }
 
+/**
+ * Incrementally search all tasks that have the given keyword in their titles, one
+ * page at a time.
+ * @param {string} keyword The keyword to search for.
+ * @returns {AsyncGenerator<Task[]>} The search results of each page.
+ */
+function searchTitlePages(keyword) {
+  return requestPages("search/title", { keyword });
+}
+
+/**
+ * Search the first tasks whose titles start with the given prefix, sorted by title.
+ * @param {string} prefix The prefix to search for.
+ * @param {number} limit The maximum number of tasks to get.
+ * @returns {Promise<Task[]>} The search results.
+ */
+async function searchPrefix(prefix, limit = 10) {
+  return request("search/prefix", { q: prefix, limit });
+}
+
 /**
  * Search all tasks that have the given keyword in their descriptions.
  * @param {string} keyword The keyword to search for.
@@ -136,6 +278,16 @@ async function searchDescription(keyword) {
   return request("search/description", { keyword });
 }
 
+/**
+ * Incrementally search all tasks that have the given keyword in their descriptions,
+ * one page at a time.
+ * @param {string} keyword The keyword to search for.
+ * @returns {AsyncGenerator<Task[]>} The search results of each page.
+ */
+function searchDescriptionPages(keyword) {
+  return requestPages("search/description", { keyword });
+}
+
 /**
  * Search all tasks that have the given priority.
  * @param {Priority} priority The priority to search for.
@@ -144,3 +296,12 @@ async function searchDescription(keyword) {
 async function searchPriority(priority) {
   return request("search/priority", { priority });
 }
+
+/**
+ * Incrementally search all tasks that have the given priority, one page at a time.
+ * @param {Priority} priority The priority to search for.
+ * @returns {AsyncGenerator<Task[]>} The search results of each page.
+ */
+function searchPriorityPages(priority) {
+  return requestPages("search/priority", { priority });
+}
@@ -38,9 +38,41 @@ function onResetFieldsClick() {
 }
 
 function onReadEnter() {
+  taskStore.onChange = undefined;
   removeChildren(document.querySelector("#readTaskContainer"));
 }
 
+async function onReadTitleInput() {
+  const titleInput = document.querySelector("#readTitleInput");
+  const suggestions = document.querySelector("#readTitleSuggestions");
+  const prefix = titleInput.value;
+
+  if (!prefix) {
+    removeChildren(suggestions);
+    return;
+  }
+
+  let tasks;
+  try {
+    tasks = await searchPrefix(prefix);
+  } catch (err) {
+    console.error(err);
+    return;
+  }
+
+  // Ignore the suggestions for a prefix that has been typed over meanwhile.
+  if (titleInput.value !== prefix) {
+    return;
+  }
+
+  removeChildren(suggestions);
+  tasks.forEach((task) => {
+    const option = document.createElement("option");
+    option.value = task.title;
+    suggestions.appendChild(option);
+  });
+}
+
 async function onReadTitleSubmit() {
   const titleInput = document.querySelector("#readTitleInput");
   const option = getSelectedOption(document.querySelector("#readTitleSelect"));
@@ -50,12 +82,15 @@ async function onReadTitleSubmit() {
     return;
   }
 
-  let tasks;
+  const container = document.querySelector("#readTaskContainer");
+  taskStore.onChange = undefined;
+
+  let count;
   try {
     if (option.value === "match") {
-      tasks = [await getTask(titleInput.value)];
+      count = await renderTaskPages(container, [[await getTask(titleInput.value)]]);
     } else {
-      tasks = await searchTitle(titleInput.value);
+      count = await renderTaskPages(container, searchTitlePages(titleInput.value));
     }
   } catch (err) {
     toast.error(err.message);
@@ -63,19 +98,11 @@ async function onReadTitleSubmit() {
     return;
   }
 
-  const container = document.querySelector("#readTaskContainer");
-
-  removeChildren(container);
-
-  if (tasks.length === 0) {
+  if (count === 0) {
     toast.error("No tasks found");
     return;
   }
 
-  tasks.forEach((task) => {
-    container.appendChild(createTaskCard(task));
-  });
-
   titleInput.value = "";
 }
 
@@ -87,28 +114,26 @@ async function onReadDescriptionSubmit() {
     return;
   }
 
-  let tasks;
+  const container = document.querySelector("#readTaskContainer");
+  taskStore.onChange = undefined;
+
+  let count;
   try {
-    tasks = await searchDescription(descriptionInput.value);
+    count = await renderTaskPages(
+      container,
+      searchDescriptionPages(descriptionInput.value)
+    );
   } catch (err) {
     toast.error(err.message);
     console.error(err);
     return;
   }
 
-  const container = document.querySelector("#readTaskContainer");
-
-  removeChildren(container);
-
-  if (tasks.length === 0) {
+  if (count === 0) {
     toast.error("No tasks found");
     return;
   }
 
-  tasks.forEach((task) => {
-    container.appendChild(createTaskCard(task));
-  });
-
   descriptionInput.value = "";
 }
 
@@ -117,60 +142,53 @@ async function onReadPrioritySubmit() {
     document.querySelector("#readPrioritySelect")
   );
 
-  let tasks;
+  const container = document.querySelector("#readTaskContainer");
+  const priority = option.value === "all" ? undefined : option.value;
+  const render = () => renderTaskPages(container, [getStoredTasks(priority)]);
+
+  let count;
   try {
-    if (option.value === "all") {
-      tasks = await getAllTasks();
-    } else {
-      tasks = await searchPriority(option.value);
-    }
+    await loadTaskStore();
+    count = await render();
   } catch (err) {
     toast.error(err.message);
     console.error(err);
     return;
   }
 
-  const container = document.querySelector("#readTaskContainer");
-
-  removeChildren(container);
+  taskStore.onChange = render;
 
-  if (tasks.length === 0) {
+  if (count === 0) {
     toast.error("No tasks found");
-    return;
   }
-
-  tasks.forEach((task) => {
-    container.appendChild(createTaskCard(task));
-  });
 }
 
 async function onUpdateEnter() {
-  let tasks;
+  const container = document.querySelector("#updateTaskContainer");
+  removeChildren(container);
+
   try {
-    tasks = await getAllTasks();
+    await loadTaskStore();
+    getStoredTasks().forEach((task) => appendTaskInput(container, task));
   } catch (err) {
     console.error(err);
     toast.error(err.message);
-    return;
   }
+}
 
-  const container = document.querySelector("#updateTaskContainer");
-  removeChildren(container);
-
-  tasks.forEach((task) => {
-    const taskInput = createTaskInput(task);
-    const titleInput = taskInput.querySelector("#createTitleInput");
-    titleInput.value = task.title;
-    titleInput.disabled = true;
+function appendTaskInput(container, task) {
+  const taskInput = createTaskInput(task);
+  const titleInput = taskInput.querySelector("#createTitleInput");
+  titleInput.value = task.title;
+  titleInput.disabled = true;
 
-    taskInput.querySelector("#createDescriptionInput").value = task.description;
+  taskInput.querySelector("#createDescriptionInput").value = task.description;
 
-    [...taskInput.querySelector("#createPrioritySelect").options].find(
-      (option) => option.value === task.priority
-    ).selected = true;
+  [...taskInput.querySelector("#createPrioritySelect").options].find(
+    (option) => option.value === task.priority
+  ).selected = true;
 
-    container.appendChild(taskInput);
-  });
+  container.appendChild(taskInput);
 }
 
 async function onUpdateSubmit() {
@@ -0,0 +1,127 @@
+/**
+ * @typedef {Object} TaskStore
+ * @property {Map<Priority, Map<string, Task>>} buckets The tasks of each priority
+ * from the highest, by their titles in their insertion order.
+ * @property {Promise<void> | undefined} loading The loading of the tasks.
+ * @property {EventSource | undefined} source The source of the changes.
+ * @property {(() => void) | undefined} onChange Called after each change is applied.
+ */
+
+/**
+ * The local copy of the tasks, which is loaded once and then kept up to date by
+ * applying the changes from the server.
+ * @type {TaskStore}
+ */
+const taskStore = {
+  buckets: new Map(["HIGH", "MEDIUM", "LOW"].map((priority) => [priority, new Map()])),
+  loading: undefined,
+  source: undefined,
+  onChange: undefined,
+};
+
+/**
+ * Load the tasks into the store if they have not been loaded.
+ * @returns {Promise<void>}
+ */
+function loadTaskStore() {
+  if (!taskStore.loading) {
+    taskStore.loading = reloadTaskStore().catch((err) => {
+      taskStore.loading = undefined;
+      throw err;
+    });
+  }
+
+  return taskStore.loading;
+}
+
+/**
+ * Load the tasks into the store again, and subscribe to the changes after them.
+ * @private
+ * @returns {Promise<void>}
+ */
+async function reloadTaskStore() {
+  if (taskStore.source) {
+    taskStore.source.close();
+  }
+
+  const { tasks, version } = await loadAllTasks();
+  taskStore.buckets.forEach((bucket) => bucket.clear());
+  tasks.forEach(putStoredTask);
+
+  taskStore.source = subscribeChanges(version, applyChange, () => {
+    taskStore.loading = undefined;
+    loadTaskStore().then(taskStore.onChange, console.error);
+  });
+}
+
+/**
+ * Add or update a task in the store. It keeps its position unless its priority
+ * changes, in which case it becomes the last task with its new priority.
+ * The changes taken before the tasks were loaded may be applied again, which
+ * leaves the tasks as they are.
+ * @private
+ * @param {Task} task The task to put.
+ */
+function putStoredTask(task) {
+  taskStore.buckets.forEach((bucket, priority) => {
+    if (priority !== task.priority) {
+      bucket.delete(task.title);
+    }
+  });
+
+  taskStore.buckets.get(task.priority).set(task.title, task);
+}
+
+/**
+ * Delete a task from the store.
+ * @private
+ * @param {string} title The title of the task to delete.
+ */
+function deleteStoredTask(title) {
+  taskStore.buckets.forEach((bucket) => bucket.delete(title));
+}
+
+/**
+ * Apply a change from the server to the store.
+ * @private
+ * @param {Change} change The change to apply.
+ */
+function applyChange(change) {
+  switch (change.operation) {
+    case "add":
+    case "update":
+      putStoredTask(change.task);
+      break;
+    case "add_all":
+    case "update_all":
+      change.tasks.forEach(putStoredTask);
+      break;
+    case "delete":
+      deleteStoredTask(change.title);
+      break;
+    case "delete_all":
+      change.titles.forEach(deleteStoredTask);
+      break;
+    case "clear":
+      taskStore.buckets.forEach((bucket) => bucket.clear());
+      break;
+  }
+
+  if (taskStore.onChange) {
+    taskStore.onChange();
+  }
+}
+
+/**
+ * Get the tasks in the store sorted by their priority.
+ * @param {Priority | undefined} priority The priority of the tasks to get, or
+ * undefined to get all tasks.
+ * @returns {Task[]} The tasks.
+ */
+function getStoredTasks(priority) {
+  if (priority) {
+    return [...taskStore.buckets.get(priority).values()];
+  }
+
+  return [...taskStore.buckets.values()].flatMap((bucket) => [...bucket.values()]);
+}
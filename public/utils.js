@@ -28,6 +28,26 @@ function createTaskCard(task) {
   return newTaskCard;
 }
 
+/**
+ * Render the task cards to the given container as the pages of tasks arrive
+ * @param {HTMLElement} container The container to render the task cards to
+ * @param {AsyncIterable<Task[]>} pages The pages of tasks to render
+ * @returns {Promise<number>} The number of rendered tasks
+ */
+async function renderTaskPages(container, pages) {
+  removeChildren(container);
+
+  let count = 0;
+  for await (const tasks of pages) {
+    tasks.forEach((task) => {
+      container.appendChild(createTaskCard(task));
+    });
+    count += tasks.length;
+  }
+
+  return count;
+}
+
 /**
  * Remove all children of the given element
  *
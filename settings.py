@@ -0,0 +1,143 @@
+"""Provides the task managers, the admission policy and the profiler configured by
+the environment variables.
+"""
+
+import inspect
+import os
+from pathlib import Path
+
+from admission import AdmissionPolicy, Limit, RouteClass
+from async_task import AsyncTaskManager
+from compact_task import CompactTaskManager
+from profiling import Profiler
+from shared_task import ReplicaTaskManager
+from sqlite_task import SQLiteTaskManager
+from storage import LogStorage
+from task import TaskManager
+
+DEFAULT_RATE_LIMITS = {
+    RouteClass.SCAN: "50/100",
+    RouteClass.WRITE: "500/1000",
+    RouteClass.BULK: "10/20",
+}
+
+
+def create_memory_manager() -> TaskManager:
+    """Create the task manager that keeps the tasks in memory.
+    The tasks are persisted in the directory given by ``TMS_DATA_DIR`` if it is set.
+    ``TMS_SYNC_EVERY``, ``TMS_SYNC_INTERVAL`` and ``TMS_COMPACT_EVERY`` configure
+    the storage.
+    The tasks are stored compactly if ``TMS_COMPACT_MEMORY`` is set.
+
+    :return: The task manager.
+    """
+    manager_type = (CompactTaskManager if os.environ.get("TMS_COMPACT_MEMORY")
+                    else TaskManager)
+    data_dir = os.environ.get("TMS_DATA_DIR")
+    if not data_dir:
+        return manager_type()
+
+    return manager_type(LogStorage(
+        Path(data_dir),
+        sync_every=int(os.environ.get("TMS_SYNC_EVERY", "1")),
+        sync_interval=float(os.environ.get("TMS_SYNC_INTERVAL", "1")),
+        compact_every=int(os.environ.get("TMS_COMPACT_EVERY", "100000")),
+    ))
+
+
+def create_manager() -> TaskManager | SQLiteTaskManager:
+    """Create the task manager.
+    The tasks are stored in the SQLite database given by the environment variable
+    ``TMS_SQLITE_PATH`` if it is set. Otherwise, they are shared with the writer
+    listening on the Unix socket given by ``TMS_SHARED_SOCKET`` if it is set, or
+    kept in memory as the create_memory_manager function does.
+
+    :return: The task manager.
+    """
+    sqlite_path = os.environ.get("TMS_SQLITE_PATH")
+    if sqlite_path:
+        return SQLiteTaskManager(Path(sqlite_path))
+
+    shared_socket = os.environ.get("TMS_SHARED_SOCKET")
+    if shared_socket:
+        return ReplicaTaskManager(Path(shared_socket))
+
+    return create_memory_manager()
+
+
+def create_async_manager(manager: TaskManager | SQLiteTaskManager,
+                         ) -> AsyncTaskManager:
+    """Create the asynchronous interface to the task manager.
+    The methods of the task manager run in ``TMS_IO_THREADS`` threads, 8 by default,
+    if it blocks on the SQLite database, the storage or the writer given by the
+    environment variables of the create_manager function. Otherwise, they run on the
+    event loop.
+
+    :param manager: The task manager.
+    :return: The asynchronous task manager.
+    """
+    if not any(os.environ.get(variable) for variable in
+               ["TMS_SQLITE_PATH", "TMS_SHARED_SOCKET", "TMS_DATA_DIR"]):
+        return AsyncTaskManager(manager)
+
+    return AsyncTaskManager(manager,
+                            max_workers=int(os.environ.get("TMS_IO_THREADS", "8")))
+
+
+def create_profiler(manager: TaskManager | SQLiteTaskManager) -> Profiler | None:
+    """Create the profiler of the slow requests.
+    The profiling is enabled if ``TMS_PROFILE_RATE`` or ``TMS_PROFILE_THRESHOLD`` is
+    set. ``TMS_PROFILE_RATE`` is the fraction of the requests to profile, 1 by
+    default. ``TMS_PROFILE_THRESHOLD`` is the minimum duration in seconds of the
+    requests whose profiles are kept, 0 by default. ``TMS_PROFILE_KEEP`` is the
+    number of the last profiles to keep, 20 by default.
+
+    :param manager: The task manager whose calls are listed in the profiles.
+    :return: The profiler, or None if the profiling is disabled.
+    """
+    rate = os.environ.get("TMS_PROFILE_RATE")
+    threshold = os.environ.get("TMS_PROFILE_THRESHOLD")
+    if not rate and not threshold:
+        return None
+
+    return Profiler(
+        rate=float(rate or "1"),
+        threshold=float(threshold or "0"),
+        capacity=int(os.environ.get("TMS_PROFILE_KEEP", "20")),
+        focus={inspect.getfile(cls) for cls in type(manager).__mro__
+               if cls is not object},
+    )
+
+
+def create_admission_policy() -> AdmissionPolicy | None:
+    """Create the policy of the requests to admit.
+    The admission control is enabled unless ``TMS_ADMISSION`` is ``off``, such as
+    for the tests and the benchmarks, which would otherwise measure the limits.
+    ``TMS_RATE_LIMIT_READ``, ``TMS_RATE_LIMIT_SCAN``, ``TMS_RATE_LIMIT_WRITE`` and
+    ``TMS_RATE_LIMIT_BULK`` are the rate limits per client of the point lookups, the
+    scans, the changes of a task and the bulk changes, as ``rate/burst`` in requests
+    per second, or ``off``. Only the point lookups are not limited by default.
+    ``TMS_MAX_SCANS`` is the maximum number of concurrent scans, 16 by default, and
+    ``TMS_MAX_BULK_BODY`` the maximum size in bytes of the body of a bulk change, 32
+    MiB by default, and ``TMS_MAX_IMPORT_BODY`` that of an import, not capped by
+    default. Each is not capped if it is 0.
+
+    :return: The admission policy, or None if the admission control is disabled.
+    """
+    if os.environ.get("TMS_ADMISSION") == "off":
+        return None
+
+    limits = {}
+    for route_class in RouteClass:
+        variable = f"TMS_RATE_LIMIT_{route_class.name}"
+        value = os.environ.get(variable, DEFAULT_RATE_LIMITS.get(route_class, "off"))
+        if value != "off":
+            rate, _, burst = value.partition("/")
+            limits[route_class] = Limit(float(rate), float(burst or rate))
+
+    max_scans = int(os.environ.get("TMS_MAX_SCANS", "16"))
+    max_bulk_body = int(os.environ.get("TMS_MAX_BULK_BODY", str(32 * 2 ** 20)))
+    max_import_body = int(os.environ.get("TMS_MAX_IMPORT_BODY", "0"))
+    return AdmissionPolicy(limits, max_scans=max_scans or None,
+                           max_bulk_body=max_bulk_body or None,
+                           max_import_body=max_import_body or None)
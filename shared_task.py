@@ -0,0 +1,457 @@
+"""Provides the tasks shared by multiple processes, such as the workers of the
+server.
+
+A single writer process owns the tasks and makes all changes to them. Each worker
+keeps a replica of the tasks in memory, which serves the reads, and sends the changes
+to the writer over a Unix socket. The writer streams the changes it makes back to
+the replicas with their versions.
+"""
+
+import socket
+import socketserver
+import threading
+import time
+from collections.abc import Iterable
+from contextlib import suppress
+from pathlib import Path
+from queue import Empty, SimpleQueue
+from typing import BinaryIO
+
+from pydantic import BaseModel
+
+from task import Change, Operation, Snapshot, Task, TaskManager
+
+_POLL_INTERVAL = 1
+_RECONNECT_INTERVAL = 1
+
+
+class Request(BaseModel):
+    """Request sent to the writer: a change to make, or a subscription to the changes
+    if the change is None.
+    """
+
+    change: Change | None = None
+
+
+class Reply(BaseModel):
+    """Reply of the writer to a change."""
+
+    version: int = 0
+    task: Task | None = None
+    tasks: list[Task] | None = None
+    error: str | None = None
+
+
+class Update(BaseModel):
+    """Update sent by the writer to a subscribed replica: a change made at a version,
+    or a snapshot of all tasks.
+    """
+
+    version: int = 0
+    change: Change | None = None
+    snapshot: Snapshot | None = None
+
+
+def _send(file: BinaryIO, message: BaseModel) -> None:
+    """Send a message as a line of JSON.
+
+    :param file: File of the socket to send the message to.
+    :param message: The message to send.
+    """
+    file.write(message.model_dump_json(exclude_none=True).encode() + b"\n")
+    file.flush()
+
+
+def _receive[T: BaseModel](file: BinaryIO, message_type: type[T]) -> T:
+    """Receive a message sent as a line of JSON.
+
+    :param file: File of the socket to receive the message from.
+    :param message_type: Type of the message.
+    :return: The received message.
+    :raises ConnectionError: If the other side closes the connection, even in the
+    middle of the message.
+    """
+    line = file.readline()
+    if not line:
+        raise ConnectionError("The connection is closed.")
+    if not line.endswith(b"\n"):
+        raise ConnectionError("The connection is closed in the middle of a message.")
+
+    return message_type.model_validate_json(line)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handles the requests from a connection to the writer."""
+
+    server: "_UnixServer"
+
+    def handle(self) -> None:
+        """Make the changes sent through the connection, or stream the changes if it
+        subscribes to them.
+        """
+        writer = self.server.writer
+        try:
+            while True:
+                request = _receive(self.rfile, Request)
+                if request.change is None:
+                    writer.stream(self.wfile)
+                    return
+
+                _send(self.wfile, writer.execute(request.change))
+        except OSError:
+            return
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    """Server that handles each connection to the writer in a thread."""
+
+    daemon_threads = True
+
+    def __init__(self, path: Path, writer: "TaskServer") -> None:
+        """Initialize the server.
+
+        :param path: Path of the Unix socket to listen on.
+        :param writer: The writer to handle the requests with.
+        """
+        self.writer = writer
+        super().__init__(str(path), _RequestHandler)
+
+
+class TaskServer:
+    """Owns the tasks shared by multiple processes, making the changes sent by the
+    replicas and streaming the changes to them.
+    """
+
+    def __init__(self, manager: TaskManager, path: Path) -> None:
+        """Initialize the server and listen on a Unix socket.
+
+        :param manager: Task manager that owns the tasks.
+        :param path: Path of the Unix socket to listen on. An existing file at the
+        path is replaced.
+        """
+        self._manager = manager
+        self._path = path
+        self._closed = threading.Event()
+        path.unlink(missing_ok=True)
+        self._server = _UnixServer(path, self)
+
+    def execute(self, change: Change) -> Reply:
+        """Make a change to the tasks.
+
+        :param change: The change to make.
+        :return: The reply with the version that includes the change, and the tasks
+        returned by the method that makes it.
+        """
+        reply = Reply()
+        try:
+            match change.operation:
+                case Operation.ADD:
+                    self._manager.add_task(change.task)
+                case Operation.ADD_ALL:
+                    self._manager.add_tasks(change.tasks)
+                case Operation.UPDATE:
+                    self._manager.update_task(change.task)
+                case Operation.UPDATE_ALL:
+                    reply.tasks = self._manager.update_tasks(change.tasks)
+                case Operation.DELETE:
+                    reply.task = self._manager.delete_task(change.title)
+                case Operation.DELETE_ALL:
+                    reply.tasks = self._manager.delete_tasks(change.titles)
+                case Operation.CLEAR:
+                    self._manager.clear_tasks()
+        except ValueError as e:
+            reply.error = str(e)
+
+        # Taken after the change, so that it may include later changes but not miss it.
+        reply.version = self._manager.feed.version
+        return reply
+
+    def stream(self, file: BinaryIO) -> None:
+        """Send a snapshot of the tasks, then the changes made after it until the
+        server is closed.
+        Another snapshot is sent if the changes are made faster than they are sent
+        and are no longer kept.
+
+        :param file: File of the socket to send the updates to.
+        :raises OSError: If the replica closes the connection.
+        """
+        feed = self._manager.feed
+        changed = threading.Event()
+        feed.add_listener(changed.set)
+        try:
+            version = self._send_snapshot(file)
+            while not self._closed.is_set():
+                changed.wait(_POLL_INTERVAL)
+                changed.clear()
+                try:
+                    changes = feed.get_changes(since=version)
+                except ValueError:
+                    version = self._send_snapshot(file)
+                    continue
+
+                for version, change in changes:
+                    file.write(Update(version=version, change=change)
+                               .model_dump_json(exclude_none=True).encode() + b"\n")
+                file.flush()
+        finally:
+            feed.remove_listener(changed.set)
+
+    def _send_snapshot(self, file: BinaryIO) -> int:
+        """Send a snapshot of all tasks.
+
+        :param file: File of the socket to send the snapshot to.
+        :return: The version of the snapshot.
+        """
+        snapshot = self._manager.get_snapshot()
+        _send(file, Update(snapshot=snapshot))
+        return snapshot.version
+
+    def serve_forever(self) -> None:
+        """Handle the connections until the server is closed."""
+        self._server.serve_forever()
+
+    def close(self) -> None:
+        """Stop handling the connections, and close the task manager."""
+        self._closed.set()
+        self._server.shutdown()
+        self._server.server_close()
+        self._path.unlink(missing_ok=True)
+        self._manager.close()
+
+
+class ReplicaTaskManager(TaskManager):
+    """Provides utilities for managing the tasks shared by multiple processes.
+    It has the same interface as TaskManager.
+
+    The tasks are read from a replica in memory, and changed by the writer listening
+    on a Unix socket. The replica follows the changes made by the writer in a
+    background thread. A change returns after the replica includes it, so that the
+    tasks read afterwards reflect it. The versions of the change feed are the same as
+    those of the writer.
+    """
+
+    def __init__(self, path: Path, *, timeout: float = 10) -> None:
+        """Initialize the replica with a snapshot of the tasks from the writer.
+
+        :param path: Path of the Unix socket that the writer listens on.
+        :param timeout: Maximum number of seconds to wait for the replica to include
+        a change.
+        :raises OSError: If the writer cannot be connected.
+        """
+        super().__init__()
+        self._path = path
+        self._timeout = timeout
+        self._pool: SimpleQueue[tuple[socket.socket, BinaryIO]] = SimpleQueue()
+        self._applied = threading.Condition()
+        self._closed = threading.Event()
+        self._subscription = self._subscribe()
+        self._follower = threading.Thread(target=self._follow, daemon=True)
+        self._follower.start()
+
+    def _connect(self) -> tuple[socket.socket, BinaryIO]:
+        """Connect to the writer.
+
+        :return: The socket and its file.
+        :raises OSError: If the writer cannot be connected.
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(str(self._path))
+        except OSError:
+            sock.close()
+            raise
+
+        return sock, sock.makefile("rwb")
+
+    def _subscribe(self) -> tuple[socket.socket, BinaryIO]:
+        """Subscribe to the changes, and load the snapshot of the tasks.
+
+        :return: The socket and its file to receive the changes from.
+        :raises OSError: If the writer cannot be connected.
+        :raises ValueError: If the snapshot is invalid.
+        """
+        sock, file = self._connect()
+        try:
+            _send(file, Request())
+            self._update(_receive(file, Update))
+        except (OSError, ValueError):
+            file.close()
+            sock.close()
+            raise
+
+        return sock, file
+
+    def _follow(self) -> None:
+        """Apply the changes made by the writer until the replica is closed,
+        subscribing again if the connection is lost or an update is invalid.
+        """
+        while not self._closed.is_set():
+            sock, file = self._subscription
+            try:
+                while True:
+                    self._update(_receive(file, Update))
+            except (OSError, ValueError):
+                file.close()
+                sock.close()
+
+            while not self._closed.is_set():
+                try:
+                    self._subscription = self._subscribe()
+                    break
+                except (OSError, ValueError):
+                    time.sleep(_RECONNECT_INTERVAL)
+
+    def _update(self, update: Update) -> None:
+        """Apply an update from the writer to the replica.
+
+        :param update: The update to apply.
+        """
+        with self._lock.write():
+            if update.snapshot is not None:
+                self._load(update.snapshot)
+            else:
+                self._apply(update.change)
+
+        with self._applied:
+            self._applied.notify_all()
+
+    def _load(self, snapshot: Snapshot) -> None:
+        """Replace the tasks with a snapshot while holding the lock for writing.
+        The tasks keep the sequence numbers of the writer, so that the cursors are
+        the same in all processes. The change feed continues from the epoch and the
+        version of the writer, so a writer that restarted resets the clients
+        following the changes. The text indexes and the sorted titles are built on
+        the first search rather than while loading.
+
+        :param snapshot: The snapshot of the tasks.
+        """
+        self._reset()
+        self._text_indexed = False
+        self._titles_sorted = False
+        for task, sequence in zip(snapshot.tasks, snapshot.sequences, strict=True):
+            self._next_sequence = sequence
+            self._insert(task)
+
+        self._next_sequence = snapshot.next_sequence
+        self._feed.reset(snapshot.version, snapshot.epoch)
+
+    def _request(self, change: Change) -> Reply:
+        """Send a change to the writer, and wait until the replica includes it.
+
+        :param change: The change to make.
+        :return: The reply of the writer.
+        :raises ValueError: If the writer cannot make the change.
+        :raises OSError: If the writer cannot be connected.
+        :raises TimeoutError: If the replica does not include the change in time.
+        """
+        try:
+            sock, file = self._pool.get_nowait()
+        except Empty:
+            sock, file = self._connect()
+
+        try:
+            _send(file, Request(change=change))
+            reply = _receive(file, Reply)
+        except OSError:
+            file.close()
+            sock.close()
+            raise
+
+        self._pool.put((sock, file))
+        if reply.error is not None:
+            raise ValueError(reply.error)
+
+        with self._applied:
+            if not self._applied.wait_for(lambda: self._feed.version >= reply.version,
+                                          self._timeout):
+                raise TimeoutError(f"The replica does not include version "
+                                   f"{reply.version} after {self._timeout} seconds.")
+
+        return reply
+
+    def add_task(self, task: Task) -> None:
+        """Add a task through the writer.
+
+        :param task: Task to add.
+        :raises ValueError: If the task with the same title already exists.
+        """
+        self._request(Change(operation=Operation.ADD, task=task))
+
+    def add_tasks(self, tasks: Iterable[Task]) -> None:
+        """Add multiple tasks at once through the writer.
+
+        :param tasks: Tasks to add.
+        :raises ValueError: If any of the titles is duplicated or already exists.
+        """
+        self._request(Change(operation=Operation.ADD_ALL, tasks=list(tasks)))
+
+    def load_tasks(self, tasks: Iterable[Task]) -> None:
+        """Add many tasks at once through the writer, without validating them
+        again.
+
+        :param tasks: Tasks to add.
+        :raises ValueError: If any of the titles is duplicated or already exists.
+        """
+        self._request(Change.model_construct(operation=Operation.ADD_ALL,
+                                             tasks=list(tasks)))
+
+    def update_task(self, task: Task) -> None:
+        """Update an existing task through the writer.
+
+        :param task: Task to update.
+        :raises ValueError: If there is no task with the title in the given task.
+        """
+        self._request(Change(operation=Operation.UPDATE, task=task))
+
+    def update_tasks(self, tasks: Iterable[Task]) -> list[Task]:
+        """Update multiple existing tasks at once through the writer.
+
+        :param tasks: Tasks to update.
+        :return: The tasks before they are updated, in the order of the given tasks.
+        :raises ValueError: If any of the titles in the given tasks does not exist.
+        """
+        reply = self._request(Change(operation=Operation.UPDATE_ALL,
+                                     tasks=list(tasks)))
+        return reply.tasks or []
+
+    def delete_task(self, title: str) -> Task:
+        """Delete a task by its title through the writer.
+
+        :param title: Title of the task to delete.
+        :return: The deleted task.
+        :raises ValueError: If there is no task with the given title.
+        """
+        return self._request(Change(operation=Operation.DELETE, title=title)).task
+
+    def delete_tasks(self, titles: Iterable[str]) -> list[Task]:
+        """Delete multiple tasks by their titles at once through the writer.
+
+        :param titles: Titles of the tasks to delete.
+        :return: The deleted tasks, in the order of the titles.
+        :raises ValueError: If any of the titles does not exist or is given more than
+        once.
+        """
+        reply = self._request(Change(operation=Operation.DELETE_ALL,
+                                     titles=list(titles)))
+        return reply.tasks or []
+
+    def clear_tasks(self) -> None:
+        """Clear all tasks through the writer."""
+        self._request(Change(operation=Operation.CLEAR))
+
+    def close(self) -> None:
+        """Stop following the changes, and close the connections to the writer."""
+        self._closed.set()
+        sock, _ = self._subscription
+        with suppress(OSError):
+            sock.shutdown(socket.SHUT_RDWR)
+        self._follower.join()
+
+        while True:
+            try:
+                sock, file = self._pool.get_nowait()
+            except Empty:
+                return
+
+            file.close()
+            sock.close()
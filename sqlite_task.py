@@ -0,0 +1,767 @@
+"""Provides a task manager that stores the tasks in SQLite."""
+
+import sqlite3
+import sys
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from itertools import batched, islice
+from pathlib import Path
+from queue import Empty, SimpleQueue
+
+from feed import ChangeFeed
+from index import edit_distance, words
+from task import (
+    BucketOrder,
+    Change,
+    Cursor,
+    Operation,
+    Priority,
+    SortOrder,
+    Task,
+    TaskQuery,
+    check_existing_titles,
+    check_new_titles,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    sequence INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL UNIQUE,
+    description TEXT NOT NULL,
+    priority INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_priority ON tasks (priority, sequence);
+CREATE INDEX IF NOT EXISTS tasks_priority_title ON tasks (priority, title);
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_text USING fts5(
+    title, description, content='tasks', content_rowid='sequence',
+    tokenize='trigram case_sensitive 1'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_terms USING fts5(
+    title, description, content='tasks', content_rowid='sequence',
+    tokenize='porter unicode61'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_terms_vocab USING fts5vocab(
+    tasks_terms, 'row'
+);
+"""
+# The full-text indexes of the tasks, which are kept in sync with the tasks table.
+_TEXT_TABLES = ("tasks_text", "tasks_terms")
+
+_COLUMNS = "tasks.title, tasks.description, tasks.priority"
+_ORDER = "ORDER BY tasks.priority DESC, tasks.sequence"
+_BUCKET_ORDERS = {
+    BucketOrder.INSERTION: _ORDER,
+    BucketOrder.TITLE: "ORDER BY tasks.priority DESC, tasks.title",
+}
+_AFTER = "(tasks.priority < ? OR (tasks.priority = ? AND tasks.sequence > ?))"
+_MIN_MATCH_LENGTH = 3
+_MAX_PARAMETERS = 999
+
+
+class SQLiteTaskManager:
+    """Provides utilities for managing tasks stored in SQLite.
+    It has the same interface as TaskManager, but the tasks do not need to fit in
+    memory.
+
+    Titles are unique through the index on the title column. The tasks are ordered
+    by the index on the priority and the sequence columns, and searched through a
+    full-text index with the trigram tokenizer. The ranked searches use another
+    full-text index with the porter tokenizer.
+
+    Each thread takes a connection from a pool, so that the handlers running in a
+    thread pool do not share a connection. Each connection caches its prepared
+    statements. The database is in the WAL mode, so reads do not block writes.
+    """
+
+    def __init__(self, path: Path, *, fetch_size: int = 1000) -> None:
+        """Initialize the task manager.
+
+        :param path: Path of the database file. It is created if it does not exist.
+        :param fetch_size: Number of rows to fetch at once while iterating tasks.
+        """
+        self._path = path
+        self._fetch_size = fetch_size
+        self._pool: SimpleQueue[sqlite3.Connection] = SimpleQueue()
+        self._feed = ChangeFeed()
+        self._commit_lock = threading.Lock()
+
+        with self._connection() as connection:
+            ranked = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'tasks_terms'"
+            ).fetchone()
+            connection.executescript(_SCHEMA)
+            if ranked is None:
+                # The databases created before the ranked searches lack its index.
+                connection.execute(
+                    "INSERT INTO tasks_terms (tasks_terms) VALUES ('rebuild')"
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection to the database.
+
+        :return: The new connection.
+        """
+        connection = sqlite3.connect(self._path, isolation_level=None,
+                                     check_same_thread=False)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.execute("PRAGMA busy_timeout = 5000")
+        return connection
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Take a connection from the pool, returning it to the pool afterward.
+
+        :return: The connection.
+        """
+        try:
+            connection = self._pool.get_nowait()
+        except Empty:
+            connection = self._connect()
+
+        try:
+            yield connection
+        finally:
+            self._pool.put(connection)
+
+    @contextmanager
+    def _transaction(self, change: Change) -> Iterator[sqlite3.Connection]:
+        """Take a connection from the pool and run a write transaction on it.
+        The transaction is rolled back if an exception is raised. Otherwise, the
+        change is published to the change feed after it is committed.
+
+        :param change: The change that the transaction makes.
+        :return: The connection.
+        """
+        with self._connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+            # Publishing in the order of the commits needs them to be serialized.
+            with self._commit_lock:
+                connection.execute("COMMIT")
+                self._feed.publish(change)
+
+    @property
+    def feed(self) -> ChangeFeed:
+        """Get the feed of the changes made to the tasks through this task manager.
+
+        :return: The change feed.
+        """
+        return self._feed
+
+    @staticmethod
+    def _to_task(row: tuple[str, str, int]) -> Task:
+        """Convert a row to a task.
+
+        :param row: Row of the title, the description and the priority.
+        :return: The task.
+        """
+        title, description, priority = row
+        return Task(title=title, description=description, priority=Priority(priority))
+
+    def _query(self, sql: str, parameters: tuple = ()) -> Iterable[Task]:
+        """Lazily get the tasks selected by a query.
+
+        :param sql: Query selecting the title, the description and the priority.
+        :param parameters: Parameters of the query.
+        :return: The tasks selected by the query.
+        """
+        with self._connection() as connection:
+            cursor = connection.execute(sql, parameters)
+            try:
+                while rows := cursor.fetchmany(self._fetch_size):
+                    yield from map(self._to_task, rows)
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _insert(connection: sqlite3.Connection, task: Task) -> None:
+        """Insert a task whose title does not exist.
+
+        :param connection: Connection in a transaction.
+        :param task: Task to insert.
+        """
+        sequence = connection.execute(
+            "INSERT INTO tasks (title, description, priority) VALUES (?, ?, ?)",
+            (task.title, task.description, task.priority.value),
+        ).lastrowid
+        SQLiteTaskManager._index(connection, sequence, task.title, task.description)
+
+    @staticmethod
+    def _index(connection: sqlite3.Connection, sequence: int, title: str,
+               description: str) -> None:
+        """Add the texts of a task to the full-text indexes.
+
+        :param connection: Connection in a transaction.
+        :param sequence: Sequence of the task.
+        :param title: Title of the task.
+        :param description: Description of the task.
+        """
+        for table in _TEXT_TABLES:
+            connection.execute(
+                f"INSERT INTO {table} (rowid, title, description) "  # noqa: S608
+                "VALUES (?, ?, ?)",
+                (sequence, title, description),
+            )
+
+    @staticmethod
+    def _unindex(connection: sqlite3.Connection, sequence: int, title: str,
+                 description: str) -> None:
+        """Remove the texts of a task from the full-text indexes.
+
+        :param connection: Connection in a transaction.
+        :param sequence: Sequence of the task.
+        :param title: Title of the task, as it was indexed.
+        :param description: Description of the task, as it was indexed.
+        """
+        for table in _TEXT_TABLES:
+            connection.execute(
+                f"INSERT INTO {table} ({table}, rowid, title, description) "  # noqa: S608
+                "VALUES ('delete', ?, ?, ?)",
+                (sequence, title, description),
+            )
+
+    @staticmethod
+    def _remove(connection: sqlite3.Connection, title: str) -> Task:
+        """Remove a task.
+
+        :param connection: Connection in a transaction.
+        :param title: Title of the task to remove.
+        :return: The removed task.
+        :raises ValueError: If there is no task with the given title.
+        """
+        row = connection.execute(
+            "DELETE FROM tasks WHERE title = ? "
+            "RETURNING sequence, title, description, priority",
+            (title,),
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Task with the title '{title}' does not exist.")
+
+        sequence, title, description, priority = row
+        SQLiteTaskManager._unindex(connection, sequence, title, description)
+        return Task(title=title, description=description, priority=Priority(priority))
+
+    @staticmethod
+    def _existing_titles(connection: sqlite3.Connection,
+                         titles: Iterable[str]) -> set[str]:
+        """Find which of the titles exist.
+
+        :param connection: Connection to query on.
+        :param titles: Titles to find.
+        :return: The titles that exist.
+        """
+        existing = set()
+        for chunk in batched(titles, _MAX_PARAMETERS):
+            placeholders = ", ".join("?" * len(chunk))
+            query = f"SELECT title FROM tasks WHERE title IN ({placeholders})"  # noqa: S608
+            existing.update(title for title, in connection.execute(query, chunk))
+
+        return existing
+
+    @classmethod
+    def _replace(cls, connection: sqlite3.Connection, task: Task) -> Task:
+        """Replace an existing task.
+
+        :param connection: Connection in a transaction.
+        :param task: Task to replace the existing task with.
+        :return: The replaced task.
+        :raises ValueError: If there is no task with the title in the given task.
+        """
+        row = connection.execute(
+            "SELECT sequence, description, priority FROM tasks WHERE title = ?",
+            (task.title,),
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Task with the title '{task.title}' does not exist.")
+
+        sequence, description, priority = row
+        old_task = Task(title=task.title, description=description,
+                        priority=Priority(priority))
+        if priority != task.priority.value:
+            cls._remove(connection, task.title)
+            cls._insert(connection, task)
+            return old_task
+
+        connection.execute("UPDATE tasks SET description = ? WHERE sequence = ?",
+                           (task.description, sequence))
+        cls._unindex(connection, sequence, task.title, description)
+        cls._index(connection, sequence, task.title, task.description)
+        return old_task
+
+    def has_task(self, task: Task) -> bool:
+        """Check if the task exists.
+        Time complexity: ``O(log n)``.
+
+        :param task: Task to check
+        :return: True if the task exists, False otherwise
+        """
+        with self._connection() as connection:
+            return connection.execute(
+                "SELECT 1 FROM tasks WHERE title = ?", (task.title,)
+            ).fetchone() is not None
+
+    def add_task(self, task: Task) -> None:
+        """Add a task.
+        Time complexity: ``O(log n + m)`` where m is the length of the title and the
+        description of the task.
+
+        :param task: Task to add.
+        :raises ValueError: If the task with the same title already exists.
+        """
+        with self._transaction(Change(operation=Operation.ADD,
+                                      task=task)) as connection:
+            try:
+                self._insert(connection, task)
+            except sqlite3.IntegrityError:
+                raise ValueError(
+                    f"Task with the title '{task.title}' already exists."
+                ) from None
+
+    def add_tasks(self, tasks: Iterable[Task]) -> None:
+        """Add multiple tasks in a single transaction.
+        Either all of the tasks are added, or none of them if any title conflicts.
+        Time complexity: ``O(k * (log n + m))`` where k is the number of tasks given
+        and m is the length of the title and the description of a task.
+
+        :param tasks: Tasks to add.
+        :raises ValueError: If any of the titles is duplicated or already exists.
+        """
+        self._add_all(Change(operation=Operation.ADD_ALL, tasks=list(tasks)))
+
+    def load_tasks(self, tasks: Iterable[Task]) -> None:
+        """Add many tasks in a single transaction, such as the imported ones.
+        It is the same as the add_tasks method, except that the tasks are trusted to
+        be instances of Task, so they are not validated again.
+
+        :param tasks: Tasks to add.
+        :raises ValueError: If any of the titles is duplicated or already exists.
+        """
+        self._add_all(Change.model_construct(operation=Operation.ADD_ALL,
+                                             tasks=list(tasks)))
+
+    def _add_all(self, change: Change) -> None:
+        """Add the tasks of a change in a single transaction.
+
+        :param change: The change that adds the tasks.
+        :raises ValueError: If any of the titles is duplicated or already exists.
+        """
+        tasks = change.tasks
+        if not tasks:
+            return
+
+        with self._transaction(change) as connection:
+            check_new_titles(tasks, self._existing_titles(
+                connection, (task.title for task in tasks)
+            ))
+
+            last, = connection.execute(
+                "SELECT COALESCE(MAX(sequence), 0) FROM tasks"
+            ).fetchone()
+            connection.executemany(
+                "INSERT INTO tasks (title, description, priority) VALUES (?, ?, ?)",
+                ((task.title, task.description, task.priority.value)
+                 for task in tasks),
+            )
+            for table in _TEXT_TABLES:
+                connection.execute(
+                    f"INSERT INTO {table} (rowid, title, description) "  # noqa: S608
+                    "SELECT sequence, title, description FROM tasks "
+                    "WHERE sequence > ?",
+                    (last,),
+                )
+
+    def delete_task(self, title: str) -> Task:
+        """Delete a task by its title.
+        Time complexity: ``O(log n + m)`` where m is the length of the title and the
+        description of the task.
+
+        :param title: Title of the task to delete.
+        :return: The deleted task.
+        :raises ValueError: If there is no task with the given title.
+        """
+        with self._transaction(Change(operation=Operation.DELETE,
+                                      title=title)) as connection:
+            return self._remove(connection, title)
+
+    def update_task(self, task: Task) -> None:
+        """Update an existing task.
+        The task keeps its insertion order unless its priority changes, in which case
+        it becomes the last task with its new priority.
+        Time complexity: ``O(log n + m)`` where m is the length of the descriptions of
+        the old and the new task.
+
+        :param task: Task to update.
+        :raises ValueError: If there is no task with the title in the given task.
+        """
+        with self._transaction(Change(operation=Operation.UPDATE,
+                                      task=task)) as connection:
+            self._replace(connection, task)
+
+    def update_tasks(self, tasks: Iterable[Task]) -> list[Task]:
+        """Update multiple existing tasks in a single transaction.
+        Either all of the tasks are updated, or none of them if any title does not
+        exist. Each task is updated as update_task does, in the given order.
+        Time complexity: ``O(k * (log n + m))`` where k is the number of tasks given
+        and m is the length of the descriptions of the old and the new task.
+
+        :param tasks: Tasks to update.
+        :return: The tasks before they are updated, in the order of the given tasks.
+        :raises ValueError: If any of the titles in the given tasks does not exist.
+        """
+        tasks = list(tasks)
+        titles = [task.title for task in tasks]
+        if not tasks:
+            return []
+
+        with self._transaction(Change(operation=Operation.UPDATE_ALL,
+                                      tasks=tasks)) as connection:
+            check_existing_titles(titles, self._existing_titles(connection, titles))
+            return [self._replace(connection, task) for task in tasks]
+
+    def delete_tasks(self, titles: Iterable[str]) -> list[Task]:
+        """Delete multiple tasks by their titles in a single transaction.
+        Either all of the tasks are deleted, or none of them if any title does not
+        exist.
+        Time complexity: ``O(k * (log n + m))`` where k is the number of titles given
+        and m is the length of the title and the description of a task.
+
+        :param titles: Titles of the tasks to delete.
+        :return: The deleted tasks, in the order of the titles.
+        :raises ValueError: If any of the titles does not exist or is given more than
+        once.
+        """
+        titles = list(titles)
+        if not titles:
+            return []
+
+        with self._transaction(Change(operation=Operation.DELETE_ALL,
+                                      titles=titles)) as connection:
+            check_existing_titles(titles, self._existing_titles(connection, titles),
+                                  once=True)
+            return [self._remove(connection, title) for title in titles]
+
+    def get_task(self, *, title: str) -> Task:
+        """Get a task by its title.
+        Time complexity: ``O(log n)``.
+
+        :param title: Title of the task to get.
+        :return: The task with the given title.
+        :raises ValueError: If there is no task with the given title.
+        """
+        with self._connection() as connection:
+            row = connection.execute(
+                f"SELECT {_COLUMNS} FROM tasks WHERE title = ?",  # noqa: S608
+                (title,),
+            ).fetchone()
+
+        if row is None:
+            raise ValueError(f"Task with the title '{title}' does not exist.")
+
+        return self._to_task(row)
+
+    def get_cursor(self, task: Task) -> Cursor:
+        """Get the cursor pointing at a task.
+        Time complexity: ``O(log n)``.
+
+        :param task: Task to get the cursor of.
+        :return: The cursor pointing at the task.
+        :raises ValueError: If the task does not exist.
+        """
+        with self._connection() as connection:
+            row = connection.execute(
+                "SELECT priority, sequence FROM tasks WHERE title = ?", (task.title,)
+            ).fetchone()
+
+        if row is None:
+            raise ValueError(f"Task with the title '{task.title}' does not exist.")
+
+        priority, sequence = row
+        return Cursor(Priority(priority), sequence)
+
+    def paginate(self, tasks: Iterable[Task], *,
+                 limit: int) -> tuple[list[Task], Cursor | None]:
+        """Take a page of tasks from the iterable object returned by a method of this
+        task manager, together with the cursor to get the next page.
+        Time complexity: ``O(k + log n)`` where k is the cost of consuming
+        ``limit + 1`` tasks from the iterable object.
+
+        :param tasks: Tasks to take the page from.
+        :param limit: Maximum number of tasks in the page.
+        :return: The tasks in the page, and the cursor of the next page or None if
+        there are no more tasks.
+        :raises ValueError: If the last task in the page is deleted before its cursor
+        is taken.
+        """
+        page = list(islice(tasks, limit + 1))
+        if len(page) <= limit:
+            return page, None
+
+        del page[limit:]
+        return page, self.get_cursor(page[-1])
+
+    def get_tasks(self, *, priority: Priority,
+                  after: Cursor | None = None) -> Iterable[Task]:
+        """Lazily get tasks that match the given priority.
+        Time complexity: ``O(log n)`` for starting to consume the returned iterable
+        object.
+
+        :param priority: Priority of the tasks to get
+        :param after: Cursor to start after, or None to start from the first task.
+        :return: Tasks with the given priority.
+        """
+        sequence = -1
+        if after is not None and after.priority == priority:
+            sequence = after.sequence
+        elif after is not None and after.priority < priority:
+            return
+
+        yield from self._query(
+            f"SELECT {_COLUMNS} FROM tasks "  # noqa: S608
+            f"WHERE priority = ? AND sequence > ? {_ORDER}",
+            (priority.value, sequence),
+        )
+
+    def get_all_tasks(self, *, after: Cursor | None = None) -> Iterable[Task]:
+        """Lazily get all tasks sorted by their priority.
+        Time complexity: ``O(log n)`` for starting to consume the returned iterable
+        object.
+
+        :param after: Cursor to start after, or None to start from the first task.
+        :return: All tasks that are sorted by priority from highest to lowest.
+        """
+        if after is None:
+            return self._query(f"SELECT {_COLUMNS} FROM tasks {_ORDER}")  # noqa: S608
+
+        return self._query(
+            f"SELECT {_COLUMNS} FROM tasks WHERE {_AFTER} {_ORDER}",  # noqa: S608
+            (after.priority.value, after.priority.value, after.sequence),
+        )
+
+    def top(self, n: int, *,
+            order: BucketOrder = BucketOrder.INSERTION) -> Iterable[Task]:
+        """Lazily get the first tasks sorted by their priority.
+        The tasks are read in the order of an index, which stops after the first n.
+        Time complexity: ``O(log n + k)`` for consuming k tasks of the returned
+        iterable object.
+
+        :param n: Maximum number of tasks to get.
+        :param order: Order to sort the tasks with the same priority in.
+        :return: The first n tasks that are sorted by priority from highest to
+        lowest.
+        :raises ValueError: If n is negative.
+        """
+        if n < 0:
+            raise ValueError("The number of tasks must not be negative.")
+
+        return self._query(
+            f"SELECT {_COLUMNS} FROM tasks {_BUCKET_ORDERS[order]} LIMIT ?",  # noqa: S608
+            (n,),
+        )
+
+    def search_tasks(self, *, predicate: Callable[[Task], bool],
+                     after: Cursor | None = None) -> Iterable[Task]:
+        """Lazily search for tasks that satisfy a given predicate.
+        Time complexity: ``O(n)`` for consuming the returned iterable object.
+
+        :param predicate: Predicate function to check for each task.
+        :param after: Cursor to start after, or None to start from the first task.
+        :return: Tasks that satisfy the predicate.
+        """
+        return filter(predicate, self.get_all_tasks(after=after))
+
+    def search(self, query: TaskQuery, *, order: SortOrder = SortOrder.PRIORITY,
+               limit: int | None = None,
+               after: Cursor | None = None) -> Iterable[Task]:
+        """Lazily search for tasks that match all filters of a query.
+        The filters are combined into a single statement, so that SQLite chooses
+        between the index on the priority and the full-text index. The full-text index
+        narrows down the candidates of the keywords that are long enough, and the
+        candidates are checked with the exact substring match.
+
+        :param query: Query to match the tasks against.
+        :param order: Order to sort the tasks in.
+        :param limit: Maximum number of tasks to get, or None to get all of them.
+        :param after: Cursor to start after, or None to start from the first task.
+        Only supported when sorting by priority.
+        :return: Tasks that match the query.
+        :raises ValueError: If a cursor is given when not sorting by priority.
+        """
+        if order is not SortOrder.PRIORITY and after is not None:
+            raise ValueError("The cursor is only supported when sorting by priority.")
+
+        conditions = []
+        parameters: list = []
+        phrases = []
+
+        if query.priority is not None:
+            conditions.append("tasks.priority = ?")
+            parameters.append(query.priority.value)
+
+        for column in ("title", "description"):
+            keyword = getattr(query, column)
+            if keyword is None:
+                continue
+
+            conditions.append(f"instr(tasks.{column}, ?) > 0")
+            parameters.append(keyword)
+            if len(keyword) >= _MIN_MATCH_LENGTH:
+                phrase = keyword.replace('"', '""')
+                phrases.append(f'{{{column}}} : "{phrase}"')
+
+        if after is not None:
+            conditions.append(_AFTER)
+            parameters += [after.priority.value, after.priority.value, after.sequence]
+
+        source = "tasks"
+        if phrases:
+            source = "tasks_text JOIN tasks ON tasks.sequence = tasks_text.rowid"
+            conditions.append("tasks_text MATCH ?")
+            parameters.append(" AND ".join(phrases))
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sort = _ORDER if order is SortOrder.PRIORITY else "ORDER BY tasks.title"
+        query_sql = f"SELECT {_COLUMNS} FROM {source} {where} {sort}"  # noqa: S608
+        if limit is not None:
+            query_sql += " LIMIT ?"
+            parameters.append(limit)
+
+        return self._query(query_sql, tuple(parameters))
+
+    def search_title(self, *, keyword: str,
+                     after: Cursor | None = None) -> Iterable[Task]:
+        """Lazily search for tasks that have the keyword in their titles.
+
+        :param keyword: Keyword to search for.
+        :param after: Cursor to start after, or None to start from the first task.
+        :return: Tasks that have the keyword in their titles, sorted by priority from
+        highest to lowest.
+        """
+        return self.search(TaskQuery(title=keyword), after=after)
+
+    def search_description(self, *, keyword: str,
+                           after: Cursor | None = None) -> Iterable[Task]:
+        """Lazily search for tasks that have the keyword in their descriptions.
+
+        :param keyword: Keyword to search for.
+        :param after: Cursor to start after, or None to start from the first task.
+        :return: Tasks that have the keyword in their descriptions, sorted by priority
+        from highest to lowest.
+        """
+        return self.search(TaskQuery(description=keyword), after=after)
+
+    def search_ranked(self, *, query: str, limit: int = 10,
+                      fuzziness: int = 0) -> list[Task]:
+        """Search for the tasks most relevant to a query in their titles and
+        descriptions.
+        The texts are split into case-folded terms stemmed by the porter tokenizer,
+        and the tasks that contain any term of the query are ranked with the BM25 of
+        SQLite. Fuzzy matching adds the indexed terms within the edit distance of
+        each word of the query, with the same weight as the word.
+
+        :param query: Query to search for.
+        :param limit: Maximum number of tasks to get.
+        :param fuzziness: Maximum edit distance between a word of the query and a
+        term of a task to match them, or 0 to match only the same terms.
+        :return: Tasks that contain any term of the query, from the most relevant.
+        :raises ValueError: If the limit is not positive or the fuzziness is
+        negative.
+        """
+        if limit <= 0:
+            raise ValueError("The limit must be positive.")
+        if fuzziness < 0:
+            raise ValueError("The fuzziness must not be negative.")
+
+        terms = set(words(query))
+        with self._connection() as connection:
+            if fuzziness:
+                for word in list(terms):
+                    terms.update(term for term, in connection.execute(
+                        "SELECT term FROM tasks_terms_vocab "
+                        "WHERE length(term) BETWEEN ? AND ?",
+                        (len(word) - fuzziness, len(word) + fuzziness),
+                    ) if edit_distance(word, term, fuzziness) <= fuzziness)
+
+            if not terms:
+                return []
+
+            return [self._to_task(row) for row in connection.execute(
+                f"SELECT {_COLUMNS} FROM tasks_terms "  # noqa: S608
+                "JOIN tasks ON tasks.sequence = tasks_terms.rowid "
+                "WHERE tasks_terms MATCH ? ORDER BY tasks_terms.rank LIMIT ?",
+                (" OR ".join(f'"{term}"' for term in terms), limit),
+            )]
+
+    def search_prefix(self, *, prefix: str, limit: int = 10) -> list[Task]:
+        """Search for the tasks whose titles start with the prefix.
+        The titles are range scanned on their index.
+        Time complexity: ``O(log n + k)`` where k is the limit.
+
+        :param prefix: Prefix of the titles to search for.
+        :param limit: Maximum number of tasks to get.
+        :return: Tasks whose titles start with the prefix, sorted by title.
+        :raises ValueError: If the limit is not positive.
+        """
+        if limit <= 0:
+            raise ValueError("The limit must be positive.")
+
+        conditions = ["title >= ?"]
+        parameters: list = [prefix]
+        # The titles are compared by code points, so the titles starting with the
+        # prefix are below the prefix whose last code point is incremented.
+        if prefix and ord(prefix[-1]) < sys.maxunicode:
+            conditions.append("title < ?")
+            parameters.append(prefix[:-1] + chr(ord(prefix[-1]) + 1))
+
+        with self._connection() as connection:
+            rows = connection.execute(
+                f"SELECT {_COLUMNS} FROM tasks "  # noqa: S608
+                f"WHERE {' AND '.join(conditions)} ORDER BY title LIMIT ?",
+                (*parameters, limit),
+            ).fetchall()
+
+        return [self._to_task(row) for row in rows if row[0].startswith(prefix)]
+
+    def clear_tasks(self) -> None:
+        """Clear all tasks."""
+        with self._transaction(Change(operation=Operation.CLEAR)) as connection:
+            connection.execute("DELETE FROM tasks")
+            for table in _TEXT_TABLES:
+                connection.execute(
+                    f"INSERT INTO {table} ({table}) VALUES ('delete-all')"  # noqa: S608
+                )
+
+    def close(self) -> None:
+        """Close all connections in the pool."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except Empty:
+                return
+
+    def count_tasks(self, *, priority: Priority) -> int:
+        """Get the number of tasks with the given priority.
+        Time complexity: ``O(k)`` where k is the number of tasks with the priority.
+
+        :param priority: Priority of the tasks to count.
+        :return: Number of tasks with the priority.
+        """
+        with self._connection() as connection:
+            return connection.execute(
+                "SELECT count(*) FROM tasks WHERE priority = ?", (priority.value,)
+            ).fetchone()[0]
+
+    def __len__(self) -> int:
+        """Get the total number of tasks.
+        Time complexity: ``O(n)``.
+
+        :return: Total number of tasks.
+        """
+        with self._connection() as connection:
+            return connection.execute("SELECT count(*) FROM tasks").fetchone()[0]
@@ -0,0 +1,287 @@
+"""Provides storages that persist the tasks of a task manager."""
+
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from pathlib import Path
+from typing import BinaryIO
+
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+from task import Change, Task
+
+
+class Storage(ABC):
+    """Persists the changes made to a task manager."""
+
+    @abstractmethod
+    def load(self) -> tuple[list[Task], list[Change]]:
+        """Load the persisted tasks.
+
+        :return: The tasks of the latest snapshot, and the changes made after it.
+        """
+
+    @abstractmethod
+    def append(self, change: Change) -> None:
+        """Persist a change made to the task manager.
+
+        :param change: The change to persist.
+        """
+
+    def should_compact(self) -> bool:
+        """Check if the storage should be compacted.
+
+        :return: True if the storage should be compacted, False otherwise.
+        """
+        return False
+
+    def rotate(self) -> int:
+        """Start persisting the changes after the current ones separately, so that
+        the current ones can be compacted without blocking them.
+
+        :return: Position to compact the persisted changes up to.
+        """
+        return 0
+
+    def compact(self, tasks: Iterable[Task], position: int) -> None:  # noqa: B027
+        """Replace the changes persisted before a position with a snapshot of the
+        tasks. It may be called from another thread than the other methods.
+
+        :param tasks: All tasks of the task manager at the position.
+        :param position: Position returned by the rotate method.
+        """
+
+    def sync(self) -> None:  # noqa: B027
+        """Make the persisted changes durable."""
+
+    def close(self) -> None:
+        """Make the persisted changes durable and release the resources."""
+        self.sync()
+
+
+class LogStorage(Storage):
+    """Persists the changes in an append-only log, which is periodically compacted
+    into a snapshot.
+
+    The snapshot ``snapshot-<generation>.json`` holds the tasks at the beginning of
+    the log ``log-<generation>.ndjson``. Its priorities are stored as their values,
+    which are validated much faster than their names. The changes continue in the
+    logs of the following generations, because a new log is started before the
+    snapshot at its beginning is written. Once the snapshot is written, the files
+    of the previous generations are deleted.
+
+    The changes are appended and synced under a lock, because the changes left
+    unsynced are synced from a timer thread once ``sync_interval`` passes.
+    """
+
+    _SNAPSHOT_PATTERN = re.compile(r"snapshot-(\d+)\.json")
+    _FILE_PATTERN = re.compile(r"(?:snapshot-(\d+)\.json|log-(\d+)\.ndjson)")
+    _tasks_adapter = TypeAdapter(list[Task])
+    _changes_adapter = TypeAdapter(list[Change])
+
+    def __init__(self, directory: Path, *, sync_every: int = 1,
+                 sync_interval: float = 1.0, compact_every: int = 100_000) -> None:
+        """Initialize the log storage.
+
+        :param directory: Directory to store the files in. It is created if it does
+        not exist.
+        :param sync_every: Number of changes to write before making them durable
+        together. Up to ``sync_every - 1`` of the latest changes may be lost when
+        the program crashes.
+        :param sync_interval: Maximum number of seconds that a change stays not
+        durable, even if fewer than ``sync_every`` changes are appended after it.
+        :param compact_every: Number of changes in the log to compact it into a
+        snapshot.
+        :raises ValueError: If sync_every, sync_interval or compact_every is not
+        positive.
+        """
+        if sync_every <= 0:
+            raise ValueError("The number of changes to sync must be positive.")
+        if sync_interval <= 0:
+            raise ValueError("The interval to sync must be positive.")
+        if compact_every <= 0:
+            raise ValueError("The number of changes to compact must be positive.")
+
+        self._directory = directory
+        self._sync_every = sync_every
+        self._sync_interval = sync_interval
+        self._compact_every = compact_every
+
+        self._directory.mkdir(parents=True, exist_ok=True)
+        # Generation of the log that the changes are appended to.
+        self._generation = self._latest_generation()
+        self._log: BinaryIO | None = None
+        self._log_size = 0
+        self._unsynced = 0
+        self._lock = threading.Lock()
+        # Timer that syncs the changes left unsynced, started by the oldest one.
+        self._timer: threading.Timer | None = None
+
+    def _latest_generation(self) -> int:
+        """Find the generation of the latest snapshot in the directory.
+
+        :return: The latest generation, or 0 if there is no snapshot.
+        """
+        generations = [
+            int(match[1]) for path in self._directory.iterdir()
+            if (match := self._SNAPSHOT_PATTERN.fullmatch(path.name))
+        ]
+        return max(generations, default=0)
+
+    def _snapshot_path(self, generation: int) -> Path:
+        """Get the path of the snapshot of a generation.
+
+        :param generation: Generation of the snapshot.
+        :return: The path of the snapshot.
+        """
+        return self._directory / f"snapshot-{generation}.json"
+
+    def _log_path(self, generation: int) -> Path:
+        """Get the path of the log of a generation.
+
+        :param generation: Generation of the log.
+        :return: The path of the log.
+        """
+        return self._directory / f"log-{generation}.ndjson"
+
+    def load(self) -> tuple[list[Task], list[Change]]:
+        """Load the persisted tasks.
+        The snapshot and the logs are each parsed in a single pass. A partially
+        written change at the end of a log is discarded.
+
+        :return: The tasks of the latest snapshot, and the changes made after it.
+        """
+        snapshot_path = self._snapshot_path(self._generation)
+        tasks = (self._tasks_adapter.validate_json(snapshot_path.read_bytes())
+                 if snapshot_path.exists() else [])
+
+        lines = []
+        generation = self._generation
+        while (log_path := self._log_path(generation)).exists():
+            data = log_path.read_bytes()
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                with log_path.open("r+b") as file:
+                    file.truncate(end)
+
+            lines += data[:end].splitlines()
+            self._generation = generation
+            generation += 1
+
+        changes = self._changes_adapter.validate_json(b"[" + b",".join(lines) + b"]")
+        self._log_size = len(changes)
+        return tasks, changes
+
+    def append(self, change: Change) -> None:
+        """Persist a change made to the task manager.
+        The change becomes durable after ``sync_every`` changes are appended, or
+        after ``sync_interval`` seconds at the latest.
+
+        :param change: The change to persist.
+        """
+        data = change.model_dump_json(exclude_none=True).encode() + b"\n"
+        with self._lock:
+            if self._log is None:
+                self._log = self._log_path(self._generation).open("ab")
+
+            self._log.write(data)
+            self._log_size += 1
+            self._unsynced += 1
+
+            if self._unsynced >= self._sync_every:
+                self._sync()
+            elif self._timer is None:
+                self._timer = threading.Timer(self._sync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def should_compact(self) -> bool:
+        """Check if the log has enough changes to be compacted.
+
+        :return: True if the log should be compacted, False otherwise.
+        """
+        return self._log_size >= self._compact_every
+
+    def rotate(self) -> int:
+        """Make the appended changes durable, and start the log of the next
+        generation.
+
+        :return: The generation of the new log, whose snapshot is to be written.
+        """
+        self.close()
+        self._generation += 1
+        self._log_size = 0
+        return self._generation
+
+    def compact(self, tasks: Iterable[Task], position: int) -> None:
+        """Write the snapshot at the beginning of the log of a generation, then
+        delete the files of the previous generations. It only touches the files of
+        those generations, so the changes can be appended to the new log meanwhile.
+
+        :param tasks: All tasks of the task manager at the beginning of the log.
+        :param position: Generation of the log returned by the rotate method.
+        """
+        generation = position
+        snapshot_path = self._snapshot_path(generation)
+        temp_path = snapshot_path.with_suffix(".tmp")
+
+        with temp_path.open("wb") as file:
+            file.write(b"[")
+            for i, task in enumerate(tasks):
+                if i > 0:
+                    file.write(b",")
+                file.write(to_json({"title": task.title,
+                                    "description": task.description,
+                                    "priority": task.priority.value}))
+            file.write(b"]")
+            file.flush()
+            os.fsync(file.fileno())
+
+        temp_path.replace(snapshot_path)
+        self._sync_directory()
+
+        for path in self._directory.iterdir():
+            match = self._FILE_PATTERN.fullmatch(path.name)
+            if match and int(match[1] or match[2]) < generation:
+                path.unlink(missing_ok=True)
+
+    def _sync_directory(self) -> None:
+        """Make the changes of the entries in the directory durable."""
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+
+        fd = os.open(self._directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def sync(self) -> None:
+        """Make the appended changes durable."""
+        with self._lock:
+            self._sync()
+
+    def _sync(self) -> None:
+        """Make the appended changes durable while holding the lock."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if self._log is None or self._unsynced == 0:
+            return
+
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._unsynced = 0
+
+    def close(self) -> None:
+        """Make the appended changes durable and close the log."""
+        with self._lock:
+            self._sync()
+
+            if self._log is not None:
+                self._log.close()
+                self._log = None
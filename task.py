@@ -1,11 +1,26 @@
 """Provides classes for task manager."""
 
-from collections.abc import Callable, Iterable
-from enum import Enum
-from typing import Self
+import base64
+import heapq
+import threading
+from bisect import bisect_right
+from collections.abc import Callable, Container, Iterable, Mapping
+from enum import Enum, StrEnum
+from functools import cached_property, partial
+from itertools import islice, takewhile
+from operator import attrgetter, itemgetter
+from typing import TYPE_CHECKING, Any, NamedTuple, Self
 
 from pydantic import BaseModel, ConfigDict, field_serializer
 
+from cache import CacheInfo, LRUCache
+from feed import ChangeFeed
+from index import FullTextIndex, NGramIndex, SortedKeys
+from lock import ReadWriteLock
+
+if TYPE_CHECKING:
+    from storage import Storage
+
 
 class Priority(Enum):
     """Priority of a task."""
@@ -78,6 +93,29 @@ class Task(BaseModel):
         """Serialize priority field."""
         return priority.name
 
+    @cached_property
+    def json_bytes(self) -> bytes:
+        """Get the task serialized as JSON.
+        It is computed once per task, which is safe because the task is immutable.
+
+        :return: The task serialized as JSON.
+        """
+        return self.__pydantic_serializer__.to_json(self)
+
+    def model_copy(self, *, update: Mapping[str, Any] | None = None,
+                   deep: bool = False) -> Self:
+        """Copy the task, dropping the serialized JSON if any value is updated.
+
+        :param update: Values to change in the copied task.
+        :param deep: Whether to make a deep copy of the task.
+        :return: The copied task.
+        """
+        task = super().model_copy(update=update, deep=deep)
+        if update:
+            task.__dict__.pop("json_bytes", None)
+
+        return task
+
     def __hash__(self) -> int:
         """Return a hash code for this task.
 
@@ -107,12 +145,370 @@ class Task(BaseModel):
         return self.priority < other.priority
 
 
+class Operation(StrEnum):
+    """Operation that changes the tasks of a task manager."""
+
+    ADD = "add"
+    ADD_ALL = "add_all"
+    UPDATE = "update"
+    UPDATE_ALL = "update_all"
+    DELETE = "delete"
+    DELETE_ALL = "delete_all"
+    CLEAR = "clear"
+
+
+class Change(BaseModel):
+    """Contains a change made to the tasks of a task manager."""
+
+    model_config = ConfigDict(frozen=True)
+
+    operation: Operation
+    task: Task | None = None
+    tasks: list[Task] | None = None
+    title: str | None = None
+    titles: list[str] | None = None
+
+
+def check_new_titles(tasks: Iterable[Task], existing: Container[str]) -> None:
+    """Check that the titles of tasks to add are unique and do not exist yet.
+    Time complexity: ``O(k)`` where k is the number of tasks given, if checking the
+    existing titles takes ``O(1)``.
+
+    :param tasks: Tasks to add.
+    :param existing: Titles of the existing tasks.
+    :raises ValueError: If any of the titles is duplicated or already exists. The
+    message lists all such titles.
+    """
+    seen = set()
+    conflicts = {}
+    for task in tasks:
+        if task.title in seen or task.title in existing:
+            conflicts[task.title] = None
+        seen.add(task.title)
+
+    if len(conflicts) == 1:
+        title, = conflicts
+        raise ValueError(f"Task with the title '{title}' already exists.")
+    if conflicts:
+        titles = ", ".join(f"'{title}'" for title in conflicts)
+        raise ValueError(f"Tasks with the titles {titles} already exist.")
+
+
+def check_existing_titles(titles: Iterable[str], existing: Container[str], *,
+                          once: bool = False) -> None:
+    """Check that the titles of tasks to change exist.
+    Time complexity: ``O(k)`` where k is the number of titles given, if checking the
+    existing titles takes ``O(1)``.
+
+    :param titles: Titles of the tasks to change.
+    :param existing: Titles of the existing tasks.
+    :param once: Whether each title can be given only once, because its task does
+    not exist after the first change, such as deleting it.
+    :raises ValueError: If any of the titles does not exist. The message lists all
+    such titles.
+    """
+    seen = set()
+    missing = {}
+    for title in titles:
+        if (once and title in seen) or title not in existing:
+            missing[title] = None
+        seen.add(title)
+
+    if len(missing) == 1:
+        title, = missing
+        raise ValueError(f"Task with the title '{title}' does not exist.")
+    if missing:
+        titles = ", ".join(f"'{title}'" for title in missing)
+        raise ValueError(f"Tasks with the titles {titles} do not exist.")
+
+
+class Cursor(NamedTuple):
+    """Position of a task in the order of a task manager."""
+
+    priority: Priority
+    sequence: int
+
+    def sort_key(self) -> tuple[int, int]:
+        """Get the key that sorts cursors in the order of the tasks they point at.
+
+        :return: The sort key of the cursor.
+        """
+        return -self.priority.value, self.sequence
+
+    def encode(self) -> str:
+        """Encode the cursor as an opaque string.
+
+        :return: The encoded cursor.
+        """
+        raw = f"{self.priority.value}:{self.sequence}".encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    @classmethod
+    def decode(cls, cursor: str) -> Self:
+        """Decode a cursor encoded by the encode method.
+
+        :param cursor: The encoded cursor.
+        :return: The decoded cursor.
+        :raises ValueError: If the cursor is invalid.
+        """
+        try:
+            priority, sequence = base64.urlsafe_b64decode(cursor).decode().split(":")
+            return cls(Priority(int(priority)), int(sequence))
+        except ValueError as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class Snapshot(BaseModel):
+    """Contains all tasks of a task manager with their sequence numbers, at a version
+    of its change feed.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    tasks: list[Task]
+    sequences: list[int]
+    next_sequence: int
+    epoch: str
+    version: int
+
+
+class SortOrder(StrEnum):
+    """Order to sort the results of a search in."""
+
+    PRIORITY = "priority"
+    TITLE = "title"
+
+
+class BucketOrder(StrEnum):
+    """Order to sort the tasks with the same priority in."""
+
+    INSERTION = "insertion"
+    TITLE = "title"
+
+
+class TaskQuery(NamedTuple):
+    """Filters to search for tasks with. A task matches if it satisfies all filters
+    that are not None.
+    """
+
+    priority: Priority | None = None
+    title: str | None = None
+    description: str | None = None
+
+    def matches(self, task: Task) -> bool:
+        """Check if a task satisfies all filters of the query.
+
+        :param task: Task to check.
+        :return: True if the task matches the query, False otherwise.
+        """
+        return ((self.priority is None or task.priority == self.priority)
+                and (self.title is None or self.title in task.title)
+                and (self.description is None
+                     or self.description in task.description))
+
+
 class TaskManager:
-    """Provides utilities for managing tasks."""
+    """Provides utilities for managing tasks.
+    Tasks are ordered by their priority from highest to lowest, then by their
+    insertion order.
+
+    It is safe to use from multiple threads. Changes are serialized by a read-write
+    lock, while reads only wait for the changes in progress. A single lookup by
+    title reads one dictionary entry, which is atomic, so it does not take the lock.
+    Iterating tasks sees a snapshot taken when the iteration starts.
+    """
+
+    def __init__(self, storage: "Storage | None" = None, *,
+                 search_cache_size: int = 256) -> None:
+        """Initialize the task manager.
 
-    def __init__(self) -> None:
-        """Initialize the task manager."""
+        :param storage: Storage to restore the tasks from and to persist the changes
+        to, or None to keep the tasks only in memory.
+        :param search_cache_size: Maximum number of the title and description
+        searches to cache the results of.
+        """
+        self._lock = ReadWriteLock()
+        self._index_lock = threading.Lock()
         self._tasks = self._new_task_container()
+        self._titles: dict[str, Task] = {}
+        self._sequences: dict[str, int] = {}
+        self._sequence_titles: dict[int, str] = {}
+        self._next_sequence = 0
+        self._orders = self._new_order_container()
+        self._title_index = NGramIndex()
+        self._description_index = NGramIndex()
+        self._full_text_index = FullTextIndex()
+        # Sorted titles of all tasks for the prefix searches, and of each priority
+        # for sorting the tasks with the same priority by title.
+        self._sorted_titles = SortedKeys()
+        self._priority_titles = self._new_sorted_titles_container()
+        self._text_indexed = True
+        self._titles_sorted = True
+        self._search_cache: LRUCache[tuple[str, str], list[Task]] = LRUCache(
+            search_cache_size
+        )
+        self._storage: Storage | None = None
+        self._compaction: threading.Thread | None = None
+        self._feed = ChangeFeed()
+        self._scan_listeners: list[Callable[[str, int], None]] = []
+
+        if storage is not None:
+            self._restore(storage)
+            self._storage = storage
+            # The changes replayed from the storage are not new to anyone.
+            self._feed = ChangeFeed()
+
+    def _restore(self, storage: "Storage") -> None:
+        """Restore the tasks from a storage.
+        The text indexes and the sorted titles are built on the first search rather
+        than while restoring.
+
+        :param storage: Storage to restore the tasks from.
+        """
+        tasks, changes = storage.load()
+        self._text_indexed = False
+        self._titles_sorted = False
+
+        for task in tasks:
+            self._insert(task)
+
+        for change in changes:
+            self._apply(change)
+
+    def _apply(self, change: Change) -> None:
+        """Apply a change to the tasks.
+
+        :param change: The change to apply.
+        :raises ValueError: If the change cannot be applied to the tasks.
+        """
+        match change.operation:
+            case Operation.ADD:
+                self._add(change.task)
+            case Operation.ADD_ALL:
+                self._add_all(change.tasks)
+            case Operation.UPDATE:
+                self._update(change.task)
+            case Operation.UPDATE_ALL:
+                self._update_all(change.tasks)
+            case Operation.DELETE:
+                self._delete(change.title)
+            case Operation.DELETE_ALL:
+                self._delete_all(change.titles)
+            case Operation.CLEAR:
+                self._clear()
+
+    def _record(self, change: Change) -> None:
+        """Persist a change to the storage, compacting the storage if needed, then
+        publish it to the change feed.
+
+        :param change: The change to record.
+        """
+        if self._storage is not None:
+            self._storage.append(change)
+            if self._storage.should_compact():
+                self._start_compaction(self._storage)
+
+        self._feed.publish(change)
+
+    def _start_compaction(self, storage: "Storage") -> None:
+        """Compact the storage up to the current tasks on a background thread.
+        Only the references to the stored tasks are copied while holding the lock,
+        and the snapshot is written without it. A compaction that fails leaves the
+        persisted changes as they were, so they are compacted again later.
+        It must be called while holding the lock for writing.
+
+        :param storage: The storage to compact.
+        """
+        self._wait_for_compaction()
+        tasks = list(self._iter_all(None))
+        position = storage.rotate()
+        self._compaction = threading.Thread(
+            target=storage.compact, args=(map(self._unpack, tasks), position),
+            name="compaction",
+        )
+        self._compaction.start()
+
+    def _wait_for_compaction(self) -> None:
+        """Wait until the compaction running in the background, if any, finishes."""
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+
+    @property
+    def feed(self) -> ChangeFeed:
+        """Get the feed of the changes made to the tasks.
+
+        :return: The change feed.
+        """
+        return self._feed
+
+    def _ensure_text_indexed(self) -> None:
+        """Build the text indexes if they have not been built.
+        It must be called while holding the lock.
+        Time complexity: ``O(n * m)`` where n is the number of tasks and m is the
+        length of the title and the description of a task if the indexes have not
+        been built, ``O(1)`` otherwise.
+        """
+        if self._text_indexed:
+            return
+
+        with self._index_lock:
+            if self._text_indexed:
+                return
+
+            for task in self._titles.values():
+                self._title_index.add(task.title, task.title)
+                self._description_index.add(task.title, task.description)
+                self._full_text_index.add(task.title, self._full_text(task))
+            self._text_indexed = True
+
+    def _ensure_titles_sorted(self) -> None:
+        """Sort the titles of all tasks and of each priority if they have not been
+        sorted, without building the text indexes.
+        It must be called while holding the lock.
+        Time complexity: ``O(n log n)`` if the titles have not been sorted, ``O(1)``
+        otherwise.
+        """
+        if self._titles_sorted:
+            return
+
+        with self._index_lock:
+            if self._titles_sorted:
+                return
+
+            self._sorted_titles.build(self._titles)
+            for priority, tasks in enumerate(self._tasks):
+                self._priority_titles[priority].build(tasks)
+            self._titles_sorted = True
+
+    def _drop_text_indexes(self) -> None:
+        """Drop the text indexes and the sorted titles, so that they are built on
+        the next search.
+        It must be called while holding the lock for writing.
+        """
+        self._title_index.clear()
+        self._description_index.clear()
+        self._full_text_index.clear()
+        self._sorted_titles.clear()
+        self._priority_titles = self._new_sorted_titles_container()
+        self._text_indexed = False
+        self._titles_sorted = False
+
+    @staticmethod
+    def _full_text(task: Task) -> str:
+        """Get the text of a task to index for the ranked searches.
+
+        :param task: The task.
+        :return: The title and the description of the task.
+        """
+        return f"{task.title}\n{task.description}"
+
+    def close(self) -> None:
+        """Make the persisted changes durable and close the storage."""
+        with self._lock.write():
+            self._wait_for_compaction()
+            if self._storage is not None:
+                self._storage.close()
 
     @staticmethod
     def _new_task_container() -> list[dict[str, Task]]:
@@ -122,6 +518,44 @@ class TaskManager:
         """
         return [{} for _ in range(len(Priority))]
 
+    @staticmethod
+    def _new_order_container() -> list[list[int]]:
+        """Create a new order container that keeps the sorted sequence numbers of
+        the tasks for each priority. It may also contain the sequence numbers of
+        deleted tasks until it is compacted.
+
+        :return: New order container.
+        """
+        return [[] for _ in range(len(Priority))]
+
+    @staticmethod
+    def _new_sorted_titles_container() -> list[SortedKeys]:
+        """Create a new container that keeps the sorted titles of the tasks for each
+        priority.
+
+        :return: New sorted titles container.
+        """
+        return [SortedKeys() for _ in range(len(Priority))]
+
+    @staticmethod
+    def _pack(task: Task) -> Task:
+        """Convert a task into the form it is stored in.
+        The stored form must have the same attributes as the task.
+
+        :param task: Task to convert.
+        :return: The task in its stored form.
+        """
+        return task
+
+    @staticmethod
+    def _unpack(task: Task) -> Task:
+        """Convert a stored task back into a task.
+
+        :param task: The task in its stored form.
+        :return: The task.
+        """
+        return task
+
     def has_task(self, task: Task) -> bool:
         """Check if the task exists.
         Time complexity: ``O(1)``.
@@ -129,11 +563,56 @@ class TaskManager:
         :param task: Task to check
         :return: True if the task exists, False otherwise
         """
-        return task.title in self._tasks[task.priority]
+        return task.title in self._titles
+
+    def _sort_key(self, task: Task) -> tuple[int, int]:
+        """Get the key that sorts tasks in the order of this task manager.
+
+        :param task: Task in this task manager to get the key of.
+        :return: The sort key of the task.
+        """
+        return -task.priority.value, self._sequences[task.title]
+
+    def _append_sequence(self, task: Task) -> None:
+        """Assign a new sequence number to a task, making it the last task with its
+        priority.
+
+        :param task: Task to assign the sequence number to.
+        """
+        sequence = self._next_sequence
+        self._next_sequence += 1
+        self._sequences[task.title] = sequence
+        self._sequence_titles[sequence] = task.title
+        self._orders[task.priority].append(sequence)
+
+    def _remove_sequence(self, title: str, priority: Priority) -> None:
+        """Remove the sequence number of a task, compacting the order of its priority
+        if it has too many sequence numbers of deleted tasks.
+        Time complexity: amortized ``O(1)``.
+
+        :param title: Title of the task.
+        :param priority: Priority of the task.
+        """
+        del self._sequence_titles[self._sequences.pop(title)]
+
+        if len(self._orders[priority]) > 2 * len(self._tasks[priority]):
+            self._orders[priority] = [
+                self._sequences[t] for t in self._tasks[priority]
+            ]
 
     def add_task(self, task: Task) -> None:
         """Add a task.
-        Time complexity: ``O(1)``.
+        Time complexity: ``O(m)`` where m is the length of the title and the
+        description of the task.
+
+        :param task: Task to add.
+        :raises ValueError: If the task with the same title already exists.
+        """
+        with self._lock.write():
+            self._add(task)
+
+    def _add(self, task: Task) -> None:
+        """Add a task while holding the lock for writing.
 
         :param task: Task to add.
         :raises ValueError: If the task with the same title already exists.
@@ -141,38 +620,251 @@ class TaskManager:
         if self.has_task(task):
             raise ValueError(f"Task with the title '{task.title}' already exists.")
 
-        self._tasks[task.priority][task.title] = task
+        self._insert(task)
+        self._record(Change(operation=Operation.ADD, task=task))
+
+    def _insert(self, task: Task) -> None:
+        """Insert a task whose title does not exist.
+
+        :param task: Task to insert.
+        """
+        record = self._pack(task)
+        self._titles[task.title] = record
+        self._tasks[task.priority][task.title] = record
+        self._append_sequence(task)
+        self._invalidate(task)
+
+        if self._text_indexed:
+            self._title_index.add(task.title, task.title)
+            self._description_index.add(task.title, task.description)
+            self._full_text_index.add(task.title, self._full_text(task))
+        if self._titles_sorted:
+            self._sorted_titles.add(task.title)
+            self._priority_titles[task.priority].add(task.title)
 
     def add_tasks(self, tasks: Iterable[Task]) -> None:
-        """Add multiple tasks.
-        Time complexity: ``O(n)`` where n is the number of tasks given.
+        """Add multiple tasks at once.
+        Either all of the tasks are added, or none of them if any title conflicts.
+        They are persisted as a single change.
+        Time complexity: ``O(k * m)`` where k is the number of tasks given and m is
+        the length of the title and the description of a task.
 
         :param tasks: Tasks to add.
-        :raises ValueError: If the task with the same title already exists.
+        :raises ValueError: If any of the titles is duplicated or already exists.
+        """
+        tasks = list(tasks)
+        with self._lock.write():
+            self._add_all(tasks)
+
+    def _add_all(self, tasks: list[Task]) -> None:
+        """Add multiple tasks at once while holding the lock for writing.
+
+        :param tasks: Tasks to add.
+        :raises ValueError: If any of the titles is duplicated or already exists.
         """
+        check_new_titles(tasks, self._titles)
+        if not tasks:
+            return
+
+        self._prepare_batch(len(tasks))
         for task in tasks:
-            self.add_task(task)
+            self._insert(task)
+
+        self._record(Change(operation=Operation.ADD_ALL, tasks=tasks))
+
+    def load_tasks(self, tasks: Iterable[Task]) -> None:
+        """Add many tasks at once, such as the imported ones.
+        It is the same as the add_tasks method, except that the tasks are trusted to
+        be instances of Task, so the change is recorded without validating them
+        again. If there are more of them than the existing tasks, the text indexes
+        and the sorted titles are dropped and built again on the next search rather
+        than updated for each task.
+        Time complexity: ``O(k)`` where k is the number of tasks given, plus
+        ``O(k * m)`` for updating the text indexes and the sorted titles if they are
+        not dropped.
+
+        :param tasks: Tasks to add.
+        :raises ValueError: If any of the titles is duplicated or already exists.
+        """
+        tasks = list(tasks)
+        with self._lock.write():
+            check_new_titles(tasks, self._titles)
+            if not tasks:
+                return
+
+            if len(tasks) > len(self._titles):
+                self._drop_text_indexes()
+            self._prepare_batch(len(tasks))
+            for task in tasks:
+                self._insert(task)
+
+            self._record(Change.model_construct(operation=Operation.ADD_ALL,
+                                                tasks=tasks))
 
     def delete_task(self, title: str) -> Task:
         """Delete a task by its title.
-        Time complexity: ``O(1)``.
+        Time complexity: ``O(m)`` where m is the length of the title and the
+        description of the task.
+
+        :param title: Title of the task to delete.
+        :return: The deleted task.
+        :raises ValueError: If there is no task with the given title.
+        """
+        with self._lock.write():
+            return self._delete(title)
+
+    def _delete(self, title: str) -> Task:
+        """Delete a task by its title while holding the lock for writing.
 
         :param title: Title of the task to delete.
         :return: The deleted task.
         :raises ValueError: If there is no task with the given title.
         """
-        task = self.get_task(title=title)
-        return self._tasks[task.priority].pop(task.title)
+        task = self._remove(title)
+        self._record(Change(operation=Operation.DELETE, title=title))
+        return task
+
+    def _remove(self, title: str) -> Task:
+        """Remove a task without persisting the change.
+
+        :param title: Title of the task to remove.
+        :return: The removed task.
+        :raises ValueError: If there is no task with the given title.
+        """
+        task = self._titles.pop(title, None)
+        if task is None:
+            raise ValueError(f"Task with the title '{title}' does not exist.")
+
+        del self._tasks[task.priority][title]
+        self._remove_sequence(title, task.priority)
+        self._invalidate(task)
+
+        if self._text_indexed:
+            self._title_index.remove(title, title)
+            self._description_index.remove(title, task.description)
+            self._full_text_index.remove(title, self._full_text(task))
+        if self._titles_sorted:
+            self._sorted_titles.discard(title)
+            self._priority_titles[task.priority].discard(title)
+
+        return self._unpack(task)
+
+    def delete_tasks(self, titles: Iterable[str]) -> list[Task]:
+        """Delete multiple tasks by their titles at once.
+        Either all of the tasks are deleted, or none of them if any title does not
+        exist. They are persisted as a single change.
+        Time complexity: ``O(k * m)`` where k is the number of titles given and m is
+        the length of the title and the description of a task.
+
+        :param titles: Titles of the tasks to delete.
+        :return: The deleted tasks, in the order of the titles.
+        :raises ValueError: If any of the titles does not exist or is given more than
+        once.
+        """
+        titles = list(titles)
+        with self._lock.write():
+            return self._delete_all(titles)
+
+    def _delete_all(self, titles: list[str]) -> list[Task]:
+        """Delete multiple tasks at once while holding the lock for writing.
+
+        :param titles: Titles of the tasks to delete.
+        :return: The deleted tasks, in the order of the titles.
+        :raises ValueError: If any of the titles does not exist or is given more than
+        once.
+        """
+        check_existing_titles(titles, self._titles, once=True)
+        if not titles:
+            return []
+
+        self._prepare_batch(len(titles))
+        deleted = [self._remove(title) for title in titles]
+        self._record(Change(operation=Operation.DELETE_ALL, titles=titles))
+        return deleted
 
     def update_task(self, task: Task) -> None:
         """Update an existing task.
-        Time complexity: ``O(1)``.
+        The task keeps its insertion order unless its priority changes, in which case
+        it becomes the last task with its new priority.
+        Time complexity: ``O(m)`` where m is the length of the descriptions of the
+        old and the new task.
+
+        :param task: Task to update.
+        :raises ValueError: If there is no task with the title in the given task.
+        """
+        with self._lock.write():
+            self._update(task)
+
+    def _update(self, task: Task) -> None:
+        """Update an existing task while holding the lock for writing.
 
         :param task: Task to update.
         :raises ValueError: If there is no task with the title in the given task.
         """
-        self.delete_task(task.title)
-        self.add_task(task)
+        self._replace(task)
+        self._record(Change(operation=Operation.UPDATE, task=task))
+
+    def _replace(self, task: Task) -> Task:
+        """Replace an existing task without persisting the change.
+
+        :param task: Task to replace the existing task with.
+        :return: The replaced task.
+        :raises ValueError: If there is no task with the title in the given task.
+        """
+        old_task = self.get_task(title=task.title)
+        self._invalidate(old_task)
+        self._invalidate(task)
+        record = self._pack(task)
+        self._titles[task.title] = record
+        self._tasks[task.priority][task.title] = record
+
+        if old_task.priority != task.priority:
+            del self._tasks[old_task.priority][task.title]
+            self._remove_sequence(task.title, old_task.priority)
+            self._append_sequence(task)
+            if self._titles_sorted:
+                self._priority_titles[old_task.priority].discard(task.title)
+                self._priority_titles[task.priority].add(task.title)
+
+        if self._text_indexed and old_task.description != task.description:
+            self._description_index.remove(task.title, old_task.description)
+            self._description_index.add(task.title, task.description)
+            self._full_text_index.remove(task.title, self._full_text(old_task))
+            self._full_text_index.add(task.title, self._full_text(task))
+
+        return old_task
+
+    def update_tasks(self, tasks: Iterable[Task]) -> list[Task]:
+        """Update multiple existing tasks at once.
+        Either all of the tasks are updated, or none of them if any title does not
+        exist. They are persisted as a single change. Each task is updated as
+        update_task does, in the given order.
+        Time complexity: ``O(k * m)`` where k is the number of tasks given and m is
+        the length of the descriptions of the old and the new task.
+
+        :param tasks: Tasks to update.
+        :return: The tasks before they are updated, in the order of the given tasks.
+        :raises ValueError: If any of the titles in the given tasks does not exist.
+        """
+        tasks = list(tasks)
+        with self._lock.write():
+            return self._update_all(tasks)
+
+    def _update_all(self, tasks: list[Task]) -> list[Task]:
+        """Update multiple existing tasks at once while holding the lock for writing.
+
+        :param tasks: Tasks to update.
+        :return: The tasks before they are updated, in the order of the given tasks.
+        :raises ValueError: If any of the titles in the given tasks does not exist.
+        """
+        check_existing_titles((task.title for task in tasks), self._titles)
+        if not tasks:
+            return []
+
+        self._prepare_batch(len(tasks))
+        old_tasks = [self._replace(task) for task in tasks]
+        self._record(Change(operation=Operation.UPDATE_ALL, tasks=tasks))
+        return old_tasks
 
     def get_task(self, *, title: str) -> Task:
         """Get a task by its title.
@@ -182,51 +874,507 @@ class TaskManager:
         :return: The task with the given title.
         :raises ValueError: If there is no task with the given title.
         """
-        for priority in Priority:
-            task = self._tasks[priority].get(title)
-            if task:
-                return task
+        task = self._titles.get(title)
+        if task is None:
+            raise ValueError(f"Task with the title '{title}' does not exist.")
 
-        raise ValueError(f"Task with the title '{title}' does not exist.")
+        return self._unpack(task)
+
+    def get_snapshot(self) -> Snapshot:
+        """Get a snapshot of all tasks with their sequence numbers, at the version of
+        the latest change made to them.
+        Time complexity: ``O(n)`` where n is the number of tasks.
+
+        :return: The snapshot of the tasks.
+        """
+        with self._lock.read():
+            tasks = list(map(self._unpack, self._iter_all(None)))
+            epoch, version = self._feed.position
+            return Snapshot(tasks=tasks,
+                            sequences=[self._sequences[task.title] for task in tasks],
+                            next_sequence=self._next_sequence,
+                            epoch=epoch, version=version)
 
-    def get_tasks(self, *, priority: Priority) -> Iterable[Task]:
-        """Get tasks that match the given priority
+    def get_cursor(self, task: Task) -> Cursor:
+        """Get the cursor pointing at a task.
         Time complexity: ``O(1)``.
 
+        :param task: Task to get the cursor of.
+        :return: The cursor pointing at the task.
+        :raises ValueError: If the task does not exist.
+        """
+        with self._lock.read():
+            sequence = self._sequences.get(task.title)
+            if sequence is None:
+                raise ValueError(f"Task with the title '{task.title}' does not exist.")
+
+            return Cursor(self._titles[task.title].priority, sequence)
+
+    def paginate(self, tasks: Iterable[Task], *,
+                 limit: int) -> tuple[list[Task], Cursor | None]:
+        """Take a page of tasks from the iterable object returned by a method of this
+        task manager, together with the cursor to get the next page.
+        The page and the cursor are consistent with each other, even while the tasks
+        are changed by other threads.
+        Time complexity: ``O(k)`` where k is the cost of consuming ``limit + 1``
+        tasks from the iterable object.
+
+        :param tasks: Tasks to take the page from.
+        :param limit: Maximum number of tasks in the page.
+        :return: The tasks in the page, and the cursor of the next page or None if
+        there are no more tasks.
+        """
+        with self._lock.read():
+            page = list(islice(tasks, limit + 1))
+            if len(page) <= limit:
+                return page, None
+
+            del page[limit:]
+            return page, self.get_cursor(page[-1])
+
+    def _snapshot(self, tasks: Callable[[], Iterable[Task]]) -> Iterable[Task]:
+        """Lazily get a snapshot of tasks.
+        If the current thread holds the lock, the tasks are consumed lazily while it
+        is held. Otherwise, they are copied while holding the lock for reading, when
+        the iteration starts.
+
+        :param tasks: Function that returns the tasks to take the snapshot of.
+        :return: The snapshot of the tasks.
+        """
+        if self._lock.is_held():
+            yield from tasks()
+            return
+
+        with self._lock.read():
+            snapshot = list(tasks())
+
+        yield from snapshot
+
+    def _iter_priority(self, priority: Priority,
+                       after: Cursor | None) -> Iterable[Task]:
+        """Lazily get the stored tasks with the given priority that come after the
+        cursor.
+
+        :param priority: Priority of the tasks to get.
+        :param after: Cursor to start after, or None to start from the first task.
+        :return: Stored tasks with the given priority in their insertion order.
+        """
+        if after is None or after.priority > priority:
+            yield from self._tasks[priority].values()
+            return
+
+        if after.priority < priority:
+            return
+
+        order = self._orders[priority]
+        for i in range(bisect_right(order, after.sequence), len(order)):
+            title = self._sequence_titles.get(order[i])
+            if title is not None:
+                yield self._titles[title]
+
+    def _iter_all(self, after: Cursor | None) -> Iterable[Task]:
+        """Lazily get all stored tasks that come after the cursor.
+
+        :param after: Cursor to start after, or None to start from the first task.
+        :return: All stored tasks that are sorted by priority from highest to lowest.
+        """
+        for priority in reversed(Priority):
+            yield from self._iter_priority(priority, after)
+
+    def get_tasks(self, *, priority: Priority,
+                  after: Cursor | None = None) -> Iterable[Task]:
+        """Lazily get tasks that match the given priority
+        Time complexity: ``O(1)`` for calling this function.
+        ``O(n)`` for consuming the returned iterable object, where n is the number of
+        tasks with the priority. Consuming k tasks after the cursor while holding the
+        lock, such as in the paginate method, costs ``O(log n + k)``.
+
         :param priority: Priority of the tasks to get
+        :param after: Cursor to start after, or None to start from the first task.
         :return: Tasks with the given priority.
         """
-        return self._tasks[priority].values()
+        return self._snapshot(
+            lambda: map(self._unpack, self._iter_priority(priority, after))
+        )
 
-    def get_all_tasks(self) -> Iterable[Task]:
+    def get_all_tasks(self, *, after: Cursor | None = None) -> Iterable[Task]:
         """Lazily get all tasks sorted by their priority.
         Time complexity: ``O(1)`` for calling this function.
         ``O(n)`` for consuming the returned iterable object,
-        where n is the number of tasks.
+        where n is the number of tasks. Consuming k tasks after the cursor while
+        holding the lock, such as in the paginate method, costs ``O(log n + k)``.
 
+        :param after: Cursor to start after, or None to start from the first task.
         :return: All tasks that are sorted by priority from highest to lowest.
         """
-        for priority in reversed(Priority):
-            yield from self.get_tasks(priority=priority)
+        return self._snapshot(lambda: map(self._unpack, self._iter_all(after)))
 
-    def search_tasks(self, *, predicate: Callable[[Task], bool]) -> Iterable[Task]:
+    def top(self, n: int, *,
+            order: BucketOrder = BucketOrder.INSERTION) -> Iterable[Task]:
+        """Lazily get the first tasks sorted by their priority.
+        Only the first n tasks are read, so it does not scan the rest of the tasks.
+        Time complexity: ``O(1)`` for calling this function. ``O(n)`` for consuming
+        the returned iterable object in either order, after sorting the titles in
+        ``O(n log n)`` on the first sort by title since they were dropped.
+
+        :param n: Maximum number of tasks to get.
+        :param order: Order to sort the tasks with the same priority in.
+        :return: The first n tasks that are sorted by priority from highest to
+        lowest.
+        :raises ValueError: If n is negative.
+        """
+        if n < 0:
+            raise ValueError("The number of tasks must not be negative.")
+
+        if order is BucketOrder.INSERTION:
+            return self._snapshot(
+                lambda: map(self._unpack, islice(self._iter_all(None), n))
+            )
+
+        def by_title() -> Iterable[Task]:
+            for priority in reversed(Priority):
+                tasks = self._tasks[priority]
+                for title in self._iter_sorted(self._priority_titles[priority]):
+                    yield tasks[title]
+
+        return self._snapshot(lambda: map(self._unpack, islice(by_title(), n)))
+
+    def search_tasks(self, *, predicate: Callable[[Task], bool],
+                     after: Cursor | None = None) -> Iterable[Task]:
         """Lazily search for tasks that satisfy a given predicate.
         Time complexity: ``O(1)`` for calling this function.
         ``O(n)`` for consuming the returned iterable object,
         where n is the number of tasks.
 
         :param predicate: Predicate function to check for each task.
+        :param after: Cursor to start after, or None to start from the first task.
         :return: Tasks that satisfy the predicate.
         """
-        for task in self.get_all_tasks():
-            if predicate(task):
-                yield task
+        def scan() -> Iterable[Task]:
+            self._report_scan("all", len(self._titles))
+            return filter(predicate, map(self._unpack, self._iter_all(after)))
+
+        return self._snapshot(scan)
+
+    def _search_text(self, field: str, keyword: str,
+                     after: Cursor | None) -> Iterable[Task]:
+        """Lazily search for tasks that have the keyword in a text field.
+        The results are cached until a task that has the keyword in the field is
+        changed.
+
+        :param field: Name of the text field to search in.
+        :param keyword: Keyword to search for.
+        :param after: Cursor to start after, or None to start from the first task.
+        :return: Tasks that have the keyword in the field, sorted by priority from
+        highest to lowest.
+        """
+        return map(self._unpack, self._search_stored(field, keyword, after))
+
+    def _search_stored(self, field: str, keyword: str,
+                       after: Cursor | None) -> Iterable[Task]:
+        """Lazily search for the stored tasks that have the keyword in a text field,
+        using the cached results if any.
+
+        :param field: Name of the text field to search in.
+        :param keyword: Keyword to search for.
+        :param after: Cursor to start after, or None to start from the first task.
+        :return: Stored tasks that have the keyword in the field, sorted by priority
+        from highest to lowest.
+        """
+        key = (field, keyword)
+        results = self._search_cache.get(key)
+        if results is None:
+            results = self._search_index(field, keyword)
+            self._search_cache.put(key, results)
+
+        start = (0 if after is None
+                 else bisect_right(results, after.sort_key(), key=self._sort_key))
+        return islice(results, start, None)
+
+    def _estimate_text(self, field: str, keyword: str) -> int:
+        """Estimate the number of stored tasks to scan for searching a text field.
+
+        :param field: Name of the text field to search in.
+        :param keyword: Keyword to search for.
+        :return: The number of the cached results if any, otherwise the number of
+        candidates the index of the field estimates, or the number of all tasks if the
+        index cannot narrow them down.
+        """
+        results = self._search_cache.peek((field, keyword))
+        if results is not None:
+            return len(results)
+
+        self._ensure_text_indexed()
+        index = self._title_index if field == "title" else self._description_index
+        estimate = index.estimate(keyword)
+        return len(self._titles) if estimate is None else estimate
+
+    def _plan(self, query: TaskQuery, after: Cursor | None) -> Iterable[Task]:
+        """Lazily get the stored tasks that match a query, starting from the most
+        selective structure and checking the other filters on each of its tasks.
+
+        :param query: Query to match the tasks against.
+        :param after: Cursor to start after, or None to start from the first task.
+        :return: Stored tasks that match the query, sorted by priority from highest to
+        lowest.
+        """
+        plans: list[tuple[int, str, Callable[[], Iterable[Task]]]] = [
+            (len(self._titles), "all", lambda: self._iter_all(after)),
+        ]
+        if query.priority is not None:
+            plans.append((len(self._tasks[query.priority]), "priority",
+                          lambda: self._iter_priority(query.priority, after)))
+        for field in ("title", "description"):
+            keyword = getattr(query, field)
+            if keyword is not None:
+                plans.append((self._estimate_text(field, keyword), field,
+                              partial(self._search_stored, field, keyword, after)))
+
+        size, name, source = min(plans, key=itemgetter(0))
+        # The text searches report the scans of their candidates by themselves.
+        if name in ("all", "priority"):
+            self._report_scan(name, size)
+        return filter(query.matches, source())
+
+    def search(self, query: TaskQuery, *, order: SortOrder = SortOrder.PRIORITY,
+               limit: int | None = None,
+               after: Cursor | None = None) -> Iterable[Task]:
+        """Lazily search for tasks that match all filters of a query.
+        The search starts from the smallest of the priority bucket, the text search
+        results and all tasks, and checks the other filters on each of its tasks.
+        Time complexity: ``O(1)`` for calling this function.
+        ``O(s)`` for consuming the returned iterable object, where s is the size of
+        the smallest structure, plus ``O(k log k)`` if the results of a text filter
+        are not cached, as in the search_title method. Taking the first j tasks in the
+        priority order, such as in the paginate method, stops after them. Sorting by
+        title keeps only the first ``limit`` tasks, costing ``O(s log limit)``.
+
+        :param query: Query to match the tasks against.
+        :param order: Order to sort the tasks in.
+        :param limit: Maximum number of tasks to get, or None to get all of them.
+        :param after: Cursor to start after, or None to start from the first task.
+        Only supported when sorting by priority.
+        :return: Tasks that match the query.
+        :raises ValueError: If a cursor is given when not sorting by priority.
+        """
+        if order is SortOrder.PRIORITY:
+            return self._snapshot(lambda: map(
+                self._unpack, islice(self._plan(query, after), limit)
+            ))
+
+        if after is not None:
+            raise ValueError("The cursor is only supported when sorting by priority.")
+
+        def by_title() -> Iterable[Task]:
+            tasks = self._plan(query, None)
+            key = attrgetter("title")
+            if limit is None:
+                return map(self._unpack, sorted(tasks, key=key))
+
+            return map(self._unpack, heapq.nsmallest(limit, tasks, key=key))
+
+        return self._snapshot(by_title)
+
+    def search_ranked(self, *, query: str, limit: int = 10,
+                      fuzziness: int = 0) -> list[Task]:
+        """Search for the tasks most relevant to a query in their titles and
+        descriptions.
+        The texts are split into case-folded and stemmed terms, and the tasks that
+        contain any term of the query are ranked with BM25.
+        Time complexity: ``O(p + c log l)`` where p is the number of the occurrences
+        of the terms of the query in the tasks, c is the number of tasks containing
+        any of them and l is the limit, plus ``O(v * m * f)`` for fuzzy matching the
+        v indexed terms of length m with the fuzziness f.
+
+        :param query: Query to search for.
+        :param limit: Maximum number of tasks to get.
+        :param fuzziness: Maximum edit distance between a term of the query and a
+        term of a task to match them, or 0 to match only the same terms.
+        :return: Tasks that contain any term of the query, from the most relevant.
+        :raises ValueError: If the limit is not positive or the fuzziness is
+        negative.
+        """
+        if limit <= 0:
+            raise ValueError("The limit must be positive.")
+        if fuzziness < 0:
+            raise ValueError("The fuzziness must not be negative.")
+
+        with self._lock.read():
+            self._ensure_text_indexed()
+            results = self._full_text_index.search(query, limit=limit,
+                                                   fuzziness=fuzziness)
+            return [self._unpack(self._titles[title]) for title, _ in results]
+
+    def search_prefix(self, *, prefix: str, limit: int = 10) -> list[Task]:
+        """Search for the tasks whose titles start with the prefix.
+        Time complexity: ``O(log n + k)`` where k is the number of the results.
+
+        :param prefix: Prefix of the titles to search for.
+        :param limit: Maximum number of tasks to get.
+        :return: Tasks whose titles start with the prefix, sorted by title.
+        :raises ValueError: If the limit is not positive.
+        """
+        if limit <= 0:
+            raise ValueError("The limit must be positive.")
+
+        with self._lock.read():
+            titles = self._iter_sorted(self._sorted_titles, prefix)
+            return [self._unpack(self._titles[title]) for title in islice(
+                takewhile(lambda title: title.startswith(prefix), titles), limit
+            )]
+
+    def _iter_sorted(self, titles: SortedKeys, start: str = "") -> Iterable[str]:
+        """Lazily iterate sorted titles.
+        It must be called while holding the lock.
+
+        :param titles: The sorted titles to iterate.
+        :param start: Title to start from.
+        :return: The titles not less than the start, sorted.
+        """
+        self._ensure_titles_sorted()
+        return titles.iter_from(start)
+
+    def _search_index(self, field: str, keyword: str) -> list[Task]:
+        """Search for the stored tasks that have the keyword in a text field,
+        scanning only the candidates that the index of the field finds for it.
+
+        :param field: Name of the text field to search in.
+        :param keyword: Keyword to search for.
+        :return: Stored tasks that have the keyword in the field, sorted by priority
+        from highest to lowest.
+        """
+        self._ensure_text_indexed()
+        index = self._title_index if field == "title" else self._description_index
+        titles = index.candidates(keyword)
+        if titles is None:
+            self._report_scan("all", len(self._titles))
+            candidates = self._iter_all(None)
+        else:
+            self._report_scan(field, len(titles))
+            candidates = sorted((self._titles[title] for title in titles),
+                                key=self._sort_key)
+
+        return [task for task in candidates if keyword in getattr(task, field)]
+
+    def _invalidate(self, task: Task) -> None:
+        """Evict the cached search results that may include a task.
+        Time complexity: ``O(s)`` where s is the number of cached search results.
+
+        :param task: The task that is added, deleted, or before or after it is
+        updated.
+        """
+        self._search_cache.evict_if(
+            lambda key: key[1] in getattr(task, key[0])
+        )
+
+    def _prepare_batch(self, size: int) -> None:
+        """Prepare for changing many tasks at once.
+        The search cache is cleared if evicting the results for each task would cost
+        more than computing them again.
+
+        :param size: Number of tasks to change.
+        """
+        if size > self._search_cache.maxsize:
+            self._search_cache.clear()
+
+    def add_scan_listener(self, listener: Callable[[str, int], None]) -> None:
+        """Add a listener that is called whenever a search scans the tasks, with the
+        name of the structure it scans and the number of tasks in it. The name is
+        ``all``, ``priority``, or the field whose text index finds the candidates.
+        It is called while holding the lock, so it must be quick.
+
+        :param listener: The listener to add.
+        """
+        self._scan_listeners.append(listener)
+
+    def _report_scan(self, source: str, size: int) -> None:
+        """Call the scan listeners.
+
+        :param source: Name of the scanned structure.
+        :param size: Number of tasks in the structure.
+        """
+        for listener in self._scan_listeners:
+            listener(source, size)
+
+    def search_cache_info(self) -> CacheInfo:
+        """Get the statistics of the cache of the title and description searches.
+
+        :return: The statistics of the search cache.
+        """
+        return self._search_cache.info()
+
+    def search_title(self, *, keyword: str,
+                     after: Cursor | None = None) -> Iterable[Task]:
+        """Lazily search for tasks that have the keyword in their titles.
+        Time complexity: ``O(1)`` for calling this function.
+        ``O(k log k)`` for consuming the returned iterable object, where k is the
+        number of candidates found by the index, or ``O(n)`` where n is the number of
+        tasks if the keyword is shorter than 3 characters. If the results are cached,
+        consuming j tasks after the cursor while holding the lock, such as in the
+        paginate method, costs ``O(log r + j)`` where r is the number of results.
+
+        :param keyword: Keyword to search for.
+        :param after: Cursor to start after, or None to start from the first task.
+        :return: Tasks that have the keyword in their titles, sorted by priority from
+        highest to lowest.
+        """
+        return self._snapshot(lambda: self._search_text("title", keyword, after))
+
+    def search_description(self, *, keyword: str,
+                           after: Cursor | None = None) -> Iterable[Task]:
+        """Lazily search for tasks that have the keyword in their descriptions.
+        Time complexity: ``O(1)`` for calling this function.
+        ``O(k log k)`` for consuming the returned iterable object, where k is the
+        number of candidates found by the index, or ``O(n)`` where n is the number of
+        tasks if the keyword is shorter than 3 characters. If the results are cached,
+        consuming j tasks after the cursor while holding the lock, such as in the
+        paginate method, costs ``O(log r + j)`` where r is the number of results.
+
+        :param keyword: Keyword to search for.
+        :param after: Cursor to start after, or None to start from the first task.
+        :return: Tasks that have the keyword in their descriptions, sorted by priority
+        from highest to lowest.
+        """
+        return self._snapshot(
+            lambda: self._search_text("description", keyword, after)
+        )
 
     def clear_tasks(self) -> None:
         """Clear all tasks.
         Time complexity: ``O(1)``.
         """
+        with self._lock.write():
+            self._clear()
+
+    def _clear(self) -> None:
+        """Clear all tasks while holding the lock for writing."""
+        self._reset()
+        self._record(Change(operation=Operation.CLEAR))
+
+    def _reset(self) -> None:
+        """Remove all tasks without persisting the change."""
         self._tasks = self._new_task_container()
+        self._titles = {}
+        self._sequences = {}
+        self._sequence_titles = {}
+        self._orders = self._new_order_container()
+        self._title_index.clear()
+        self._description_index.clear()
+        self._full_text_index.clear()
+        self._sorted_titles.clear()
+        self._priority_titles = self._new_sorted_titles_container()
+        self._text_indexed = True
+        self._titles_sorted = True
+        self._search_cache.clear()
+
+    def count_tasks(self, *, priority: Priority) -> int:
+        """Get the number of tasks with the given priority.
+        Time complexity: ``O(1)``.
+
+        :param priority: Priority of the tasks to count.
+        :return: Number of tasks with the priority.
+        """
+        return len(self._tasks[priority])
 
     def __len__(self) -> int:
         """Get the total number of tasks.
@@ -234,4 +1382,4 @@ class TaskManager:
 
         :return: Total number of tasks.
         """
-        return sum(len(tasks) for tasks in self._tasks)
+        return len(self._titles)
@@ -0,0 +1,7 @@
+"""Configuration of the test suites."""
+
+import os
+
+# The tests of the application check the endpoints, not the rate limits shared
+# across them, which the tests of the admission module cover.
+os.environ["TMS_ADMISSION"] = "off"
@@ -0,0 +1,169 @@
+"""Test cases for admission module."""
+
+import asyncio
+
+import pytest
+from starlette import status
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from starlette.types import Message, Receive, Scope, Send
+
+from admission import (
+    AdmissionMiddleware,
+    AdmissionPolicy,
+    Limit,
+    RouteClass,
+    TokenBucket,
+    classify,
+)
+from settings import create_admission_policy
+
+
+def create_client(policy: AdmissionPolicy) -> TestClient:
+    """Create a client of an application that returns the size of the body."""
+    async def handle(request: Request) -> PlainTextResponse:
+        return PlainTextResponse(str(len(await request.body())))
+
+    app = Starlette(routes=[
+        Route("/api/task", handle, methods=["GET", "POST"]),
+        Route("/api/tasks", handle, methods=["GET", "POST"]),
+        Route("/api/tasks/import", handle, methods=["POST"]),
+    ])
+    app.add_middleware(AdmissionMiddleware, policy=policy)
+    return TestClient(app)
+
+
+def test_token_bucket() -> None:
+    """Test the take method of TokenBucket."""
+    bucket = TokenBucket(Limit(rate=2, burst=2), now=0)
+
+    assert bucket.take(0) == 0
+    assert bucket.take(0) == 0
+    assert bucket.take(0) == pytest.approx(0.5)
+    assert bucket.take(0.5) == 0
+    assert bucket.take(10) == 0
+    assert bucket.take(10) == 0
+    assert bucket.take(10) > 0
+
+
+def test_classify() -> None:
+    """Test the classify function."""
+    assert classify("GET", "/api/task") == RouteClass.READ
+    assert classify("PUT", "/api/task") == RouteClass.WRITE
+    assert classify("GET", "/api/tasks") == RouteClass.SCAN
+    assert classify("GET", "/api/search/description") == RouteClass.SCAN
+    assert classify("GET", "/api/search/prefix") == RouteClass.READ
+    assert classify("DELETE", "/api/tasks") == RouteClass.BULK
+    assert classify("GET", "/api/tasks/export") == RouteClass.SCAN
+    assert classify("POST", "/api/tasks/import") == RouteClass.BULK
+    assert classify("GET", "/api/tasks/top") == RouteClass.READ
+    assert classify("GET", "/api/tasks/changes") == RouteClass.READ
+
+
+class TestAdmissionMiddleware:
+    """Test cases for AdmissionMiddleware."""
+
+    def test_rate_limit(self) -> None:
+        """Test that the requests over the rate limits are rejected."""
+        client = create_client(AdmissionPolicy({RouteClass.BULK: Limit(0.1, 2)}))
+
+        for _ in range(2):
+            assert client.post("/api/tasks").status_code == status.HTTP_200_OK
+
+        response = client.post("/api/tasks")
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response.headers["Retry-After"] == "10"
+        assert "detail" in response.json()
+
+        for _ in range(10):
+            assert client.get("/api/task").status_code == status.HTTP_200_OK
+
+    def test_max_scans(self) -> None:
+        """Test that the scans over the concurrency cap are shed."""
+        scan = asyncio.Event()
+
+        async def app(scope: Scope, receive: Receive, send: Send) -> None:
+            await scan.wait()
+            await PlainTextResponse("")(scope, receive, send)
+
+        async def receive() -> Message:
+            return {"type": "http.request", "body": b""}
+
+        async def request(method: str, path: str) -> int:
+            statuses = []
+
+            async def send(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+
+            scope = {"type": "http", "method": method, "path": path, "headers": []}
+            await middleware(scope, receive, send)
+            return statuses[0]
+
+        async def run() -> None:
+            running = asyncio.create_task(request("GET", "/api/tasks"))
+            await asyncio.sleep(0)
+
+            assert await request("GET", "/api/search") == (
+                status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+            scan.set()
+            assert await running == status.HTTP_200_OK
+            assert await request("GET", "/api/search") == status.HTTP_200_OK
+
+        middleware = AdmissionMiddleware(app, AdmissionPolicy({}, max_scans=1))
+        asyncio.run(run())
+
+    def test_max_bulk_body(self) -> None:
+        """Test that the bodies of the bulk changes over the cap are rejected."""
+        client = create_client(AdmissionPolicy({}, max_bulk_body=4))
+
+        assert client.post("/api/tasks", content=b"1234").text == "4"
+        assert client.post("/api/task", content=b"12345").text == "5"
+
+        response = client.post("/api/tasks", content=b"12345")
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+        response = client.post("/api/tasks", content=iter([b"123", b"45"]))
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    def test_max_import_body(self) -> None:
+        """Test that the imports have a separate cap on their bodies."""
+        client = create_client(AdmissionPolicy({}, max_bulk_body=4))
+        assert client.post("/api/tasks/import", content=b"123456").text == "6"
+
+        client = create_client(AdmissionPolicy({}, max_bulk_body=4,
+                                               max_import_body=5))
+        assert client.post("/api/tasks/import", content=b"12345").text == "5"
+        response = client.post("/api/tasks/import", content=b"123456")
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+
+
+def test_create_admission_policy(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the create_admission_policy function."""
+    monkeypatch.setenv("TMS_ADMISSION", "off")
+    assert create_admission_policy() is None
+
+    monkeypatch.delenv("TMS_ADMISSION")
+    monkeypatch.setenv("TMS_RATE_LIMIT_SCAN", "off")
+    monkeypatch.setenv("TMS_RATE_LIMIT_BULK", "2/4")
+    monkeypatch.setenv("TMS_MAX_SCANS", "0")
+    policy = create_admission_policy()
+    assert policy is not None
+    assert RouteClass.SCAN not in policy.limits
+    assert policy.limits[RouteClass.BULK] == Limit(rate=2, burst=4)
+    assert policy.max_scans is None
+    assert policy.max_import_body is None
+
+    max_import_body = 1024
+    monkeypatch.setenv("TMS_MAX_IMPORT_BODY", str(max_import_body))
+    policy = create_admission_policy()
+    assert policy is not None
+    assert policy.max_import_body == max_import_body
+
+if __name__ == "__main__":
+    pytest.main(__file__)
@@ -0,0 +1,145 @@
+"""Test cases for async_task module."""
+
+import asyncio
+from collections.abc import AsyncIterable, Iterable, Iterator
+from pathlib import Path
+
+import pytest
+
+from async_task import BATCH_SIZE, AsyncTaskManager
+from sqlite_task import SQLiteTaskManager
+from task import BucketOrder, Priority, SortOrder, Task, TaskManager, TaskQuery
+from tests import tasks
+
+
+@pytest.fixture(params=["loop", "executor", "sqlite"])
+def manager(request: pytest.FixtureRequest,
+            tmp_path: Path) -> Iterator[AsyncTaskManager]:
+    """Create an asynchronous task manager running on the event loop, or in an
+    executor over an in-memory or SQLite task manager.
+    """
+    match request.param:
+        case "loop":
+            manager = AsyncTaskManager(TaskManager())
+        case "executor":
+            manager = AsyncTaskManager(TaskManager(), max_workers=2)
+        case _:
+            manager = AsyncTaskManager(SQLiteTaskManager(tmp_path / "tasks.db"),
+                                       max_workers=2)
+    yield manager
+
+    manager.close()
+
+
+async def collect(tasks: Iterable[Task] | AsyncIterable[Task]) -> list[Task]:
+    """Collect the tasks of a page, which may arrive asynchronously.
+
+    :param tasks: The tasks of the page.
+    :return: The tasks.
+    """
+    if isinstance(tasks, AsyncIterable):
+        return [task async for task in tasks]
+
+    return list(tasks)
+
+
+class TestAsyncTaskManager:
+    """Test cases for AsyncTaskManager."""
+
+    def test_init(self) -> None:
+        """Test the __init__ method."""
+        with pytest.raises(ValueError, match="max_workers"):
+            AsyncTaskManager(TaskManager(), max_workers=0)
+
+    def test_changes(self, manager: AsyncTaskManager) -> None:
+        """Test the methods that change the tasks."""
+        async def run() -> None:
+            await manager.add_tasks(tasks)
+            new_task = Task(title="Task 7", description="", priority=Priority.LOW)
+            await manager.add_task(new_task)
+            assert await manager.get_task(title=new_task.title) == new_task
+
+            with pytest.raises(ValueError, match="exists"):
+                await manager.add_task(new_task)
+
+            updated_task = tasks[0].model_copy(update={"description": "New"})
+            await manager.update_task(updated_task)
+            assert await manager.update_tasks([tasks[0]]) == [updated_task]
+            assert await manager.delete_task(new_task.title) == new_task
+            assert await manager.delete_tasks([tasks[0].title]) == [tasks[0]]
+            assert len(manager.manager) == len(tasks) - 1
+
+            await manager.clear_tasks()
+            assert len(manager.manager) == 0
+            assert manager.feed.version > 0
+
+        asyncio.run(run())
+
+    def test_pages(self, manager: AsyncTaskManager) -> None:
+        """Test the methods that get pages of tasks."""
+        reference = TaskManager()
+        reference.add_tasks(tasks)
+
+        async def run() -> None:
+            await manager.add_tasks(tasks)
+
+            page = await manager.get_all_tasks()
+            assert await collect(page.tasks) == list(reference.get_all_tasks())
+            assert page.cursor is None
+
+            page = await manager.get_all_tasks(limit=2)
+            assert await collect(page.tasks) == list(reference.get_all_tasks())[:2]
+            page = await manager.get_all_tasks(after=page.cursor)
+            assert await collect(page.tasks) == list(reference.get_all_tasks())[2:]
+
+            page = await manager.get_tasks(priority=Priority.LOW, limit=1)
+            assert await collect(page.tasks) == [tasks[0]]
+            assert page.cursor is not None
+
+            page = await manager.search_title(keyword="Task 2")
+            assert await collect(page.tasks) == [tasks[1]]
+            page = await manager.search_description(keyword="Desc", limit=1)
+            assert await collect(page.tasks) == [tasks[2]]
+
+            query = TaskQuery(description="Desc")
+            page = await manager.search(query, order=SortOrder.TITLE, limit=2)
+            assert await collect(page.tasks) == [tasks[0], tasks[1]]
+            assert page.cursor is None
+
+            with pytest.raises(ValueError, match="cursor"):
+                await manager.search(query, order=SortOrder.TITLE,
+                                     after=manager.manager.get_cursor(tasks[0]))
+
+            ranked = await manager.search_ranked(query="description 2", limit=1)
+            assert ranked == [tasks[1]]
+            assert await manager.search_prefix(prefix="Task", limit=1) == [tasks[0]]
+
+            await manager.clear_tasks()
+            await manager.load_tasks(tasks[:1])
+            assert await manager.get_task(title=tasks[0].title) == tasks[0]
+            await manager.load_tasks(tasks[1:])
+
+            page = await manager.top(2, order=BucketOrder.TITLE)
+            assert await collect(page.tasks) == [tasks[2], tasks[4]]
+            assert page.cursor is None
+
+        asyncio.run(run())
+
+    def test_batches(self, manager: AsyncTaskManager) -> None:
+        """Test getting more tasks than a batch without a limit."""
+        many = [Task(title=f"Task {i:05}", description="", priority=Priority.LOW)
+                for i in range(2 * BATCH_SIZE + 1)]
+
+        async def run() -> None:
+            await manager.add_tasks(many)
+            page = await manager.get_all_tasks()
+            assert await collect(page.tasks) == many
+            assert isinstance(page.tasks, AsyncIterable) == (
+                manager._executor is not None  # noqa: SLF001
+            )
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    pytest.main(__file__)
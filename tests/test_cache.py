@@ -0,0 +1,70 @@
+"""Test cases for cache module."""
+
+import pytest
+
+from cache import CacheInfo, LRUCache
+
+
+class TestLRUCache:
+    """Test cases for LRUCache."""
+
+    def test_init(self) -> None:
+        """Test the __init__ method."""
+        with pytest.raises(ValueError, match="positive"):
+            LRUCache(0)
+
+    def test_get(self) -> None:
+        """Test the get and put methods."""
+        cache = LRUCache[str, int](2)
+        assert cache.get("a") is None
+
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3  # noqa: PLR2004
+
+    def test_peek(self) -> None:
+        """Test the peek method."""
+        cache = LRUCache[str, int](2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.peek("a") == 1
+        assert cache.peek("c") is None
+
+        cache.put("c", 3)
+        assert cache.peek("a") is None
+        assert cache.info() == CacheInfo(hits=0, misses=0, maxsize=2, currsize=2)
+
+    def test_evict_if(self) -> None:
+        """Test the evict_if method."""
+        cache = LRUCache[str, int]()
+        for key in ["a", "ab", "b"]:
+            cache.put(key, 0)
+
+        cache.evict_if(lambda key: "a" in key)
+        assert cache.get("a") is None
+        assert cache.get("ab") is None
+        assert cache.get("b") == 0
+
+    def test_clear(self) -> None:
+        """Test the clear method."""
+        cache = LRUCache[str, int]()
+        cache.put("a", 1)
+        cache.clear()
+        assert cache.get("a") is None
+
+    def test_info(self) -> None:
+        """Test the info method."""
+        cache = LRUCache[str, int](2)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("b")
+        assert cache.info() == CacheInfo(hits=1, misses=1, maxsize=2, currsize=1)
+
+
+if __name__ == "__main__":
+    pytest.main(__file__)
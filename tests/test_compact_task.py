@@ -0,0 +1,89 @@
+"""Test cases for compact_task module."""
+
+from pathlib import Path
+
+import pytest
+
+from compact_task import CompactTaskManager, TaskRecord
+from storage import LogStorage
+from task import Priority, Task, TaskManager
+from tests import tasks
+
+
+@pytest.fixture
+def manager() -> CompactTaskManager:
+    """Create a compact task manager with the tasks."""
+    manager = CompactTaskManager()
+    manager.add_tasks(tasks)
+    return manager
+
+
+@pytest.fixture
+def reference() -> TaskManager:
+    """Create a task manager with the tasks."""
+    manager = TaskManager()
+    manager.add_tasks(tasks)
+    return manager
+
+
+class TestCompactTaskManager:
+    """Test cases for CompactTaskManager."""
+
+    def test_records(self, manager: CompactTaskManager) -> None:
+        """Test that the tasks are stored as records, but read as tasks."""
+        assert all(isinstance(record, TaskRecord)
+                   for record in manager._titles.values())  # noqa: SLF001
+
+        task = manager.get_task(title=tasks[0].title)
+        assert isinstance(task, Task)
+        assert task.model_dump() == tasks[0].model_dump()
+
+    def test_read(self, manager: CompactTaskManager,
+                  reference: TaskManager) -> None:
+        """Test reading the tasks in the same order as TaskManager."""
+        assert [t.model_dump() for t in manager.get_all_tasks()] == [
+            t.model_dump() for t in reference.get_all_tasks()
+        ]
+
+        after = reference.get_cursor(tasks[4])
+        assert list(manager.get_all_tasks(after=after)) == list(
+            reference.get_all_tasks(after=after)
+        )
+        assert list(manager.get_tasks(priority=Priority.LOW)) == list(
+            reference.get_tasks(priority=Priority.LOW)
+        )
+        assert list(manager.search_title(keyword="Task")) == list(
+            reference.search_title(keyword="Task")
+        )
+        assert list(manager.search_description(keyword="Description 3")) == [
+            tasks[2]
+        ]
+
+    def test_change(self, manager: CompactTaskManager,
+                    reference: TaskManager) -> None:
+        """Test changing the tasks as TaskManager does."""
+        updated_task = tasks[0].model_copy(update={"priority": Priority.HIGH,
+                                                   "description": "New"})
+        for task_manager in [manager, reference]:
+            task_manager.update_task(updated_task)
+            task_manager.delete_task(tasks[1].title)
+
+        assert list(manager.get_all_tasks()) == list(reference.get_all_tasks())
+        assert manager.get_task(title=updated_task.title).description == "New"
+        assert manager.delete_task(tasks[2].title).model_dump() == (
+            tasks[2].model_dump()
+        )
+
+    def test_restore(self, tmp_path: Path) -> None:
+        """Test restoring the tasks from a storage."""
+        manager = CompactTaskManager(LogStorage(tmp_path))
+        manager.add_tasks(tasks)
+        manager.close()
+
+        restored = CompactTaskManager(LogStorage(tmp_path))
+        assert list(restored.get_all_tasks()) == list(manager.get_all_tasks())
+        assert list(restored.search_title(keyword=tasks[0].title)) == [tasks[0]]
+
+
+if __name__ == "__main__":
+    pytest.main(__file__)
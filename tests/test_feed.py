@@ -0,0 +1,138 @@
+"""Test cases for feed module."""
+
+import threading
+
+import pytest
+
+from feed import ChangeFeed
+from task import Change, Operation
+from tests import tasks
+
+
+class TestChangeFeed:
+    """Test cases for ChangeFeed."""
+
+    def test_init(self) -> None:
+        """Test the __init__ method."""
+        with pytest.raises(ValueError, match="positive"):
+            ChangeFeed(0)
+
+    def test_publish(self) -> None:
+        """Test the publish method."""
+        feed = ChangeFeed()
+        assert feed.version == 0
+
+        change = Change(operation=Operation.CLEAR)
+        assert feed.publish(change) == 1
+        assert feed.publish(change) == 2  # noqa: PLR2004
+        assert feed.version == 2  # noqa: PLR2004
+
+    def test_get_changes(self) -> None:
+        """Test the get_changes method."""
+        history = 3
+        feed = ChangeFeed(history)
+        changes = [Change(operation=Operation.ADD, task=task) for task in tasks]
+
+        assert feed.get_changes(since=0) == []
+        for change in changes:
+            feed.publish(change)
+
+        assert feed.get_changes(since=len(changes)) == []
+        assert feed.get_changes(since=len(changes) - history) == [
+            (version, changes[version - 1])
+            for version in range(len(changes) - history + 1, len(changes) + 1)
+        ]
+
+        with pytest.raises(ValueError, match="no longer kept"):
+            feed.get_changes(since=len(changes) - history - 1)
+
+        with pytest.raises(ValueError, match="newer"):
+            feed.get_changes(since=len(changes) + 1)
+
+    def test_history_size(self) -> None:
+        """Test that the history is capped by the number of tasks the changes
+        carry.
+        """
+        feed = ChangeFeed(len(tasks))
+        single = Change(operation=Operation.ADD, task=tasks[0])
+        feed.publish(single)
+        bulk = Change(operation=Operation.ADD_ALL, tasks=tasks)
+        feed.publish(bulk)
+
+        with pytest.raises(ValueError, match="no longer kept"):
+            feed.get_changes(since=0)
+        assert feed.get_changes(since=1) == [(2, bulk)]
+
+        feed.publish(Change(operation=Operation.ADD_ALL, tasks=tasks * 2))
+        with pytest.raises(ValueError, match="no longer kept"):
+            feed.get_changes(since=2)
+        feed.publish(single)
+        assert feed.get_changes(since=3) == [(4, single)]
+
+    def test_wait_for(self) -> None:
+        """Test the wait_for method."""
+        feed = ChangeFeed()
+        assert feed.wait_for(0, 0)
+        assert not feed.wait_for(1, 0)
+
+        timer = threading.Timer(0.05, feed.publish,
+                                [Change(operation=Operation.CLEAR)])
+        timer.start()
+        assert feed.wait_for(1, 5)
+        timer.join()
+
+    def test_reset(self) -> None:
+        """Test the reset method."""
+        feed = ChangeFeed()
+        calls = []
+        feed.add_listener(lambda: calls.append(feed.version))
+        feed.publish(Change(operation=Operation.CLEAR))
+
+        feed.reset(10)
+        assert feed.version == 10  # noqa: PLR2004
+        assert calls == [1, 10]
+        assert feed.get_changes(since=10) == []
+        with pytest.raises(ValueError, match="no longer kept"):
+            feed.get_changes(since=1)
+
+        assert feed.publish(Change(operation=Operation.CLEAR)) == 11  # noqa: PLR2004
+
+    def test_epoch(self) -> None:
+        """Test that the versions are qualified by the epoch of the feed."""
+        feed = ChangeFeed()
+        epoch = feed.epoch
+        assert epoch != ChangeFeed().epoch
+        assert feed.position == (epoch, 0)
+
+        feed.publish(Change(operation=Operation.CLEAR))
+        assert len(feed.get_changes(since=0, epoch=epoch)) == 1
+        with pytest.raises(ValueError, match="Epoch"):
+            feed.get_changes(since=0, epoch="other")
+
+        feed.reset(5)
+        assert feed.epoch == epoch
+        feed.reset(0, "other")
+        assert feed.position == ("other", 0)
+        with pytest.raises(ValueError, match="Epoch"):
+            feed.get_changes(since=0, epoch=epoch)
+
+    def test_listeners(self) -> None:
+        """Test the add_listener and remove_listener methods."""
+        feed = ChangeFeed()
+        calls = []
+
+        def listener() -> None:
+            calls.append(feed.version)
+
+        feed.add_listener(listener)
+        feed.publish(Change(operation=Operation.CLEAR))
+        feed.remove_listener(listener)
+        feed.publish(Change(operation=Operation.CLEAR))
+        assert calls == [1]
+
+        with pytest.raises(ValueError):  # noqa: PT011
+            feed.remove_listener(listener)
+
+
+if __name__ == "__main__":
+    pytest.main(__file__)
@@ -0,0 +1,245 @@
+"""Test cases for index module."""
+
+import pytest
+
+from index import (
+    FullTextIndex,
+    NGramIndex,
+    SortedKeys,
+    edit_distance,
+    stem,
+    tokenize,
+)
+
+
+def test_stem() -> None:
+    """Test the stem function."""
+    assert stem("tasks") == "task"
+    assert stem("stories") == "story"
+    assert stem("running") == "run"
+    assert stem("falling") == "fall"
+    assert stem("fixed") == "fix"
+    assert stem("class") == "class"
+    assert stem("is") == "is"
+
+
+def test_tokenize() -> None:
+    """Test the tokenize function."""
+    assert tokenize("Fix the FAILING tests, quickly!") == [
+        "fix", "the", "fail", "test", "quick",
+    ]
+    assert tokenize("") == []
+
+
+@pytest.mark.parametrize(("source", "target", "max_distance", "distance"), [
+    ("task", "task", 2, 0),
+    ("task", "tusk", 2, 1),
+    ("kitten", "sitting", 3, 3),
+    ("kitten", "sitting", 2, 3),
+    ("a", "abcd", 1, 2),
+    ("", "ab", 2, 2),
+])
+def test_edit_distance(source: str, target: str, max_distance: int,
+                       distance: int) -> None:
+    """Test the edit_distance function."""
+    assert edit_distance(source, target, max_distance) == distance
+
+
+class TestNGramIndex:
+    """Test cases for NGramIndex."""
+
+    def test_init(self) -> None:
+        """Test the __init__ method."""
+        with pytest.raises(ValueError, match="positive"):
+            NGramIndex(0)
+
+    def test_add(self) -> None:
+        """Test the add method."""
+        index = NGramIndex()
+        index.add("a", "hello")
+        index.add("b", "yellow")
+
+        assert index.candidates("ell") == {"a", "b"}
+        assert index.candidates("hell") == {"a"}
+        assert index.candidates("world") == set()
+
+    def test_remove(self) -> None:
+        """Test the remove method."""
+        index = NGramIndex()
+        index.add("a", "hello")
+        index.add("b", "yellow")
+
+        index.remove("a", "hello")
+        assert index.candidates("ell") == {"b"}
+        assert index.candidates("hel") == set()
+
+        index.remove("a", "hello")
+        assert index.candidates("ell") == {"b"}
+
+    def test_compact(self) -> None:
+        """Test that the removed texts are dropped from the posting lists."""
+        index = NGramIndex()
+        for i in range(10):
+            index.add(str(i), f"text {i}")
+        for i in range(8):
+            index.remove(str(i), f"text {i}")
+
+        assert index.candidates("text") == {"8", "9"}
+        estimate = index.estimate("text")
+        assert estimate is not None
+        assert 2 <= estimate < 10  # noqa: PLR2004
+        index.add("0", "text 0")
+        index.add("9", "other")
+        assert index.candidates("text") == {"0", "8"}
+
+    def test_candidates(self) -> None:
+        """Test the candidates method."""
+        index = NGramIndex()
+        index.add("a", "abcabd")
+
+        assert index.candidates("ab") is None
+        assert index.candidates("") is None
+        assert index.candidates("abd") == {"a"}
+        assert index.candidates("cabd") == {"a"}
+        assert index.candidates("abcd") == set()
+
+    def test_estimate(self) -> None:
+        """Test the estimate method."""
+        index = NGramIndex()
+        index.add("a", "abcabd")
+        index.add("b", "abcd")
+
+        assert index.estimate("ab") is None
+        assert index.estimate("abc") == 2  # noqa: PLR2004
+        assert index.estimate("abca") == 1
+        assert index.estimate("xyz") == 0
+
+    def test_clear(self) -> None:
+        """Test the clear method."""
+        index = NGramIndex()
+        index.add("a", "hello")
+
+        index.clear()
+        assert index.candidates("hello") == set()
+
+
+
+class TestFullTextIndex:
+    """Test cases for FullTextIndex."""
+
+    @pytest.fixture
+    def index(self) -> FullTextIndex:
+        """Create an index of a few texts."""
+        index = FullTextIndex()
+        index.add("a", "Fix the login bug")
+        index.add("b", "Write the docs of the login page")
+        index.add("c", "Bugs, bugs and more bugs")
+        return index
+
+    def test_search(self, index: FullTextIndex) -> None:
+        """Test the search method."""
+        assert [key for key, _ in index.search("bug", limit=10)] == ["c", "a"]
+        assert [key for key, _ in index.search("LOGIN bugs", limit=1)] == ["a"]
+        assert index.search("missing", limit=10) == []
+        assert index.search("", limit=10) == []
+
+        scores = [score for _, score in index.search("the login", limit=10)]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_search_fuzzy(self, index: FullTextIndex) -> None:
+        """Test the search method with fuzzy matching."""
+        assert index.search("logn", limit=10) == []
+        assert [key for key, _ in index.search("logn", limit=10, fuzziness=1)] == [
+            "a", "b",
+        ]
+
+        exact, = index.search("docs", limit=10, fuzziness=1)
+        fuzzy, = index.search("dogs", limit=10, fuzziness=1)
+        assert exact[1] > fuzzy[1]
+
+    def test_remove(self, index: FullTextIndex) -> None:
+        """Test the remove method."""
+        index.remove("c", "Bugs, bugs and more bugs")
+        index.remove("c", "Bugs, bugs and more bugs")
+
+        assert [key for key, _ in index.search("bug", limit=10)] == ["a"]
+
+    def test_compact(self, index: FullTextIndex) -> None:
+        """Test that the removed texts are dropped without changing the scores."""
+        reference = FullTextIndex()
+        reference.add("a", "Fix the login bug")
+        index.remove("b", "Write the docs of the login page")
+        index.remove("c", "Bugs, bugs and more bugs")
+        index.add("d", "Bugs in the login")
+        reference.add("d", "Bugs in the login")
+
+        assert index.search("login bug", limit=10) == reference.search(
+            "login bug", limit=10
+        )
+        assert index.search("docs", limit=10) == []
+
+    def test_clear(self, index: FullTextIndex) -> None:
+        """Test the clear method."""
+        index.clear()
+
+        assert index.search("bug", limit=10) == []
+
+
+if __name__ == "__main__":
+    pytest.main(__file__)
+
+
+class TestSortedKeys:
+    """Test cases for SortedKeys."""
+
+    def test_iter_from(self) -> None:
+        """Test the iter_from method."""
+        keys = SortedKeys(load=2)
+        keys.build(["b", "d", "a", "f", "e"])
+
+        assert list(keys.iter_from("")) == ["a", "b", "d", "e", "f"]
+        assert list(keys.iter_from("c")) == ["d", "e", "f"]
+        assert list(keys.iter_from("b")) == ["b", "d", "e", "f"]
+        assert list(keys.iter_from("g")) == []
+
+    def test_add(self) -> None:
+        """Test the add method."""
+        added = ["e", "a", "c", "b", "f", "d"]
+        keys = SortedKeys(load=2)
+        for key in added:
+            keys.add(key)
+
+        assert list(keys.iter_from("")) == ["a", "b", "c", "d", "e", "f"]
+        assert list(keys.iter_from("c")) == ["c", "d", "e", "f"]
+        assert len(keys) == len(added)
+
+    def test_discard(self) -> None:
+        """Test the discard method."""
+        keys = SortedKeys(load=2)
+        keys.build(["a", "b", "c", "d", "e"])
+
+        keys.discard("c")
+        keys.discard("x")
+        keys.discard("bb")
+        assert list(keys.iter_from("")) == ["a", "b", "d", "e"]
+        for key in ["a", "b"]:
+            keys.discard(key)
+        assert list(keys.iter_from("")) == ["d", "e"]
+        keys.add("a")
+        assert list(keys.iter_from("")) == ["a", "d", "e"]
+        assert len(keys) == len("ade")
+
+    def test_invalid_load(self) -> None:
+        """Test creating sorted keys with an invalid load."""
+        with pytest.raises(ValueError, match="load"):
+            SortedKeys(load=0)
+
+    def test_clear(self) -> None:
+        """Test the clear method."""
+        keys = SortedKeys()
+        keys.build(["a"])
+        keys.add("b")
+
+        keys.clear()
+        assert list(keys.iter_from("")) == []
+        assert len(keys) == 0
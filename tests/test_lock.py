@@ -0,0 +1,97 @@
+"""Test cases for lock module."""
+
+import threading
+
+import pytest
+
+from lock import ReadWriteLock
+
+TIMEOUT = 5
+
+
+class TestReadWriteLock:
+    """Test cases for ReadWriteLock."""
+
+    def test_read(self) -> None:
+        """Test the read method."""
+        lock = ReadWriteLock()
+        assert not lock.is_held()
+
+        with lock.read():
+            assert lock.is_held()
+
+            with lock.read():
+                assert lock.is_held()
+
+            assert lock.is_held()
+
+        assert not lock.is_held()
+
+    def test_write(self) -> None:
+        """Test the write method."""
+        lock = ReadWriteLock()
+
+        with lock.write():
+            assert lock.is_held()
+
+            with lock.read():
+                assert lock.is_held()
+
+            with pytest.raises(RuntimeError, match="already held"):  # noqa: SIM117
+                with lock.write():
+                    pass
+
+        assert not lock.is_held()
+
+        with lock.read(), pytest.raises(RuntimeError, match="already held"):  # noqa: SIM117
+            with lock.write():
+                pass
+
+    def test_readers_share(self) -> None:
+        """Test that multiple threads hold the lock for reading together."""
+        lock = ReadWriteLock()
+        barrier = threading.Barrier(2, timeout=TIMEOUT)
+
+        def read() -> None:
+            with lock.read():
+                barrier.wait()
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        read()
+        thread.join()
+
+    def test_writer_excludes(self) -> None:
+        """Test that a writer waits for the readers, and new readers wait for it."""
+        lock = ReadWriteLock()
+        events = []
+        writing = threading.Event()
+
+        def write() -> None:
+            writing.set()
+            with lock.write():
+                events.append("write")
+
+        def read() -> None:
+            with lock.read():
+                events.append("read")
+
+        with lock.read():
+            writer = threading.Thread(target=write)
+            writer.start()
+            writing.wait(TIMEOUT)
+            while not lock._waiting_writers:  # noqa: SLF001
+                pass
+
+            reader = threading.Thread(target=read)
+            reader.start()
+            reader.join(0.1)
+            assert events == []
+
+        writer.join(TIMEOUT)
+        reader.join(TIMEOUT)
+        assert events == ["write", "read"]
+
+
+if __name__ == "__main__":
+    pytest.main(__file__)
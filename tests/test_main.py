@@ -1,15 +1,34 @@
 """Test cases for the main module."""
 
+import asyncio
+import json
+import threading
+from collections.abc import AsyncIterator
+
 import pytest
 from starlette import status
+from starlette.responses import Response, StreamingResponse
 from starlette.testclient import TestClient
 
-from main import app, manager
-from task import Priority
+from async_task import Page
+from main import (
+    NDJSON_MEDIA_TYPE,
+    NEXT_CURSOR_HEADER,
+    VERSION_HEADER,
+    app,
+    encode_changes,
+    format_version,
+    manager,
+    send_page,
+)
+from task import Change, Operation, Priority
 from tests import tasks
+from transfer import MEDIA_TYPE as TRANSFER_MEDIA_TYPE
+from transfer import decode_tasks, encode_tasks
 
 client = TestClient(app)
 ERROR_KEY = "detail"
+NDJSON_HEADERS = {"Accept": NDJSON_MEDIA_TYPE}
 
 @pytest.fixture(autouse=True)
 def fixture() -> None:
@@ -100,11 +119,88 @@ def test_get_all_tasks() -> None:
 
     response = client.get(url)
     assert response.status_code == status.HTTP_200_OK
+    assert response.headers[VERSION_HEADER] == format_version(*manager.feed.position)
     assert len(response.json()) == len(tasks)
     for task in response.json():
         assert task in [t.model_dump() for t in tasks]
 
 
+def test_get_all_tasks_paginated() -> None:
+    """Test the endpoint /api/tasks GET with pagination."""
+    url = "/api/tasks"
+    manager.add_tasks(tasks)
+
+    pages = []
+    params = {"limit": 4}
+    while True:
+        response = client.get(url, params=params)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()) <= params["limit"]
+        pages.extend(response.json())
+
+        if NEXT_CURSOR_HEADER not in response.headers:
+            break
+
+        params["cursor"] = response.headers[NEXT_CURSOR_HEADER]
+
+    assert pages == [task.model_dump() for task in manager.get_all_tasks()]
+
+    response = client.get(url, params={"limit": len(tasks)})
+    assert response.status_code == status.HTTP_200_OK
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+    for params in [{"limit": 0}, {"cursor": "hello"}]:
+        response = client.get(url, params=params)
+        assert response.status_code in {status.HTTP_400_BAD_REQUEST,
+                                        status.HTTP_422_UNPROCESSABLE_ENTITY}
+        assert ERROR_KEY in response.json()
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_send_page_async(stream: bool) -> None:  # noqa: FBT001
+    """Test sending a page of tasks that arrive asynchronously."""
+    async def generate() -> AsyncIterator:
+        for task in tasks:
+            yield task
+
+    async def send() -> bytes:
+        response = send_page(Page(generate(), None), Response(), stream=stream)
+        assert isinstance(response, StreamingResponse)
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    body = asyncio.run(send())
+    if stream:
+        assert [json.loads(line) for line in body.splitlines()] == [
+            task.model_dump() for task in tasks
+        ]
+    else:
+        assert json.loads(body) == [task.model_dump() for task in tasks]
+
+
+def test_get_all_tasks_streamed() -> None:
+    """Test the endpoint /api/tasks GET with newline-delimited JSON."""
+    url = "/api/tasks"
+
+    response = client.get(url, headers=NDJSON_HEADERS)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"].startswith(NDJSON_MEDIA_TYPE)
+    assert response.text == ""
+
+    manager.add_tasks(tasks)
+
+    response = client.get(url, headers=NDJSON_HEADERS)
+    assert response.status_code == status.HTTP_200_OK
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        task.model_dump() for task in manager.get_all_tasks()
+    ]
+
+    limit = 2
+    response = client.get(url, params={"limit": limit}, headers=NDJSON_HEADERS)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.text.splitlines()) == limit
+    assert NEXT_CURSOR_HEADER in response.headers
+
+
 def test_add_tasks() -> None:
     """Test the endpoint /api/tasks POST."""
     url = "/api/tasks"
@@ -123,6 +219,219 @@ def test_add_tasks() -> None:
     response = client.post(url, json=[task.model_dump() for task in duplicated_tasks])
     assert response.status_code == status.HTTP_409_CONFLICT
     assert ERROR_KEY in response.json()
+    assert len(manager) == 0
+
+    manager.add_task(tasks[1])
+    response = client.post(url, json=[task.model_dump() for task in tasks])
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert tasks[1].title in response.json()[ERROR_KEY]
+    assert len(manager) == 1
+
+
+def test_update_tasks() -> None:
+    """Test the endpoint /api/tasks PUT."""
+    url = "/api/tasks"
+    manager.add_tasks(tasks[:2])
+    updated_tasks = [task.model_copy(update={"description": "New"})
+                     for task in tasks]
+
+    response = client.put(url, json=[task.model_dump() for task in updated_tasks])
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert tasks[2].title in response.json()[ERROR_KEY]
+    assert manager.get_task(title=tasks[0].title).description != "New"
+
+    response = client.put(url,
+                          json=[task.model_dump() for task in updated_tasks[:2]])
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [task.model_dump() for task in tasks[:2]]
+    assert manager.get_task(title=tasks[0].title).description == "New"
+
+
+def test_delete_tasks() -> None:
+    """Test the endpoint /api/tasks DELETE with titles."""
+    url = "/api/tasks"
+    manager.add_tasks(tasks)
+    titles = [task.title for task in tasks[:2]]
+
+    response = client.request("DELETE", url, json=[*titles, "hello"])
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert "hello" in response.json()[ERROR_KEY]
+    assert len(manager) == len(tasks)
+
+    response = client.request("DELETE", url, json=titles)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [task.model_dump() for task in tasks[:2]]
+    assert len(manager) == len(tasks) - len(titles)
+
+
+def test_get_changes() -> None:
+    """Test the endpoint /api/tasks/changes GET."""
+    url = "/api/tasks/changes"
+    epoch, version = manager.feed.position
+    manager.add_task(tasks[0])
+    manager.delete_task(tasks[0].title)
+
+    response = client.get(url, params={"since": format_version(epoch, version)})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers[VERSION_HEADER] == format_version(epoch, version + 2)
+    assert response.json() == [
+        {"version": format_version(epoch, version + 1),
+         "change": {"operation": "add", "task": tasks[0].model_dump()}},
+        {"version": format_version(epoch, version + 2),
+         "change": {"operation": "delete", "title": tasks[0].title}},
+    ]
+
+    response = client.get(url, params={"since": format_version(epoch, version + 3)})
+    assert response.status_code == status.HTTP_410_GONE
+    assert ERROR_KEY in response.json()
+
+    response = client.get(url, params={"since": str(version)})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.parametrize(("url", "params"), [
+    ("/api/task", {"title": tasks[0].title}),
+    ("/api/tasks", {}),
+    ("/api/tasks", {"limit": 1}),
+    ("/api/search/title", {"keyword": tasks[0].title}),
+    ("/api/search/description", {"keyword": tasks[0].description}),
+    ("/api/search/priority", {"priority": tasks[0].priority.name}),
+])
+def test_conditional_get(url: str, params: dict[str, str]) -> None:
+    """Test the conditional GET requests with ETags."""
+    manager.add_tasks(tasks)
+
+    response = client.get(url, params=params)
+    assert response.status_code == status.HTTP_200_OK
+    etag = response.headers["ETag"]
+
+    response = client.get(url, params=params, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    response = client.get(url, params=params,
+                          headers={"If-None-Match": f'"other", W/{etag}'})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    manager.update_task(tasks[0].model_copy(update={"description": "New"}))
+    response = client.get(url, params=params, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+
+
+def test_stream_changes() -> None:
+    """Test the endpoint /api/tasks/events GET."""
+    url = "/api/tasks/events"
+    epoch, version = manager.feed.position
+    newer = format_version(epoch, version + 1)
+
+    response = client.get(url, params={"since": newer})
+    assert response.status_code == status.HTTP_410_GONE
+    assert ERROR_KEY in response.json()
+
+    response = client.get(url, headers={"Last-Event-ID": newer})
+    assert response.status_code == status.HTTP_410_GONE
+
+
+def test_read_own_writes(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test reading with the version given by a change as the minimum version."""
+    monkeypatch.setattr("main.MIN_VERSION_TIMEOUT", 0.05)
+    response = client.post("/api/task", json=tasks[0].model_dump())
+    assert response.status_code == status.HTTP_201_CREATED
+    written = response.headers[VERSION_HEADER]
+    assert written == format_version(*manager.feed.position)
+
+    response = client.get("/api/task", params={"title": tasks[0].title},
+                          headers={"X-Min-Version": written})
+    assert response.status_code == status.HTTP_200_OK
+    response = client.get("/api/tasks", params={"min_version": written})
+    assert response.status_code == status.HTTP_200_OK
+
+    epoch, version = manager.feed.position
+    ahead = format_version(epoch, version + 1)
+    response = client.get("/api/tasks", params={"min_version": ahead})
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    monkeypatch.setattr("main.MIN_VERSION_TIMEOUT", 5)
+    timer = threading.Timer(0.05, manager.add_task, [tasks[1]])
+    timer.start()
+    response = client.get("/api/tasks", headers={"X-Min-Version": ahead})
+    timer.join()
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 2  # noqa: PLR2004
+
+    response = client.get("/api/tasks",
+                          params={"min_version": format_version("other", 100)})
+    assert response.status_code == status.HTTP_200_OK
+    response = client.get("/api/tasks", params={"min_version": "invalid"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.request("DELETE", "/api/tasks", json=[tasks[1].title])
+    assert response.headers[VERSION_HEADER] == format_version(*manager.feed.position)
+
+
+def test_conditional_get_after_restart() -> None:
+    """Test that an ETag of a previous run of the feed does not match, even at the
+    same version.
+    """
+    url = "/api/tasks"
+    response = client.get(url)
+    etag = response.headers["ETag"]
+
+    manager.feed.reset(manager.feed.version, "reloaded")
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+
+
+def test_stream_changes_after_restart() -> None:
+    """Test that resuming the changes of a previous run of the feed resets the
+    client, even if the current run has reached the same version.
+    """
+    url = "/api/tasks/events"
+    epoch, version = manager.feed.position
+    last_event_id = format_version(epoch, version)
+
+    # The feed starts over with another epoch, as when the server restarts.
+    manager.feed.reset(0, "restarted")
+    while manager.feed.version <= version:
+        manager.add_task(tasks[0])
+        manager.delete_task(tasks[0].title)
+
+    response = client.get(url, headers={"Last-Event-ID": last_event_id})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.text == "event: reset\ndata:\n\n"
+
+    response = client.get("/api/tasks/changes", params={"since": last_event_id})
+    assert response.status_code == status.HTTP_410_GONE
+    assert "Epoch" in response.json()[ERROR_KEY]
+
+
+def test_encode_changes() -> None:
+    """Test encoding the changes as server-sent events."""
+    epoch, version = manager.feed.position
+    manager.add_task(tasks[0])
+
+    async def receive() -> list[str]:
+        events = encode_changes(epoch, version)
+        received = [await anext(events)]
+
+        pending = asyncio.create_task(anext(events))
+        await asyncio.sleep(0)
+        manager.delete_task(tasks[0].title)
+        received.append(await pending)
+
+        await events.aclose()
+        return received
+
+    first, second = asyncio.run(receive())
+    assert first.startswith(f"id: {format_version(epoch, version + 1)}\ndata: ")
+    assert Change.model_validate_json(first.split("data: ")[1]) == Change(
+        operation=Operation.ADD, task=tasks[0]
+    )
+    assert second == (f"id: {format_version(epoch, version + 2)}\n"
+                      'data: {"operation":"delete","title":"Task 1"}\n\n')
 
 
 def test_clear_tasks() -> None:
@@ -156,6 +465,20 @@ def test_search_title() -> None:
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()) == 0
 
+    manager.add_tasks(tasks[1:])
+
+    limit = 2
+    response = client.get(url, params={"keyword": "Task", "limit": limit})
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == limit
+
+    response = client.get(url, params={
+        "keyword": "Task", "cursor": response.headers[NEXT_CURSOR_HEADER]
+    })
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == len(tasks) - limit
+    assert NEXT_CURSOR_HEADER not in response.headers
+
 
 def test_search_description() -> None:
     """Test the endpoint /api/search/description GET."""
@@ -174,6 +497,11 @@ def test_search_description() -> None:
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()) == 0
 
+    response = client.get(url, params={"keyword": keyword}, headers=NDJSON_HEADERS)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"].startswith(NDJSON_MEDIA_TYPE)
+    assert json.loads(response.text) == tasks[0].model_dump()
+
 
 def test_search_priority() -> None:
     """Test the endpoint /api/search/priority GET."""
@@ -192,6 +520,174 @@ def test_search_priority() -> None:
     assert len(response.json()) == len(target_tasks)
     assert response.json() == [task.model_dump() for task in target_tasks]
 
+    response = client.get(url, params={"priority": priority.name, "limit": 1})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [target_tasks[0].model_dump()]
+
+    response = client.get(url, params={
+        "priority": priority.name, "cursor": response.headers[NEXT_CURSOR_HEADER]
+    })
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [task.model_dump() for task in target_tasks[1:]]
+
+
+
+def test_search() -> None:
+    """Test the endpoint /api/search GET."""
+    url = "/api/search"
+    manager.add_tasks(tasks)
+
+    response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [task.model_dump() for task in manager.get_all_tasks()]
+
+    params = {"priority": Priority.HIGH.name, "title": "Task", "description": "5"}
+    response = client.get(url, params=params)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [tasks[4].model_dump()]
+
+    response = client.get(url, params={"description": "Desc", "limit": 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [tasks[2].model_dump(), tasks[4].model_dump()]
+
+    response = client.get(url, params={
+        "description": "Desc", "cursor": response.headers[NEXT_CURSOR_HEADER]
+    })
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == len(tasks) - 2
+
+    response = client.get(url, params={"sort": "title", "limit": 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [tasks[0].model_dump(), tasks[1].model_dump()]
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+    cursor = manager.get_cursor(tasks[0]).encode()
+    response = client.get(url, params={"sort": "title", "cursor": cursor})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+
+def test_export_import_tasks() -> None:
+    """Test the endpoints /api/tasks/export and /api/tasks/import."""
+    manager.add_tasks(tasks)
+
+    response = client.get("/api/tasks/export")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"] == TRANSFER_MEDIA_TYPE
+    assert "ETag" in response.headers
+    assert list(decode_tasks([response.content])) == list(manager.get_all_tasks())
+    exported = response.content
+
+    url = "/api/tasks/import"
+    response = client.post(url, content=exported)
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert ERROR_KEY in response.json()
+
+    manager.clear_tasks()
+    response = client.post(url, content=iter([exported[:7], exported[7:]]))
+    assert response.status_code == status.HTTP_201_CREATED
+    assert list(manager.get_all_tasks()) == list(decode_tasks([exported]))
+
+    response = client.post(url, content=exported[:-1])
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "truncated" in response.json()[ERROR_KEY]
+
+
+def test_import_tasks_in_batches(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the endpoint /api/tasks/import with more tasks than a batch."""
+    monkeypatch.setattr("async_task.LOOP_LOAD_SIZE", 2)
+    url = "/api/tasks/import"
+    exported = b"".join(encode_tasks(tasks))
+
+    response = client.post(url, content=exported)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert len(manager) == len(tasks)
+
+    manager.clear_tasks()
+    manager.add_task(tasks[2])
+    response = client.post(url, content=exported)
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert "2 tasks were imported" in response.json()[ERROR_KEY]
+    assert {task.title for task in manager.get_all_tasks()} == {
+        task.title for task in tasks[:3]
+    }
+
+
+def test_top_tasks() -> None:
+    """Test the endpoint /api/tasks/top."""
+    url = "/api/tasks/top"
+    manager.add_tasks(tasks)
+
+    response = client.get(url, params={"n": 2, "order": "title"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [tasks[2].model_dump(), tasks[4].model_dump()]
+    assert "ETag" in response.headers
+
+    response = client.get(url, params={"n": 1},
+                          headers={"Accept": "application/x-ndjson"})
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    assert response.text == tasks[2].model_dump_json() + "\n"
+
+    response = client.get(url, params={"n": 0})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_search_prefix() -> None:
+    """Test the endpoint /api/search/prefix."""
+    url = "/api/search/prefix"
+    manager.add_tasks(tasks)
+
+    response = client.get(url, params={"q": "Task", "limit": 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [tasks[0].model_dump(), tasks[1].model_dump()]
+    assert "ETag" in response.headers
+
+    response = client.get(url, params={"q": "Task 4"})
+    assert response.json() == [tasks[3].model_dump()]
+
+    response = client.get(url, params={"q": "Task", "limit": 0})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+def test_search_ranked() -> None:
+    """Test the endpoint /api/search/ranked."""
+    url = "/api/search/ranked"
+    manager.add_tasks(tasks)
+
+    response = client.get(url, params={"q": "description 3", "limit": 1})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [tasks[2].model_dump()]
+    assert "ETag" in response.headers
+
+    response = client.get(url, params={"q": "descriptio 5", "fuzziness": 1})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0] == tasks[4].model_dump()
+
+    response = client.get(url, params={"q": "task", "fuzziness": 3})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+def test_metrics() -> None:
+    """Test the endpoint /metrics."""
+    manager.add_tasks(tasks)
+    client.get("/api/tasks")
+    client.get("/api/search/title", params={"keyword": "Task 1"})
+
+    response = client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"].startswith("text/plain")
+    assert ('tms_http_request_duration_seconds_count{method="GET",'
+            'route="/api/tasks",status="200"}') in response.text
+    assert 'tms_operation_duration_seconds_count{operation="search_title"}' in (
+        response.text
+    )
+    count = manager.count_tasks(priority=Priority.LOW)
+    assert f'tms_tasks{{priority="LOW"}} {count}' in response.text
+
+
+def test_profiles() -> None:
+    """Test the endpoint /admin/profiles when the profiling is disabled."""
+    response = client.get("/admin/profiles")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert ERROR_KEY in response.json()
 
 if __name__ == "__main__":
     pytest.main(__file__)
@@ -0,0 +1,79 @@
+"""Test cases for metrics module."""
+
+import pytest
+
+from metrics import CallbackMetric, Histogram, Registry, TaskMetrics
+from task import Priority, TaskManager, TaskQuery
+from tests import tasks
+
+
+class TestHistogram:
+    """Test cases for Histogram."""
+
+    def test_collect(self) -> None:
+        """Test the observe and collect methods."""
+        histogram = Histogram("latency", "Latency.", ("route",), [1, 10])
+        histogram.observe(0.5, "/a")
+        histogram.observe(5, "/a")
+        histogram.observe(50, 'say "hi"')
+
+        assert list(histogram.collect()) == [
+            "# HELP latency Latency.",
+            "# TYPE latency histogram",
+            'latency_bucket{route="/a",le="1"} 1',
+            'latency_bucket{route="/a",le="10"} 2',
+            'latency_bucket{route="/a",le="+Inf"} 2',
+            'latency_sum{route="/a"} 5.5',
+            'latency_count{route="/a"} 2',
+            'latency_bucket{route="say \\"hi\\"",le="1"} 0',
+            'latency_bucket{route="say \\"hi\\"",le="10"} 0',
+            'latency_bucket{route="say \\"hi\\"",le="+Inf"} 1',
+            'latency_sum{route="say \\"hi\\""} 50',
+            'latency_count{route="say \\"hi\\""} 1',
+        ]
+
+
+class TestRegistry:
+    """Test cases for Registry."""
+
+    def test_render(self) -> None:
+        """Test the render method."""
+        registry = Registry()
+        registry.register(CallbackMetric("size", "Size.", "gauge", (),
+                                         lambda: [((), 3)]))
+
+        assert registry.render() == "# HELP size Size.\n# TYPE size gauge\nsize 3\n"
+
+
+class TestTaskMetrics:
+    """Test cases for TaskMetrics."""
+
+    def test_instrument(self) -> None:
+        """Test the instrument method."""
+        metrics = TaskMetrics()
+        manager = TaskManager()
+        instrumented = metrics.instrument(manager)
+
+        instrumented.add_tasks(tasks)
+        assert len(instrumented) == len(tasks)
+        assert instrumented.get_task(title=tasks[0].title) == tasks[0]
+        assert instrumented.has_task(tasks[0])
+        with pytest.raises(ValueError, match="already exists"):
+            instrumented.add_task(tasks[0])
+
+        results = instrumented.search(TaskQuery(priority=Priority.HIGH))
+        text = metrics.registry.render()
+        assert 'operation="search"' not in text
+
+        high = list(results)
+        text = metrics.registry.render()
+        assert 'tms_operation_duration_seconds_count{operation="add_task"} 1' in text
+        assert 'tms_operation_duration_seconds_count{operation="search"} 1' in text
+        assert f'tms_search_results_sum{{operation="search"}} {len(high)}' in text
+        assert 'tms_search_scan_size_count{source="priority"} 1' in text
+        assert f'tms_tasks{{priority="HIGH"}} {len(high)}' in text
+        assert "tms_search_cache_hits_total 0" in text
+
+
+if __name__ == "__main__":
+    pytest.main(__file__)
@@ -0,0 +1,73 @@
+"""Test cases for profiling module."""
+
+import pytest
+from starlette import status
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import task
+from profiling import Profiler, ProfilingMiddleware
+from task import TaskManager
+from tests import tasks
+
+
+def create_client(profiler: Profiler) -> TestClient:
+    """Create a client of an application that searches the tasks."""
+    manager = TaskManager()
+    manager.add_tasks(tasks)
+
+    async def search(_: object) -> PlainTextResponse:
+        return PlainTextResponse(str(len(list(manager.search_title(keyword="Task")))))
+
+    app = Starlette(routes=[Route("/search", search), Route("/events", search)])
+    app.add_middleware(ProfilingMiddleware, profiler=profiler, exclude=["/events"])
+    return TestClient(app)
+
+
+class TestProfilingMiddleware:
+    """Test cases for ProfilingMiddleware."""
+
+    def test_profile(self) -> None:
+        """Test that the sampled requests are profiled."""
+        profiler = Profiler(capacity=2, focus=[task.__file__])
+        client = create_client(profiler)
+
+        for _ in range(3):
+            assert client.get("/search", params={"q": "1"}).status_code == (
+                status.HTTP_200_OK
+            )
+        client.get("/events")
+
+        profiles = profiler.get_profiles()
+        assert [profile.id for profile in profiles] == [2, 3]
+        profile = profiler.get_profile(3)
+        assert (profile.method, profile.path, profile.query, profile.status) == (
+            "GET", "/search", "q=1", status.HTTP_200_OK
+        )
+        assert profile.duration > 0
+        assert "search_title" in profile.calls
+        assert "profiling.py" not in profile.allocations
+
+        with pytest.raises(ValueError, match="does not exist"):
+            profiler.get_profile(1)
+
+    def test_threshold(self) -> None:
+        """Test that the profiles of the fast requests are not kept."""
+        profiler = Profiler(threshold=60)
+        create_client(profiler).get("/search")
+
+        assert profiler.get_profiles() == []
+
+    def test_rate(self) -> None:
+        """Test that the requests not sampled are not profiled."""
+        profiler = Profiler(rate=0)
+        create_client(profiler).get("/search")
+
+        assert profiler.get_profiles() == []
+        assert profiler.acquire() is False
+
+
+if __name__ == "__main__":
+    pytest.main(__file__)
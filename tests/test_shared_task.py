@@ -0,0 +1,206 @@
+"""Test cases for shared_task module."""
+
+import socket
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from shared_task import ReplicaTaskManager, TaskServer
+from task import Priority, Task, TaskManager
+from tests import tasks
+
+
+@pytest.fixture
+def writer(tmp_path: Path) -> Iterator[TaskManager]:
+    """Serve a task manager with the tasks from a writer in a thread."""
+    manager = TaskManager()
+    manager.add_tasks(tasks)
+    server = TaskServer(manager, tmp_path / "tasks.sock")
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield manager
+
+    server.close()
+    thread.join()
+
+
+@pytest.fixture
+def replicas(writer: TaskManager, tmp_path: Path) -> Iterator[list[ReplicaTaskManager]]:
+    """Create two replicas of the tasks of the writer."""
+    assert len(writer) == len(tasks)
+    replicas = [ReplicaTaskManager(tmp_path / "tasks.sock") for _ in range(2)]
+    yield replicas
+
+    for replica in replicas:
+        replica.close()
+
+
+def wait_for(replica: ReplicaTaskManager, version: int) -> None:
+    """Wait until a replica includes the change made at a version."""
+    with replica._applied:  # noqa: SLF001
+        assert replica._applied.wait_for(  # noqa: SLF001
+            lambda: replica.feed.version >= version, 5
+        )
+
+
+class TestReplicaTaskManager:
+    """Test cases for ReplicaTaskManager."""
+
+    def test_init(self, writer: TaskManager,
+                  replicas: list[ReplicaTaskManager]) -> None:
+        """Test the __init__ method."""
+        for replica in replicas:
+            assert list(replica.get_all_tasks()) == list(writer.get_all_tasks())
+            assert replica.feed.position == writer.feed.position
+            assert replica.get_cursor(tasks[0]) == writer.get_cursor(tasks[0])
+            assert list(replica.search_title(keyword="Task 1")) == [tasks[0]]
+
+    def test_init_without_writer(self, tmp_path: Path) -> None:
+        """Test the __init__ method without the writer."""
+        with pytest.raises(OSError, match="No such file"):
+            ReplicaTaskManager(tmp_path / "tasks.sock")
+
+    def test_changes(self, writer: TaskManager,
+                     replicas: list[ReplicaTaskManager]) -> None:
+        """Test that the changes are made by the writer and followed by the
+        replicas.
+        """
+        replica, other = replicas
+        new_task = Task(title="Task 7", description="", priority=Priority.HIGH)
+
+        replica.add_task(new_task)
+        assert replica.get_task(title=new_task.title) == new_task
+        assert writer.get_task(title=new_task.title) == new_task
+
+        updated_task = tasks[0].model_copy(update={"priority": Priority.HIGH})
+        assert replica.update_tasks([updated_task]) == [tasks[0]]
+        assert replica.get_task(title=tasks[0].title).priority == Priority.HIGH
+        assert replica.delete_task(new_task.title) == new_task
+        assert replica.delete_tasks([tasks[1].title]) == [tasks[1]]
+
+        wait_for(other, writer.feed.version)
+        for manager in [replica, other]:
+            assert list(manager.get_all_tasks()) == list(writer.get_all_tasks())
+            assert manager.get_cursor(tasks[0]) == writer.get_cursor(tasks[0])
+            assert manager.feed.get_changes(since=1) == (
+                writer.feed.get_changes(since=1)
+            )
+
+        replica.clear_tasks()
+        assert len(replica) == 0
+        assert len(writer) == 0
+
+        replica.load_tasks(tasks)
+        assert list(replica.get_all_tasks()) == list(writer.get_all_tasks())
+
+    def test_errors(self, writer: TaskManager,
+                    replicas: list[ReplicaTaskManager]) -> None:
+        """Test that the changes the writer cannot make raise errors."""
+        replica, _ = replicas
+        version = writer.feed.version
+
+        with pytest.raises(ValueError, match="already exists"):
+            replica.add_tasks([tasks[0]])
+        with pytest.raises(ValueError, match="'hello'"):
+            replica.delete_tasks(["hello"])
+
+        assert writer.feed.version == version
+        assert len(replica) == len(tasks)
+
+    def test_writer_changes(self, writer: TaskManager,
+                            replicas: list[ReplicaTaskManager]) -> None:
+        """Test that the changes made directly by the writer are followed."""
+        writer.delete_task(tasks[0].title)
+
+        for replica in replicas:
+            wait_for(replica, writer.feed.version)
+            assert not replica.has_task(tasks[0])
+
+
+def test_writer_restart(tmp_path: Path) -> None:
+    """Test that a replica continues from the epoch of a restarted writer."""
+    path = tmp_path / "tasks.sock"
+    writers = [TaskManager(), TaskManager()]
+    writers[0].add_tasks(tasks)
+    server = TaskServer(writers[0], path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    replica = ReplicaTaskManager(path)
+    epoch, version = replica.feed.position
+    server.close()
+    thread.join()
+
+    for task in tasks:
+        writers[1].add_task(task)
+    assert writers[1].feed.version > version
+    server = TaskServer(writers[1], path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        with replica._applied:  # noqa: SLF001
+            assert replica._applied.wait_for(  # noqa: SLF001
+                lambda: replica.feed.epoch != epoch, 5
+            )
+        assert replica.feed.position == writers[1].feed.position
+        with pytest.raises(ValueError, match="Epoch"):
+            replica.feed.get_changes(since=version, epoch=epoch)
+    finally:
+        replica.close()
+        server.close()
+        thread.join()
+
+
+def test_writer_dies_mid_snapshot(tmp_path: Path) -> None:
+    """Test that a replica subscribes again after a writer dies in the middle of
+    sending a snapshot.
+    """
+    path = tmp_path / "tasks.sock"
+    writers = [TaskManager(), TaskManager()]
+    writers[1].add_tasks(tasks)
+    server = TaskServer(writers[0], path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    replica = ReplicaTaskManager(path)
+    server.close()
+    thread.join()
+
+    truncated = threading.Event()
+
+    def die_mid_snapshot() -> None:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(str(path))
+            listener.listen()
+            connection, _ = listener.accept()
+            with connection, connection.makefile("rwb") as file:
+                file.readline()
+                file.write(b'{"snapshot":{"tasks":[{"title":"Task')
+                file.flush()
+        path.unlink()
+        truncated.set()
+
+    dying = threading.Thread(target=die_mid_snapshot)
+    dying.start()
+    assert truncated.wait(5)
+    dying.join()
+
+    server = TaskServer(writers[1], path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        with replica._applied:  # noqa: SLF001
+            assert replica._applied.wait_for(  # noqa: SLF001
+                lambda: replica.feed.position == writers[1].feed.position, 5
+            )
+        assert list(replica.get_all_tasks()) == list(writers[1].get_all_tasks())
+        replica.add_task(Task(title="New", description="", priority=Priority.LOW))
+        assert replica.get_task(title="New").title == "New"
+    finally:
+        replica.close()
+        server.close()
+        thread.join()
+
+
+if __name__ == "__main__":
+    pytest.main(__file__)
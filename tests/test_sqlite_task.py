@@ -0,0 +1,401 @@
+"""Test cases for sqlite_task module."""
+
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from sqlite_task import SQLiteTaskManager
+from task import BucketOrder, Priority, SortOrder, Task, TaskManager, TaskQuery
+from tests import tasks
+
+
+@pytest.fixture
+def manager(tmp_path: Path) -> Iterator[SQLiteTaskManager]:
+    """Create a task manager with an empty database."""
+    manager = SQLiteTaskManager(tmp_path / "tasks.db", fetch_size=2)
+    yield manager
+
+    manager.close()
+
+
+@pytest.fixture
+def reference() -> TaskManager:
+    """Create an in-memory task manager with the tasks."""
+    manager = TaskManager()
+    manager.add_tasks(tasks)
+    return manager
+
+
+class TestSQLiteTaskManager:
+    """Test cases for SQLiteTaskManager."""
+
+    def test_add_task(self, manager: SQLiteTaskManager) -> None:
+        """Test the add_task method."""
+        task = tasks[0]
+        assert len(manager) == 0
+
+        manager.add_task(task)
+        assert len(manager) == 1
+        assert manager.has_task(task)
+
+        with pytest.raises(ValueError, match="exists"):
+            manager.add_task(task.model_copy(update={"priority": Priority.HIGH}))
+
+        assert len(manager) == 1
+
+    def test_add_tasks(self, manager: SQLiteTaskManager) -> None:
+        """Test the add_tasks method."""
+        manager.add_tasks([])
+        assert len(manager) == 0
+
+        manager.add_tasks(tasks)
+        assert len(manager) == len(tasks)
+
+        with pytest.raises(ValueError, match="exists"):
+            manager.add_tasks([Task(title="hello", description="",
+                                    priority=Priority.LOW), tasks[0]])
+
+        with pytest.raises(ValueError, match="'Task 1', 'Task 2'"):
+            manager.add_tasks([tasks[0], tasks[1]])
+
+        assert len(manager) == len(tasks)
+        assert list(manager.search_title(keyword="hello")) == []
+
+    def test_load_tasks(self, manager: SQLiteTaskManager) -> None:
+        """Test the load_tasks method."""
+        manager.add_task(tasks[0])
+        manager.load_tasks(tasks[1:])
+        assert len(manager) == len(tasks)
+        assert list(manager.search_title(keyword="Task 2")) == [tasks[1]]
+
+        with pytest.raises(ValueError, match="'Task 1'"):
+            manager.load_tasks([tasks[0]])
+        manager.load_tasks([])
+        assert len(manager) == len(tasks)
+
+    def test_delete_task(self, manager: SQLiteTaskManager) -> None:
+        """Test the delete_task method."""
+        manager.add_tasks(tasks)
+
+        assert manager.delete_task(tasks[0].title) == tasks[0]
+        assert len(manager) == len(tasks) - 1
+        assert list(manager.search_title(keyword=tasks[0].title)) == []
+
+        with pytest.raises(ValueError, match="not exist"):
+            manager.delete_task(tasks[0].title)
+
+    def test_update_task(self, manager: SQLiteTaskManager,
+                         reference: TaskManager) -> None:
+        """Test the update_task method."""
+        manager.add_tasks(tasks)
+
+        for task in [
+            tasks[0].model_copy(update={"description": "New Description"}),
+            tasks[1].model_copy(update={"priority": Priority.HIGH}),
+        ]:
+            manager.update_task(task)
+            reference.update_task(task)
+
+        assert len(manager) == len(tasks)
+        assert list(manager.get_all_tasks()) == list(reference.get_all_tasks())
+        assert manager.get_task(title=tasks[0].title).description == "New Description"
+        assert list(manager.search_description(keyword="New")) == [tasks[0]]
+        assert list(manager.search_description(keyword="Description 1")) == []
+
+        with pytest.raises(ValueError, match="not exist"):
+            manager.update_task(
+                Task(title="hello", description="", priority=Priority.LOW)
+            )
+
+    def test_update_tasks(self, manager: SQLiteTaskManager,
+                          reference: TaskManager) -> None:
+        """Test the update_tasks method."""
+        manager.add_tasks(tasks)
+        updated_tasks = [
+            tasks[0].model_copy(update={"description": "New Description"}),
+            tasks[1].model_copy(update={"priority": Priority.HIGH}),
+        ]
+
+        with pytest.raises(ValueError, match="'hello'"):
+            manager.update_tasks([
+                *updated_tasks,
+                Task(title="hello", description="", priority=Priority.LOW),
+            ])
+        assert list(manager.get_all_tasks()) == list(reference.get_all_tasks())
+
+        assert manager.update_tasks(updated_tasks) == reference.update_tasks(
+            updated_tasks
+        )
+        assert list(manager.get_all_tasks()) == list(reference.get_all_tasks())
+        assert list(manager.search_description(keyword="New")) == [tasks[0]]
+
+    def test_delete_tasks(self, manager: SQLiteTaskManager,
+                          reference: TaskManager) -> None:
+        """Test the delete_tasks method."""
+        manager.add_tasks(tasks)
+        titles = [task.title for task in tasks[:2]]
+
+        with pytest.raises(ValueError, match="'Task 1'"):
+            manager.delete_tasks([*titles, tasks[0].title])
+        assert len(manager) == len(tasks)
+
+        assert manager.delete_tasks(titles) == reference.delete_tasks(titles)
+        assert list(manager.get_all_tasks()) == list(reference.get_all_tasks())
+        assert list(manager.search_title(keyword=tasks[0].title)) == []
+
+    def test_get_task(self, manager: SQLiteTaskManager) -> None:
+        """Test the get_task method."""
+        manager.add_tasks(tasks)
+
+        task = manager.get_task(title=tasks[0].title)
+        assert task == tasks[0]
+        assert task.description == tasks[0].description
+        assert task.priority == tasks[0].priority
+
+        with pytest.raises(ValueError, match="not exist"):
+            manager.get_task(title="hello")
+
+    def test_get_tasks(self, manager: SQLiteTaskManager,
+                       reference: TaskManager) -> None:
+        """Test the get_tasks method."""
+        manager.add_tasks(tasks)
+
+        for priority in Priority:
+            assert (list(manager.get_tasks(priority=priority))
+                    == list(reference.get_tasks(priority=priority)))
+
+            for task in tasks:
+                after = manager.get_cursor(task)
+                assert (list(manager.get_tasks(priority=priority, after=after))
+                        == list(reference.get_tasks(
+                            priority=priority, after=reference.get_cursor(task))))
+
+    def test_get_all_tasks(self, manager: SQLiteTaskManager,
+                           reference: TaskManager) -> None:
+        """Test the get_all_tasks method."""
+        assert list(manager.get_all_tasks()) == []
+
+        manager.add_tasks(tasks)
+        all_tasks = list(manager.get_all_tasks())
+        assert all_tasks == list(reference.get_all_tasks())
+
+        for i, task in enumerate(all_tasks):
+            after = manager.get_cursor(task)
+            assert list(manager.get_all_tasks(after=after)) == all_tasks[i + 1:]
+
+        with pytest.raises(ValueError, match="not exist"):
+            manager.get_cursor(
+                Task(title="hello", description="", priority=Priority.LOW)
+            )
+
+    def test_search_tasks(self, manager: SQLiteTaskManager) -> None:
+        """Test the search_tasks method."""
+        manager.add_tasks(tasks)
+
+        assert list(manager.search_tasks(
+            predicate=lambda t: t.priority == Priority.LOW
+        )) == [task for task in tasks if task.priority == Priority.LOW]
+
+    def test_search_title(self, manager: SQLiteTaskManager,
+                          reference: TaskManager) -> None:
+        """Test the search_title method."""
+        manager.add_tasks(tasks)
+
+        for keyword in ["", "T", "Ta", "task", "Task", "ask 3", "Task 7", '"']:
+            assert (list(manager.search_title(keyword=keyword))
+                    == list(reference.search_title(keyword=keyword)))
+
+        after = manager.get_cursor(tasks[4])
+        for keyword in ["Ta", "Task"]:
+            assert list(manager.search_title(keyword=keyword, after=after)) == [
+                tasks[1], tasks[5], tasks[0], tasks[3]
+            ]
+
+    def test_search_description(self, manager: SQLiteTaskManager,
+                                reference: TaskManager) -> None:
+        """Test the search_description method."""
+        manager.add_tasks(tasks)
+
+        for keyword in ["", "D", "Description", "tion 2", "hello"]:
+            assert (list(manager.search_description(keyword=keyword))
+                    == list(reference.search_description(keyword=keyword)))
+
+    def test_search(self, manager: SQLiteTaskManager,
+                    reference: TaskManager) -> None:
+        """Test the search method."""
+        manager.add_tasks(tasks)
+
+        for query in [
+            TaskQuery(),
+            TaskQuery(priority=Priority.HIGH),
+            TaskQuery(title="Task", description="Desc"),
+            TaskQuery(title="Ta", description="5"),
+            TaskQuery(priority=Priority.LOW, description="Description"),
+        ]:
+            assert list(manager.search(query)) == list(reference.search(query))
+            for limit in [None, 1]:
+                assert (list(manager.search(query, order=SortOrder.TITLE,
+                                            limit=limit))
+                        == list(reference.search(query, order=SortOrder.TITLE,
+                                                 limit=limit)))
+
+            after = manager.get_cursor(tasks[4])
+            assert list(manager.search(query, after=after)) == list(
+                reference.search(query, after=reference.get_cursor(tasks[4]))
+            )
+
+        with pytest.raises(ValueError, match="cursor"):
+            manager.search(TaskQuery(), order=SortOrder.TITLE,
+                           after=manager.get_cursor(tasks[0]))
+
+    def test_top(self, manager: SQLiteTaskManager) -> None:
+        """Test the top method."""
+        manager.add_tasks(tasks)
+        assert list(manager.top(3)) == [tasks[2], tasks[4], tasks[1]]
+        assert list(manager.top(0)) == []
+
+        first = Task(title="A", description="", priority=Priority.HIGH)
+        manager.add_task(first)
+        assert list(manager.top(3)) == [tasks[2], tasks[4], first]
+        assert list(manager.top(3, order=BucketOrder.TITLE)) == [
+            first, tasks[2], tasks[4],
+        ]
+
+        with pytest.raises(ValueError, match="negative"):
+            manager.top(-1)
+
+    def test_search_prefix(self, manager: SQLiteTaskManager) -> None:
+        """Test the search_prefix method."""
+        manager.add_tasks(tasks)
+        assert manager.search_prefix(prefix="Task", limit=2) == tasks[:2]
+        assert manager.search_prefix(prefix="Task 3") == [tasks[2]]
+        assert manager.search_prefix(prefix="task") == []
+        assert manager.search_prefix(prefix="") == tasks
+
+        new_task = Task(title="Tas", description="", priority=Priority.LOW)
+        manager.add_task(new_task)
+        manager.delete_tasks([tasks[0].title, tasks[1].title])
+        manager.add_task(tasks[0])
+        assert manager.search_prefix(prefix="Tas", limit=3) == [
+            new_task, tasks[0], tasks[2],
+        ]
+
+        with pytest.raises(ValueError, match="limit"):
+            manager.search_prefix(prefix="Task", limit=0)
+
+        last = Task(title="Tas\U0010ffff", description="", priority=Priority.LOW)
+        manager.add_task(last)
+        assert manager.search_prefix(prefix="Tas\U0010ffff") == [last]
+
+    def test_search_ranked(self, manager: SQLiteTaskManager) -> None:
+        """Test the search_ranked method."""
+        manager.add_tasks(tasks)
+        manager.update_task(tasks[0].model_copy(update={
+            "description": "Fixing the failing tests",
+        }))
+        manager.delete_task(tasks[1].title)
+
+        assert manager.search_ranked(query="test fails") == [
+            tasks[0].model_copy(update={"description": "Fixing the failing tests"}),
+        ]
+        assert manager.search_ranked(query="description 3 task", limit=1) == [tasks[2]]
+        assert len(manager.search_ranked(query="description", limit=100)) == (
+            len(tasks) - 2
+        )
+        assert manager.search_ranked(query="Task 2") != []
+        assert tasks[1] not in manager.search_ranked(query="Task 2", limit=100)
+        assert manager.search_ranked(query="descriptoin") == []
+        assert manager.search_ranked(query="tsk", fuzziness=1) != []
+
+        with pytest.raises(ValueError, match="limit"):
+            manager.search_ranked(query="task", limit=0)
+        with pytest.raises(ValueError, match="fuzziness"):
+            manager.search_ranked(query="task", fuzziness=-1)
+
+        manager.clear_tasks()
+        assert manager.search_ranked(query="task") == []
+
+    def test_search_ranked_index_built(self, tmp_path: Path) -> None:
+        """Test that the index of the ranked searches is built for the databases
+        created without it.
+        """
+        manager = SQLiteTaskManager(tmp_path / "tasks.db")
+        manager.add_tasks(tasks)
+        with manager._connection() as connection:  # noqa: SLF001
+            connection.executescript(
+                "DROP TABLE tasks_terms_vocab; DROP TABLE tasks_terms;"
+            )
+        manager.close()
+
+        manager = SQLiteTaskManager(tmp_path / "tasks.db")
+        assert manager.search_ranked(query="description 4", limit=1) == [tasks[3]]
+        manager.close()
+
+    def test_count_tasks(self, manager: SQLiteTaskManager,
+                         reference: TaskManager) -> None:
+        """Test the count_tasks method."""
+        manager.add_tasks(tasks)
+
+        for priority in Priority:
+            assert manager.count_tasks(priority=priority) == (
+                reference.count_tasks(priority=priority)
+            )
+
+    def test_clear_tasks(self, manager: SQLiteTaskManager) -> None:
+        """Test the clear_tasks method."""
+        manager.clear_tasks()
+        assert len(manager) == 0
+
+        manager.add_tasks(tasks)
+        manager.clear_tasks()
+        assert len(manager) == 0
+        assert list(manager.search_title(keyword="Task")) == []
+
+    def test_persistence(self, tmp_path: Path) -> None:
+        """Test that the tasks persist across the task managers."""
+        manager = SQLiteTaskManager(tmp_path / "tasks.db")
+        manager.add_tasks(tasks)
+        manager.close()
+
+        manager = SQLiteTaskManager(tmp_path / "tasks.db")
+        assert len(manager) == len(tasks)
+        manager.close()
+
+    def test_feed(self, manager: SQLiteTaskManager,
+                  reference: TaskManager) -> None:
+        """Test the feed property."""
+        manager.add_tasks(tasks)
+        manager.update_tasks([tasks[0]])
+        manager.delete_tasks([tasks[0].title])
+        manager.clear_tasks()
+
+        reference.update_tasks([tasks[0]])
+        reference.delete_tasks([tasks[0].title])
+        reference.clear_tasks()
+        assert manager.feed.get_changes(since=0) == reference.feed.get_changes(
+            since=0
+        )
+
+        with pytest.raises(ValueError, match="not exist"):
+            manager.delete_task(tasks[0].title)
+        assert manager.feed.version == reference.feed.version
+
+    def test_threads(self, manager: SQLiteTaskManager) -> None:
+        """Test using the task manager from multiple threads."""
+        new_tasks = [Task(title=f"Task {i}", description="", priority=Priority(i % 3))
+                     for i in range(100)]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(manager.add_task, new_tasks))
+            results = list(executor.map(
+                lambda t: manager.get_task(title=t.title), new_tasks
+            ))
+
+        assert results == new_tasks
+        assert len(manager) == len(new_tasks)
+
+
+if __name__ == "__main__":
+    pytest.main(__file__)
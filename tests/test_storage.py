@@ -0,0 +1,185 @@
+"""Test cases for storage module."""
+
+import time
+from pathlib import Path
+
+import pytest
+
+from storage import LogStorage
+from task import Change, Operation, Priority, Task, TaskManager
+from tests import tasks
+from transfer import decode_tasks, encode_tasks
+
+
+class TestLogStorage:
+    """Test cases for LogStorage."""
+
+    def test_init(self, tmp_path: Path) -> None:
+        """Test the __init__ method."""
+        with pytest.raises(ValueError, match="positive"):
+            LogStorage(tmp_path, sync_every=0)
+
+        with pytest.raises(ValueError, match="positive"):
+            LogStorage(tmp_path, sync_interval=0)
+
+        with pytest.raises(ValueError, match="positive"):
+            LogStorage(tmp_path, compact_every=0)
+
+        LogStorage(tmp_path / "data")
+        assert (tmp_path / "data").is_dir()
+
+    def test_load(self, tmp_path: Path) -> None:
+        """Test the load method."""
+        assert LogStorage(tmp_path).load() == ([], [])
+
+        manager = TaskManager(LogStorage(tmp_path))
+        manager.add_tasks(tasks)
+        manager.delete_task(tasks[0].title)
+        updated_task = tasks[1].model_copy(update={"priority": Priority.HIGH})
+        manager.update_task(updated_task)
+        manager.close()
+
+        restored = TaskManager(LogStorage(tmp_path))
+        assert list(restored.get_all_tasks()) == list(manager.get_all_tasks())
+        assert restored.get_task(title=updated_task.title) == updated_task
+        assert list(restored.search_title(keyword=tasks[0].title)) == []
+
+        restored.clear_tasks()
+        restored.close()
+        assert len(TaskManager(LogStorage(tmp_path))) == 0
+
+    def test_load_partial_change(self, tmp_path: Path) -> None:
+        """Test the load method with a partially written change."""
+        storage = LogStorage(tmp_path)
+        storage.append(Change(operation=Operation.ADD, task=tasks[0]))
+        storage.close()
+
+        log_path = next(tmp_path.glob("log-*"))
+        with log_path.open("ab") as file:
+            file.write(b'{"operation":"add","ta')
+
+        storage = LogStorage(tmp_path)
+        assert storage.load() == ([], [Change(operation=Operation.ADD, task=tasks[0])])
+        storage.append(Change(operation=Operation.ADD, task=tasks[1]))
+        storage.close()
+
+        assert len(TaskManager(LogStorage(tmp_path))) == len(tasks[:2])
+
+    def test_append(self, tmp_path: Path) -> None:
+        """Test the append method."""
+        storage = LogStorage(tmp_path, sync_every=2)
+        storage.append(Change(operation=Operation.ADD, task=tasks[0]))
+        assert LogStorage(tmp_path).load() == ([], [])
+
+        storage.append(Change(operation=Operation.ADD, task=tasks[1]))
+        assert len(LogStorage(tmp_path).load()[1]) == len(tasks[:2])
+
+        storage.append(Change(operation=Operation.CLEAR))
+        storage.close()
+        assert len(LogStorage(tmp_path).load()[1]) == len(tasks[:3])
+
+    def test_sync_interval(self, tmp_path: Path) -> None:
+        """Test syncing the changes left unsynced after the interval."""
+        storage = LogStorage(tmp_path, sync_every=100, sync_interval=0.05)
+        storage.append(Change(operation=Operation.ADD, task=tasks[0]))
+        storage.append(Change(operation=Operation.ADD, task=tasks[1]))
+        assert LogStorage(tmp_path).load() == ([], [])
+
+        time.sleep(0.5)
+        assert len(LogStorage(tmp_path).load()[1]) == len(tasks[:2])
+
+        storage.append(Change(operation=Operation.CLEAR))
+        storage.close()
+        assert len(LogStorage(tmp_path).load()[1]) == len(tasks[:3])
+
+    def test_add_all(self, tmp_path: Path) -> None:
+        """Test persisting the tasks added at once as a single change."""
+        manager = TaskManager(LogStorage(tmp_path))
+        manager.add_tasks(tasks)
+        manager.close()
+
+        assert LogStorage(tmp_path).load() == (
+            [], [Change(operation=Operation.ADD_ALL, tasks=tasks)]
+        )
+        restored = TaskManager(LogStorage(tmp_path))
+        assert list(restored.get_all_tasks()) == list(manager.get_all_tasks())
+
+        restored.update_tasks([task.model_copy(update={"priority": Priority.HIGH})
+                               for task in tasks[:2]])
+        restored.delete_tasks([task.title for task in tasks[2:4]])
+        restored.close()
+
+        replayed = TaskManager(LogStorage(tmp_path))
+        assert list(replayed.get_all_tasks()) == list(restored.get_all_tasks())
+        assert [task.priority for task in replayed.get_all_tasks()] == [
+            task.priority for task in restored.get_all_tasks()
+        ]
+
+    def test_load_tasks(self, tmp_path: Path) -> None:
+        """Test persisting the tasks loaded at once as a single change."""
+        manager = TaskManager(LogStorage(tmp_path))
+        manager.load_tasks(decode_tasks(encode_tasks(tasks)))
+        manager.close()
+
+        assert LogStorage(tmp_path).load() == (
+            [], [Change(operation=Operation.ADD_ALL, tasks=tasks)]
+        )
+        restored = TaskManager(LogStorage(tmp_path))
+        assert list(restored.get_all_tasks()) == list(manager.get_all_tasks())
+
+    def test_compact(self, tmp_path: Path) -> None:
+        """Test the compact method."""
+        compact_every = 4
+        manager = TaskManager(LogStorage(tmp_path, compact_every=compact_every))
+        for task in tasks:
+            manager.add_task(task)
+        manager.close()
+
+        assert [path.name for path in tmp_path.glob("snapshot-*")] == [
+            "snapshot-1.json"
+        ]
+
+        tasks_in_snapshot, changes = LogStorage(tmp_path).load()
+        assert set(tasks_in_snapshot) == set(tasks[:compact_every])
+        assert len(changes) == len(tasks) - compact_every
+
+        restored = TaskManager(LogStorage(tmp_path, compact_every=compact_every))
+        assert list(restored.get_all_tasks()) == list(manager.get_all_tasks())
+        assert [task.priority for task in restored.get_all_tasks()] == [
+            task.priority for task in manager.get_all_tasks()
+        ]
+
+        for i in range(len(tasks) + 1, 2 * compact_every + 1):
+            restored.add_task(Task(title=f"Task {i}", description="",
+                                   priority=Priority.LOW))
+        restored.close()
+
+        assert [path.name for path in tmp_path.iterdir()] == ["snapshot-2.json"]
+
+
+    def test_rotate(self, tmp_path: Path) -> None:
+        """Test restoring the changes of a rotated log whose snapshot has not been
+        written, and writing it while appending to the new log.
+        """
+        storage = LogStorage(tmp_path)
+        added = [Change(operation=Operation.ADD, task=task) for task in tasks]
+        storage.append(added[0])
+        position = storage.rotate()
+        storage.append(added[1])
+        storage.close()
+
+        storage = LogStorage(tmp_path)
+        assert storage.load() == ([], added[:2])
+        storage.append(added[2])
+        storage.compact(tasks[:1], position)
+        storage.append(added[3])
+        storage.close()
+
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            f"log-{position}.ndjson", f"snapshot-{position}.json",
+        ]
+        assert LogStorage(tmp_path).load() == (tasks[:1], added[1:4])
+
+
+if __name__ == "__main__":
+    pytest.main(__file__)
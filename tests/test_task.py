@@ -1,8 +1,20 @@
 """Test cases for task module."""
 
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
-from task import Priority, Task, TaskManager
+from task import (
+    BucketOrder,
+    Change,
+    Cursor,
+    Operation,
+    Priority,
+    SortOrder,
+    Task,
+    TaskManager,
+    TaskQuery,
+)
 from tests import tasks
 
 
@@ -75,6 +87,36 @@ class TestTask:
         numbers = [1, 2, 3]
         _ = numbers[Priority.LOW]
 
+    def test_json_bytes(self) -> None:
+        """Test the json_bytes property."""
+        task = tasks[0].model_copy()
+        assert task.json_bytes == task.model_dump_json().encode()
+        assert task.json_bytes is task.json_bytes
+
+        updated_task = task.model_copy(update={"priority": Priority.HIGH})
+        assert updated_task.json_bytes == updated_task.model_dump_json().encode()
+        assert task.model_copy().json_bytes is task.json_bytes
+
+class TestCursor:
+    """Test cases for Cursor."""
+
+    def test_sort_key(self) -> None:
+        """Test the sort_key method."""
+        assert (Cursor(Priority.HIGH, 1).sort_key()
+                < Cursor(Priority.LOW, 0).sort_key()
+                < Cursor(Priority.LOW, 1).sort_key())
+
+    def test_decode(self) -> None:
+        """Test the decode method."""
+        cursor = Cursor(Priority.MEDIUM, 42)
+        assert Cursor.decode(cursor.encode()) == cursor
+
+        for invalid_cursor in ["", "hello", cursor.encode()[1:],
+                               Cursor(Priority.LOW, 1).encode().replace("M", "N")]:
+            with pytest.raises(ValueError, match="cursor"):
+                Cursor.decode(invalid_cursor)
+
+
 class TestTaskManager:
     """Test cases for TaskManager."""
 
@@ -91,6 +133,10 @@ class TestTaskManager:
         with pytest.raises(ValueError, match="exists"):
             manager.add_task(task)
 
+        with pytest.raises(ValueError, match="exists"):
+            manager.add_task(task.model_copy(update={"priority": Priority.HIGH}))
+
+        assert len(manager) == 1
 
     def test_add_tasks(self) -> None:
         """Test the add_tasks method."""
@@ -105,6 +151,34 @@ class TestTaskManager:
         with pytest.raises(ValueError, match="exists"):
             manager.add_tasks([tasks[0]])
 
+        new_task = Task(title="hello", description="", priority=Priority.LOW)
+        with pytest.raises(ValueError, match="'Task 1', 'hello', 'Task 2'"):
+            manager.add_tasks([new_task, tasks[0], new_task, tasks[1]])
+
+        assert len(manager) == len(tasks)
+        assert not manager.has_task(new_task)
+
+    def test_load_tasks(self) -> None:
+        """Test the load_tasks method."""
+        manager = TaskManager()
+        manager.add_task(tasks[0])
+        assert list(manager.search_title(keyword="Task")) == [tasks[0]]
+
+        manager.load_tasks(tasks[1:])
+        assert list(manager.get_all_tasks()) == sorted(tasks, reverse=True)
+        assert len(list(manager.search_title(keyword="Task"))) == len(tasks)
+        assert manager.search_ranked(query="description 2")[0] == tasks[1]
+        assert manager.search_prefix(prefix="Task 6") == [tasks[5]]
+
+        new_task = Task(title="hello", description="", priority=Priority.LOW)
+        manager.load_tasks([new_task])
+        assert list(manager.search_title(keyword="hell")) == [new_task]
+
+        with pytest.raises(ValueError, match="'Task 1'"):
+            manager.load_tasks([tasks[0]])
+        manager.load_tasks([])
+        assert len(manager) == len(tasks) + 1
+
     def test_delete_task(self) -> None:
         """Test the delete_task method."""
         manager = TaskManager()
@@ -143,11 +217,53 @@ class TestTaskManager:
             pytest.fail(f"Task with title '{tasks[0].title} title, description "
                         f"'{new_description}` and priority '{new_priority}' not found.")
 
+        assert updated_task in manager.get_tasks(priority=new_priority)
+        assert updated_task not in manager.get_tasks(priority=tasks[0].priority)
+
         with pytest.raises(ValueError, match="not exist"):
             manager.update_task(
                 Task(title="hello", description="", priority=Priority.LOW)
             )
 
+    def test_delete_tasks(self) -> None:
+        """Test the delete_tasks method."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+
+        assert manager.delete_tasks([]) == []
+
+        with pytest.raises(ValueError, match="'Task 1', 'hello'"):
+            manager.delete_tasks([tasks[0].title, tasks[1].title, tasks[0].title,
+                                  "hello"])
+        assert len(manager) == len(tasks)
+
+        assert manager.delete_tasks([tasks[1].title, tasks[0].title]) == [
+            tasks[1], tasks[0]
+        ]
+        assert len(manager) == len(tasks) - 2
+        assert list(manager.search_title(keyword=tasks[0].title)) == []
+
+    def test_update_tasks(self) -> None:
+        """Test the update_tasks method."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+        updated_tasks = [
+            tasks[0].model_copy(update={"description": "New"}),
+            tasks[1].model_copy(update={"priority": Priority.LOW}),
+        ]
+
+        with pytest.raises(ValueError, match="'hello', 'world'"):
+            manager.update_tasks([
+                *updated_tasks,
+                Task(title="hello", description="", priority=Priority.LOW),
+                Task(title="world", description="", priority=Priority.LOW),
+            ])
+        assert list(manager.search_description(keyword="New")) == []
+
+        assert manager.update_tasks(updated_tasks) == tasks[:2]
+        assert list(manager.search_description(keyword="New")) == [updated_tasks[0]]
+        assert list(manager.get_tasks(priority=Priority.LOW))[-1] == updated_tasks[1]
+
     def test_get_task(self) -> None:
         """Test the get_task method."""
         manager = TaskManager()
@@ -158,6 +274,49 @@ class TestTaskManager:
         with pytest.raises(ValueError, match="not exist"):
             manager.get_task(title="hello")
 
+    def test_get_snapshot(self) -> None:
+        """Test the get_snapshot method."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+        manager.delete_task(tasks[0].title)
+
+        snapshot = manager.get_snapshot()
+        assert snapshot.tasks == list(manager.get_all_tasks())
+        assert snapshot.sequences == [
+            manager.get_cursor(task).sequence for task in snapshot.tasks
+        ]
+        assert snapshot.next_sequence == len(tasks)
+        assert snapshot.version == manager.feed.version
+
+    def test_get_cursor(self) -> None:
+        """Test the get_cursor method."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+
+        cursors = [manager.get_cursor(task) for task in manager.get_all_tasks()]
+        assert sorted(cursors, key=Cursor.sort_key) == cursors
+
+        with pytest.raises(ValueError, match="not exist"):
+            manager.get_cursor(
+                Task(title="hello", description="", priority=Priority.LOW)
+            )
+
+    def test_paginate(self) -> None:
+        """Test the paginate method."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+        all_tasks = list(manager.get_all_tasks())
+        limit = 4
+
+        page, cursor = manager.paginate(manager.get_all_tasks(), limit=limit)
+        assert page == all_tasks[:limit]
+        assert cursor == manager.get_cursor(all_tasks[limit - 1])
+
+        page, cursor = manager.paginate(manager.get_all_tasks(after=cursor),
+                                        limit=limit)
+        assert page == all_tasks[limit:]
+        assert cursor is None
+
     def test_get_tasks(self) -> None:
         """Test the get_tasks method."""
         manager = TaskManager()
@@ -167,6 +326,15 @@ class TestTaskManager:
             assert (len(list(manager.get_tasks(priority=priority)))
                     == len(list(filter(lambda t: t.priority == priority, tasks))))
 
+        after = manager.get_cursor(tasks[1])
+        assert list(manager.get_tasks(priority=Priority.HIGH, after=after)) == []
+        assert list(manager.get_tasks(priority=Priority.MEDIUM, after=after)) == [
+            tasks[5]
+        ]
+        assert list(manager.get_tasks(priority=Priority.LOW, after=after)) == [
+            tasks[0], tasks[3]
+        ]
+
     def test_get_all_tasks(self) -> None:
         """Test the get_all_tasks method."""
         manager = TaskManager()
@@ -179,6 +347,36 @@ class TestTaskManager:
 
         assert sorted(all_tasks, reverse=True) == all_tasks
 
+        for i, task in enumerate(all_tasks):
+            after = manager.get_cursor(task)
+            assert list(manager.get_all_tasks(after=after)) == all_tasks[i + 1:]
+
+    def test_get_all_tasks_after_mutations(self) -> None:
+        """Test the get_all_tasks method with a cursor while tasks are mutated."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+        all_tasks = list(manager.get_all_tasks())
+        after = manager.get_cursor(all_tasks[1])
+
+        manager.delete_task(all_tasks[1].title)
+        manager.delete_task(all_tasks[3].title)
+        assert list(manager.get_all_tasks(after=after)) == [
+            all_tasks[2], *all_tasks[4:]
+        ]
+
+        new_task = Task(title="Task 7", description="", priority=Priority.HIGH)
+        manager.add_task(new_task)
+        assert list(manager.get_all_tasks(after=after)) == [
+            new_task, all_tasks[2], *all_tasks[4:]
+        ]
+
+        for task in tasks:
+            if manager.has_task(task):
+                manager.delete_task(task.title)
+
+        manager.add_tasks(tasks)
+        assert list(manager.get_all_tasks(after=after)) == [new_task, *all_tasks]
+
     def test_search_tasks(self) -> None:
         """Test the search_tasks method."""
         manager = TaskManager()
@@ -192,6 +390,273 @@ class TestTaskManager:
             predicate=lambda t: t.priority == Priority.LOW
         ))) == len(list(filter(lambda t: t.priority == Priority.LOW, tasks)))
 
+    def test_search_title(self) -> None:
+        """Test the search_title method."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+
+        for keyword in ["", "T", "Task", "Task 1", "ask 3", "Task 7", "hello"]:
+            assert list(manager.search_title(keyword=keyword)) == list(
+                manager.search_tasks(predicate=lambda t, k=keyword: k in t.title)
+            )
+
+        after = manager.get_cursor(tasks[4])
+        for keyword in ["Ta", "Task"]:
+            assert list(manager.search_title(keyword=keyword, after=after)) == [
+                tasks[1], tasks[5], tasks[0], tasks[3]
+            ]
+
+        manager.delete_task(tasks[0].title)
+        assert list(manager.search_title(keyword=tasks[0].title)) == []
+
+        updated_task = tasks[1].model_copy(update={"priority": Priority.HIGH})
+        manager.update_task(updated_task)
+        assert list(manager.search_title(keyword="Task")) == [
+            tasks[2], tasks[4], updated_task, tasks[5], tasks[3]
+        ]
+
+        manager.clear_tasks()
+        assert list(manager.search_title(keyword="Task")) == []
+
+    def test_search_description(self) -> None:
+        """Test the search_description method."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+
+        for keyword in ["", "D", "Description", "tion 2", "hello"]:
+            assert list(manager.search_description(keyword=keyword)) == list(
+                manager.search_tasks(predicate=lambda t, k=keyword: k in t.description)
+            )
+
+        after = manager.get_cursor(tasks[5])
+        assert list(manager.search_description(keyword="Desc", after=after)) == [
+            tasks[0], tasks[3]
+        ]
+
+        updated_task = tasks[0].model_copy(update={"description": "New"})
+        manager.update_task(updated_task)
+        assert list(manager.search_description(keyword="Description 1")) == []
+        assert list(manager.search_description(keyword="New")) == [updated_task]
+
+        manager.clear_tasks()
+        assert list(manager.search_description(keyword="Description")) == []
+
+    def test_search_cache(self) -> None:
+        """Test caching the results of the title and description searches."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+
+        assert list(manager.search_title(keyword="Task")) == list(
+            manager.get_all_tasks()
+        )
+        assert list(manager.search_description(keyword="Description 1")) == [
+            tasks[0]
+        ]
+        assert manager.search_cache_info().misses == 2  # noqa: PLR2004
+
+        after = manager.get_cursor(tasks[5])
+        assert list(manager.search_title(keyword="Task", after=after)) == list(
+            manager.get_all_tasks(after=after)
+        )
+        assert manager.search_cache_info().hits == 1
+
+        manager.update_task(tasks[1].model_copy(update={"description": "New"}))
+        assert list(manager.search_description(keyword="Description 1")) == [
+            tasks[0]
+        ]
+        assert manager.search_cache_info().hits == 2  # noqa: PLR2004
+
+        manager.update_task(tasks[0].model_copy(update={"priority": Priority.HIGH}))
+        assert list(manager.search_title(keyword="Task"))[2] == tasks[0]
+        assert list(manager.search_description(keyword="Description 1")) == [
+            tasks[0]
+        ]
+        assert manager.search_cache_info().misses == 4  # noqa: PLR2004
+
+        new_task = Task(title="Task 7", description="Description 1",
+                        priority=Priority.LOW)
+        manager.add_task(new_task)
+        assert list(manager.search_description(keyword="Description 1")) == [
+            tasks[0], new_task
+        ]
+
+        manager.delete_task(tasks[0].title)
+        assert list(manager.search_description(keyword="Description 1")) == [
+            new_task
+        ]
+
+        manager.clear_tasks()
+        assert list(manager.search_title(keyword="Task")) == []
+        assert manager.search_cache_info().currsize == 1
+
+    def test_search(self) -> None:
+        """Test the search method."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+
+        for query in [
+            TaskQuery(),
+            TaskQuery(priority=Priority.HIGH),
+            TaskQuery(title="Task"),
+            TaskQuery(title="Ta", description="5"),
+            TaskQuery(priority=Priority.LOW, description="Description"),
+            TaskQuery(priority=Priority.MEDIUM, title="Task 1"),
+        ]:
+            expected = list(manager.search_tasks(predicate=query.matches))
+            assert list(manager.search(query)) == expected
+            assert list(manager.search(query, order=SortOrder.TITLE)) == sorted(
+                expected, key=lambda t: t.title
+            )
+
+            for task in expected:
+                after = manager.get_cursor(task)
+                assert list(manager.search(query, after=after)) == list(
+                    manager.search_tasks(predicate=query.matches, after=after)
+                )
+
+        query = TaskQuery(description="Description")
+        assert list(manager.search(query, limit=2)) == [tasks[2], tasks[4]]
+        assert list(manager.search(query, order=SortOrder.TITLE, limit=2)) == [
+            tasks[0], tasks[1]
+        ]
+
+        with pytest.raises(ValueError, match="cursor"):
+            manager.search(query, order=SortOrder.TITLE,
+                           after=manager.get_cursor(tasks[0]))
+
+    def test_search_plan(self) -> None:
+        """Test that the search starts from the most selective structure."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+
+        list(manager.search(TaskQuery(priority=Priority.HIGH, title="Task")))
+        assert manager.search_cache_info().currsize == 0
+
+        list(manager.search(TaskQuery(priority=Priority.HIGH, title="Task 1")))
+        assert manager.search_cache_info().currsize == 1
+
+    def test_top(self) -> None:
+        """Test the top method."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+        assert list(manager.top(3)) == [tasks[2], tasks[4], tasks[1]]
+        assert list(manager.top(0)) == []
+        assert list(manager.top(100)) == list(manager.get_all_tasks())
+
+        first = Task(title="A", description="", priority=Priority.HIGH)
+        manager.add_task(first)
+        assert list(manager.top(3)) == [tasks[2], tasks[4], first]
+        assert list(manager.top(3, order=BucketOrder.TITLE)) == [
+            first, tasks[2], tasks[4],
+        ]
+
+        manager.delete_task(tasks[2].title)
+        manager.update_task(tasks[0].model_copy(update={"priority": Priority.HIGH}))
+        assert list(manager.top(4, order=BucketOrder.TITLE)) == [
+            first, tasks[0].model_copy(update={"priority": Priority.HIGH}), tasks[4],
+            tasks[1],
+        ]
+
+        with pytest.raises(ValueError, match="negative"):
+            manager.top(-1)
+
+        manager.clear_tasks()
+        assert list(manager.top(3, order=BucketOrder.TITLE)) == []
+
+    def test_top_by_title_without_text_indexes(self) -> None:
+        """Test that sorting the top tasks by title does not build the text
+        indexes.
+        """
+        manager = TaskManager()
+        manager.load_tasks(tasks)
+        assert list(manager.top(2, order=BucketOrder.TITLE)) == [tasks[2], tasks[4]]
+        assert not manager._text_indexed  # noqa: SLF001
+
+        manager.add_task(Task(title="A", description="", priority=Priority.HIGH))
+        assert next(iter(manager.top(1, order=BucketOrder.TITLE))).title == "A"
+        assert not manager._text_indexed  # noqa: SLF001
+        assert manager.search_prefix(prefix="A")[0].title == "A"
+
+    def test_search_prefix(self) -> None:
+        """Test the search_prefix method."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+        assert manager.search_prefix(prefix="Task", limit=2) == tasks[:2]
+        assert manager.search_prefix(prefix="Task 3") == [tasks[2]]
+        assert manager.search_prefix(prefix="task") == []
+        assert manager.search_prefix(prefix="") == tasks
+
+        new_task = Task(title="Tas", description="", priority=Priority.LOW)
+        manager.add_task(new_task)
+        manager.delete_tasks([tasks[0].title, tasks[1].title])
+        manager.add_task(tasks[0])
+        assert manager.search_prefix(prefix="Tas", limit=3) == [
+            new_task, tasks[0], tasks[2],
+        ]
+
+        with pytest.raises(ValueError, match="limit"):
+            manager.search_prefix(prefix="Task", limit=0)
+
+        for task in tasks[2:]:
+            manager.delete_task(task.title)
+        assert manager.search_prefix(prefix="Task") == [tasks[0]]
+
+    def test_search_ranked(self) -> None:
+        """Test the search_ranked method."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+        manager.update_task(tasks[0].model_copy(update={
+            "description": "Fixing the failing tests",
+        }))
+        manager.delete_task(tasks[1].title)
+
+        assert manager.search_ranked(query="test fails") == [
+            tasks[0].model_copy(update={"description": "Fixing the failing tests"}),
+        ]
+        assert manager.search_ranked(query="description 3 task", limit=1) == [tasks[2]]
+        assert len(manager.search_ranked(query="description", limit=100)) == (
+            len(tasks) - 2
+        )
+        assert manager.search_ranked(query="Task 2") != []
+        assert tasks[1] not in manager.search_ranked(query="Task 2", limit=100)
+        assert manager.search_ranked(query="descriptoin") == []
+        assert manager.search_ranked(query="tsk", fuzziness=1) != []
+
+        with pytest.raises(ValueError, match="limit"):
+            manager.search_ranked(query="task", limit=0)
+        with pytest.raises(ValueError, match="fuzziness"):
+            manager.search_ranked(query="task", fuzziness=-1)
+
+        manager.clear_tasks()
+        assert manager.search_ranked(query="task") == []
+
+    def test_scan_listener(self) -> None:
+        """Test the add_scan_listener method."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+        scans = []
+        manager.add_scan_listener(lambda source, size: scans.append((source, size)))
+
+        list(manager.search_tasks(predicate=lambda _: True))
+        list(manager.search(TaskQuery(priority=Priority.HIGH)))
+        list(manager.search_title(keyword="Task 1"))
+        assert scans == [
+            ("all", len(tasks)),
+            ("priority", manager.count_tasks(priority=Priority.HIGH)),
+            ("title", 1),
+        ]
+
+    def test_count_tasks(self) -> None:
+        """Test the count_tasks method."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+
+        assert sum(manager.count_tasks(priority=priority)
+                   for priority in Priority) == len(tasks)
+        assert manager.count_tasks(priority=Priority.HIGH) == sum(
+            task.priority == Priority.HIGH for task in tasks
+        )
+
     def test_clear_tasks(self) -> None:
         """Test the clear_tasks method."""
         manager = TaskManager()
@@ -206,6 +671,63 @@ class TestTaskManager:
         manager.clear_tasks()
         assert len(manager) == 0
 
+    def test_feed(self) -> None:
+        """Test the feed property."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+        manager.update_task(tasks[0])
+        manager.delete_task(tasks[0].title)
+        manager.clear_tasks()
+
+        assert manager.feed.get_changes(since=0) == [
+            (1, Change(operation=Operation.ADD_ALL, tasks=tasks)),
+            (2, Change(operation=Operation.UPDATE, task=tasks[0])),
+            (3, Change(operation=Operation.DELETE, title=tasks[0].title)),
+            (4, Change(operation=Operation.CLEAR)),
+        ]
+
+        manager.add_task(tasks[0])
+        with pytest.raises(ValueError, match="exists"):
+            manager.add_task(tasks[0])
+        assert manager.feed.version == 5  # noqa: PLR2004
+
+    def test_threads(self) -> None:
+        """Test changing and iterating the tasks from multiple threads."""
+        manager = TaskManager()
+        manager.add_tasks(tasks)
+        new_tasks = [Task(title=f"Thread {i}", description=f"Description {i}",
+                          priority=Priority(i % 3)) for i in range(1000)]
+        limit = 10
+
+        def change(task: Task) -> None:
+            manager.add_task(task)
+            manager.update_task(task.model_copy(
+                update={"priority": Priority((task.priority.value + 1) % 3)}
+            ))
+            manager.delete_task(task.title)
+
+        def read(_: int) -> None:
+            for snapshot in (list(manager.get_all_tasks()),
+                             list(manager.search_title(keyword="Thread")),
+                             list(manager.search_description(keyword="Desc"))):
+                assert snapshot == sorted(snapshot, key=lambda t: -t.priority.value)
+                assert len({t.title for t in snapshot}) == len(snapshot)
+
+            page, cursor = manager.paginate(manager.get_all_tasks(), limit=limit)
+            assert len(page) <= limit
+            assert cursor is None or len(page) == limit
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            changes = executor.map(change, new_tasks)
+            reads = executor.map(read, range(200))
+            list(changes)
+            list(reads)
+
+        assert list(manager.get_all_tasks()) == sorted(
+            tasks, key=lambda t: -t.priority.value
+        )
+        assert len(manager) == len(tasks)
+
 
 if __name__ == "__main__":
     pytest.main(__file__)
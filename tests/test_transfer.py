@@ -0,0 +1,86 @@
+"""Test cases for transfer module."""
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+
+from task import Priority, Task
+from tests import tasks
+from transfer import (
+    MAGIC,
+    TaskDecoder,
+    decode_tasks,
+    encode_tasks,
+    encode_tasks_async,
+)
+
+
+def test_encode_tasks() -> None:
+    """Test the encode_tasks function."""
+    assert b"".join(encode_tasks([])) == MAGIC
+
+    data = b"".join(encode_tasks(tasks))
+    assert data.startswith(MAGIC)
+    assert list(decode_tasks([data])) == tasks
+
+    many = [Task(title=f"Task {i}", description="x" * 100, priority=Priority.LOW)
+            for i in range(1000)]
+    chunks = list(encode_tasks(many))
+    assert len(chunks) > 1
+    assert list(decode_tasks(chunks)) == many
+
+
+def test_encode_tasks_async() -> None:
+    """Test the encode_tasks_async function."""
+    many = [Task(title=f"Task {i}", description="x" * 100, priority=Priority.LOW)
+            for i in range(1000)]
+
+    async def generate() -> AsyncIterator[Task]:
+        for task in many:
+            yield task
+
+    async def encode() -> list[bytes]:
+        return [chunk async for chunk in encode_tasks_async(generate())]
+
+    assert asyncio.run(encode()) == list(encode_tasks(many))
+
+
+def test_decode_tasks() -> None:
+    """Test the decode_tasks function with records split across chunks."""
+    unicode_task = Task(title="Tâche ✓", description="Ünïcode 🎉",
+                        priority=Priority.HIGH)
+    data = b"".join(encode_tasks([unicode_task, *tasks]))
+
+    decoded = list(decode_tasks(data[i:i + 1] for i in range(len(data))))
+    assert decoded == [unicode_task, *tasks]
+    assert [task.model_dump() for task in decoded] == [
+        task.model_dump() for task in [unicode_task, *tasks]
+    ]
+    assert decoded[0].json_bytes == unicode_task.json_bytes
+
+
+@pytest.mark.parametrize(("data", "message"), [
+    (b"", "truncated"),
+    (MAGIC[:2], "truncated"),
+    (b"[]", "not an export"),
+    (b"not an export of tasks", "not an export"),
+    (b"".join(encode_tasks(tasks))[:-1], "truncated"),
+    (MAGIC + b"\x07\x00\x00\x00\x00\x00\x00\x00\x00", "Priority"),
+    (MAGIC + b"\x00\x01\x00\x00\x00\x00\x00\x00\x00\xff", "utf-8"),
+])
+def test_decode_invalid(data: bytes, message: str) -> None:
+    """Test the decode_tasks function with invalid data."""
+    with pytest.raises(ValueError, match=message):
+        list(decode_tasks([data]))
+
+
+def test_task_decoder() -> None:
+    """Test the feed method of TaskDecoder."""
+    data = b"".join(encode_tasks(tasks[:2]))
+    split = len(data) - 1
+    decoder = TaskDecoder()
+
+    assert decoder.feed(data[:split]) == tasks[:1]
+    assert decoder.feed(data[split:]) == tasks[1:2]
+    decoder.close()
@@ -0,0 +1,218 @@
+"""Provides the compact binary format to export and import all tasks, and the
+command line to transfer them from and to a server.
+
+An export starts with the magic bytes and the version of the format, followed by
+a record for each task. A record is the value of the priority in a byte and the
+lengths in bytes of the UTF-8 title and description as 32-bit little-endian
+integers, followed by the title and the description. The records are decoded as
+they arrive, so neither end holds more than the tasks themselves.
+
+Run it with ``python -m transfer export tasks.bin`` to export the tasks of a
+server, and ``python -m transfer import tasks.bin`` to import them into another.
+"""
+
+import argparse
+import shutil
+import struct
+import sys
+import urllib.error
+import urllib.request
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from task import Priority, Task
+
+MAGIC = b"TMST\x01"
+MEDIA_TYPE = "application/vnd.tms.tasks"
+CHUNK_SIZE = 64 * 1024
+
+_RECORD = struct.Struct("<BII")
+_PRIORITIES = {priority.value: priority for priority in Priority}
+
+
+def encode_tasks(tasks: Iterable[Task]) -> Iterator[bytes]:
+    """Lazily encode tasks into chunks of the export format.
+    Time complexity: ``O(k * m)`` where k is the number of tasks and m is the length
+    of the title and the description of a task.
+
+    :param tasks: Tasks to encode. They are consumed lazily.
+    :return: Chunks of about CHUNK_SIZE bytes, starting with the magic bytes.
+    """
+    chunk = bytearray(MAGIC)
+    for task in tasks:
+        _encode_task(chunk, task)
+        if len(chunk) >= CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk.clear()
+
+    if chunk:
+        yield bytes(chunk)
+
+
+async def encode_tasks_async(tasks: AsyncIterable[Task]) -> AsyncIterator[bytes]:
+    """Lazily encode tasks that arrive asynchronously into chunks of the export
+    format.
+    Time complexity: ``O(k * m)`` where k is the number of tasks and m is the length
+    of the title and the description of a task.
+
+    :param tasks: Tasks to encode. They are consumed lazily.
+    :return: Chunks of about CHUNK_SIZE bytes, starting with the magic bytes.
+    """
+    chunk = bytearray(MAGIC)
+    async for task in tasks:
+        _encode_task(chunk, task)
+        if len(chunk) >= CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk.clear()
+
+    if chunk:
+        yield bytes(chunk)
+
+
+def _encode_task(chunk: bytearray, task: Task) -> None:
+    """Append the record of a task to a chunk.
+
+    :param chunk: The chunk to append the record to.
+    :param task: The task to encode.
+    """
+    title = task.title.encode()
+    description = task.description.encode()
+    chunk += _RECORD.pack(task.priority.value, len(title), len(description))
+    chunk += title
+    chunk += description
+
+
+class TaskDecoder:
+    """Decodes the tasks of the export format from the chunks fed to it, which may
+    split the records anywhere.
+
+    The decoded values are exactly those that validating them would produce, so the
+    tasks are constructed without being validated.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the decoder expecting the magic bytes."""
+        self._buffer = bytearray()
+        self._started = False
+
+    def feed(self, data: bytes) -> list[Task]:
+        """Decode the tasks completed by a chunk.
+        Time complexity: ``O(c + k * m)`` where c is the size of the chunk, and k is
+        the number of tasks completed by it.
+
+        :param data: The next chunk of the export.
+        :return: The tasks whose records are completed by the chunk.
+        :raises ValueError: If the data is not in the export format.
+        """
+        buffer = self._buffer
+        buffer += data
+        offset = 0
+        if not self._started:
+            if len(buffer) < len(MAGIC):
+                if not MAGIC.startswith(buffer):
+                    raise ValueError("The data is not an export of tasks.")
+                return []
+            if not buffer.startswith(MAGIC):
+                raise ValueError("The data is not an export of tasks.")
+            self._started = True
+            offset = len(MAGIC)
+
+        tasks = []
+        while len(buffer) - offset >= _RECORD.size:
+            value, title_size, description_size = _RECORD.unpack_from(buffer, offset)
+            start = offset + _RECORD.size
+            end = start + title_size + description_size
+            if len(buffer) < end:
+                break
+
+            priority = _PRIORITIES.get(value)
+            if priority is None:
+                raise ValueError(f"Invalid Priority: {value}")
+            tasks.append(Task.model_construct(
+                title=buffer[start:start + title_size].decode(),
+                description=buffer[start + title_size:end].decode(),
+                priority=priority,
+            ))
+            offset = end
+
+        del buffer[:offset]
+        return tasks
+
+    def close(self) -> None:
+        """Check that the export has ended at the end of a record.
+
+        :raises ValueError: If the export is empty or ends in the middle of a
+        record.
+        """
+        if not self._started or self._buffer:
+            raise ValueError("The export of tasks is truncated.")
+
+
+def decode_tasks(chunks: Iterable[bytes]) -> Iterator[Task]:
+    """Lazily decode tasks from chunks of the export format.
+
+    :param chunks: Chunks of the export.
+    :return: The decoded tasks.
+    :raises ValueError: If the chunks are not a complete export.
+    """
+    decoder = TaskDecoder()
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    decoder.close()
+
+
+def export_tasks(url: str, path: Path) -> None:
+    """Export the tasks of a server into a file.
+
+    :param url: Base URL of the server.
+    :param path: Path of the file to write the tasks to.
+    """
+    with (urllib.request.urlopen(f"{url}/api/tasks/export") as response,  # noqa: S310
+          path.open("wb") as file):
+        shutil.copyfileobj(response, file, CHUNK_SIZE)
+
+
+def import_tasks(url: str, path: Path) -> None:
+    """Import the tasks of a file into a server.
+
+    :param url: Base URL of the server.
+    :param path: Path of the file to read the tasks from.
+    """
+    with path.open("rb") as file:
+        request = urllib.request.Request(  # noqa: S310
+            f"{url}/api/tasks/import", data=file, method="POST",
+            headers={"Content-Type": MEDIA_TYPE,
+                     "Content-Length": str(path.stat().st_size)},
+        )
+        with urllib.request.urlopen(request):  # noqa: S310
+            pass
+
+
+def main() -> None:
+    """Export or import the tasks of a server."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=["export", "import"],
+                        help="whether to export or import the tasks")
+    parser.add_argument("file", type=Path,
+                        help="path of the file to write or read the tasks")
+    parser.add_argument("--url", default="http://localhost:8000",
+                        help="base URL of the server")
+    args = parser.parse_args()
+    url = args.url.rstrip("/")
+    if urlsplit(url).scheme not in ("http", "https"):
+        parser.error("the URL must be an http or https URL")
+
+    try:
+        if args.command == "export":
+            export_tasks(url, args.file)
+        else:
+            import_tasks(url, args.file)
+    except urllib.error.HTTPError as e:
+        sys.exit(f"{e.code} {e.reason}: {e.read().decode(errors='replace')}")
+    except (urllib.error.URLError, OSError) as e:
+        sys.exit(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Entry point of the writer process of the tasks shared by multiple workers.
+
+Run it with ``python -m writer`` before starting the workers with the same
+``TMS_SHARED_SOCKET``.
+"""
+
+import argparse
+import os
+import signal
+from pathlib import Path
+
+from settings import create_memory_manager
+from shared_task import TaskServer
+
+
+def main() -> None:
+    """Serve the tasks until the process is interrupted or terminated."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--socket", type=Path,
+                        default=os.environ.get("TMS_SHARED_SOCKET"),
+                        help="path of the Unix socket to listen on")
+    args = parser.parse_args()
+    if args.socket is None:
+        parser.error("the socket must be given by --socket or TMS_SHARED_SOCKET")
+
+    # Terminating the process also makes the persisted changes durable.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    server = TaskServer(create_memory_manager(), args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()